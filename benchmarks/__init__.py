@@ -0,0 +1,5 @@
+# benchmarks/__init__.py
+'''
+Воспроизводимые замеры сценариев ValutaTrade Hub на синтетических каталогах данных:
+python -m benchmarks generate|run|compare
+'''
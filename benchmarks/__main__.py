@@ -0,0 +1,198 @@
+# benchmarks/__main__.py
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from .compare import compare, load_report, print_comparison
+from .datagen import SCALES, generate_dataset
+from .loadgen import DEFAULT_MIX, parse_mix, run_load
+from .provider_server import ProviderServer, load_series, synthetic_series
+from .suite import CASES, run_suite
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_ROOT = os.path.join(_HERE, '.data')
+DEFAULT_RESULTS_DIR = os.path.join(_HERE, 'results')
+
+
+def _scales(args) -> dict:
+    if args.users is not None:
+        return {"custom": {"users": args.users, "wallets": args.wallets, "ticks": args.ticks}}
+    names = args.scale or ['tiny']
+    unknown = [n for n in names if n not in SCALES]
+    if unknown:
+        raise SystemExit(f"Неизвестный масштаб: {', '.join(unknown)} (доступны: {', '.join(SCALES)})")
+    return {name: SCALES[name] for name in names}
+
+
+def _add_scale_args(parser):
+    parser.add_argument("--scale", action="append", help=f"масштаб набора данных ({', '.join(SCALES)}); можно несколько раз")
+    parser.add_argument("--users", type=int, help="свой масштаб: число пользователей (вместо --scale)")
+    parser.add_argument("--wallets", type=int, default=10, help="кошельков на пользователя для --users")
+    parser.add_argument("--ticks", type=int, default=100_000, help="записей истории курсов для --users")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-root", default=DEFAULT_DATA_ROOT, help="каталог для наборов данных")
+
+
+def cmd_generate(args):
+    for name, scale in _scales(args).items():
+        path = os.path.join(args.data_root, f"{name}-{args.backend}")
+        manifest = generate_dataset(path, scale["users"], scale["wallets"], scale["ticks"], args.backend, args.seed)
+        print(f"{name}: {manifest['users']} пользователей, {manifest['wallets']} кошельков, "
+              f"{manifest['ticks']} записей истории -> {path} ({manifest['elapsed_s']} с)")
+    return 0
+
+
+def cmd_run(args):
+    cases = args.case or list(CASES)
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"Неизвестный сценарий: {', '.join(unknown)} (доступны: {', '.join(CASES)})")
+
+    report = run_suite(_scales(args), args.data_root, args.backend, cases, args.iterations, args.seed)
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.now():%Y%m%dT%H%M%S}-{args.backend}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+
+    for scale_name, scale in report["scales"].items():
+        print(f"\n[{scale_name}] {scale['dataset']['users']} пользователей, {scale['dataset']['ticks']} записей истории")
+        print(f"{'сценарий':<16} {'n':>6} {'p50 мс':>10} {'p95 мс':>10} {'p99 мс':>10} {'оп/с':>10}")
+        for case, stats in scale["cases"].items():
+            print(f"{case:<16} {stats['n']:>6} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+                  f"{stats['p99_ms']:>10.3f} {stats['ops_per_s']:>10.1f}")
+    print(f"\nРезультаты сохранены в {output}")
+
+    if args.baseline:
+        rows = compare(load_report(args.baseline), report, args.threshold, args.metric)
+        print()
+        print_comparison(rows, args.metric)
+        return 1 if any(r["status"] == "regression" for r in rows) else 0
+    return 0
+
+
+def cmd_compare(args):
+    rows = compare(load_report(args.baseline), load_report(args.current), args.threshold, args.metric)
+    print_comparison(rows, args.metric)
+    return 1 if any(r["status"] == "regression" for r in rows) else 0
+
+
+def cmd_load(args):
+    try:
+        mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if args.accounts is not None and not 0 < args.accounts <= args.traders:
+        raise SystemExit("--accounts должно быть от 1 до --traders")
+    report = run_load(args.traders, args.rate, args.duration, args.mode, args.data_dir, args.backend, mix, args.seed,
+                      args.accounts, args.keep)
+
+    config = report["config"]
+    print(f"{config['traders']} трейдеров ({config['mode']}) на {config['accounts']} счетах, цель {config['target_rate']} оп/с, "
+          f"{config['duration_s']} с, каталог {config['data_dir']}{'' if config['data_kept'] else ' (удалён)'}")
+    print(f"Операций: {report['operations']}, пропускная способность: {report['throughput_ops_s']} оп/с")
+    print(f"{'операция':<10} {'n':>7} {'p50 мс':>10} {'p99 мс':>10}")
+    for kind, stats in report["latency"].items():
+        print(f"{kind:<10} {stats['n']:>7} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f}")
+    print("Исходы: " + ", ".join(f"{k}={v}" for k, v in report["outcomes"].items()))
+
+    audit = report["audit"]
+    print(f"Сверка: пользователей {audit['users_checked']}, сделок в журнале {audit['trades_in_ledger']}, "
+          f"не записано в журнал {audit['unrecorded_trades']}, расхождений балансов {len(audit['balance_mismatches'])}")
+    for u in audit["unresolved_users"][:10]:
+        print(f"  user {u['user_id']}: ожидался '{u['username']}', найден {u['resolved']!r}")
+    for m in audit["balance_mismatches"][:10]:
+        print(f"  user {m['user_id']} {m['currency']}: ожидалось {m['expected']:.8f}, в портфеле {m['actual']:.8f}")
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"Отчёт сохранён в {args.output}")
+    return 0 if audit["consistent"] else 1
+
+
+def cmd_serve(args):
+    series = load_series(args.series) if args.series else synthetic_series(args.steps, args.seed)
+    server = ProviderServer(
+        (args.host, args.port), series, args.latency_ms, args.jitter_ms, args.error_rate,
+        args.payload_entries, args.step_seconds, args.cache_control, args.seed,
+    )
+    print(f"Сервер-заглушка источников курсов: {server.url} (снимков в серии: {len(series)})")
+    print(f"  export VALUTATRADE_COINGECKO_URL={server.url}/api/v3/simple/price")
+    print(f"  export VALUTATRADE_EXCHANGERATE_URL={server.url}/v6")
+    print("  export EXCHANGERATE_API_KEY=offline")
+    print(f"Статистика запросов: {server.url}/__stats; остановка — Ctrl+C")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def main(argv=None):
+    '''Бенчмарки: python -m benchmarks generate|run|compare'''
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Бенчмарки ValutaTrade Hub")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    generate = sub.add_parser("generate", help="создать синтетические наборы данных")
+    _add_scale_args(generate)
+    generate.set_defaults(func=cmd_generate)
+
+    run = sub.add_parser("run", help="замерить сценарии и сохранить результаты в json")
+    _add_scale_args(run)
+    run.add_argument("--case", action="append", help=f"сценарий ({', '.join(CASES)}); по умолчанию все")
+    run.add_argument("--iterations", type=int, help="повторов каждого сценария (по умолчанию свои для каждого)")
+    run.add_argument("--output", help="файл результатов (по умолчанию benchmarks/results/<время>-<backend>.json)")
+    run.add_argument("--baseline", help="сравнить с результатами предыдущего прогона")
+
+    compare_parser = sub.add_parser("compare", help="сравнить два файла результатов")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    for p in (run, compare_parser):
+        p.add_argument("--threshold", type=float, default=0.10, help="допустимый рост метрики (доля), по умолчанию 0.10")
+        p.add_argument("--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms", "min_ms"])
+    load = sub.add_parser("load", help="нагрузка параллельными трейдерами и сверка балансов с журналом")
+    load.add_argument("--traders", type=int, default=8, help="число трейдеров")
+    load.add_argument("--rate", type=float, default=50.0, help="суммарный целевой темп, оп/с")
+    load.add_argument("--duration", type=float, default=10.0, help="длительность торговли, с")
+    load.add_argument("--mode", choices=["thread", "process"], default="thread")
+    load.add_argument("--accounts", type=int, help="число общих счетов (трейдеры делят их); по умолчанию у каждого свой")
+    load.add_argument("--mix", help="доли операций, например buy=0.4,sell=0.3,get_rate=0.3")
+    load.add_argument("--data-dir", help="каталог данных (по умолчанию временный, удаляется после прогона)")
+    load.add_argument("--keep", action="store_true", help="не удалять временный каталог данных")
+    load.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--output", help="сохранить отчёт в json")
+    load.set_defaults(func=cmd_load)
+
+    serve = sub.add_parser("serve", help="локальный сервер-заглушка CoinGecko и ExchangeRate-API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--series", help="записанная история: каталог history/, файл .jsonl или exchange_rates.json")
+    serve.add_argument("--steps", type=int, default=1000, help="длина синтетической серии (без --series)")
+    serve.add_argument("--step-seconds", type=float, default=0.0, help="смена снимка по времени; 0 — на каждый запрос")
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500")
+    serve.add_argument("--payload-entries", type=int, default=0, help="дополнительных синтетических курсов в ответе")
+    serve.add_argument("--cache-control", default="no-cache", help="значение заголовка Cache-Control")
+    serve.add_argument("--seed", type=int, default=0)
+    serve.set_defaults(func=cmd_serve)
+
+    run.set_defaults(func=cmd_run)
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
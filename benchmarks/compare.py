@@ -0,0 +1,40 @@
+# benchmarks/compare.py
+
+import json
+
+
+def load_report(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10, metric: str = 'p50_ms') -> list:
+    '''
+    Сравнение двух прогонов по метрике metric для общих пар (масштаб, сценарий).
+    status: "regression" — рост больше threshold (доля), "improvement" — снижение больше threshold, иначе "ok".
+    '''
+    rows = []
+    for scale_name, scale in current.get("scales", {}).items():
+        base_cases = baseline.get("scales", {}).get(scale_name, {}).get("cases", {})
+        for case, stats in scale.get("cases", {}).items():
+            if case not in base_cases:
+                continue
+            old = base_cases[case][metric]
+            new = stats[metric]
+            change = (new - old) / old if old else 0.0
+            if change > threshold:
+                status = "regression"
+            elif change < -threshold:
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append({"scale": scale_name, "case": case, "old": old, "new": new, "change": change, "status": status})
+    return rows
+
+
+def print_comparison(rows: list, metric: str):
+    print(f"{'масштаб':<8} {'сценарий':<16} {metric + ' было':>14} {metric + ' стало':>14} {'изменение':>10}  статус")
+    print("-" * 78)
+    for row in rows:
+        print(f"{row['scale']:<8} {row['case']:<16} {row['old']:>14.4f} {row['new']:>14.4f} "
+              f"{row['change'] * 100:>+9.1f}%  {row['status']}")
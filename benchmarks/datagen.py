@@ -0,0 +1,168 @@
+# benchmarks/datagen.py
+
+import json
+import os
+import random
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from valutatrade_hub.core.currencies import _CURRENCY_REGISTRY as CURRENCY_REGISTRY
+from valutatrade_hub.core.utils import derive_password_hash
+from valutatrade_hub.infra.database import db_manager
+from valutatrade_hub.infra.settings import settings
+from valutatrade_hub.infra.storage_backend import get_backend
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+# пароль всех синтетических пользователей
+BENCH_PASSWORD = "benchmark-password"
+
+# масштабы наборов данных: пользователи, кошельков на пользователя, записей истории курсов
+SCALES = {
+    "tiny": {"users": 100, "wallets": 10, "ticks": 10_000},
+    "1k": {"users": 1_000, "wallets": 10, "ticks": 100_000},
+    "100k": {"users": 100_000, "wallets": 10, "ticks": 1_000_000},
+}
+
+# стартовые курсы к USD для случайного блуждания истории
+BASE_PRICES = {"EUR": 1.08, "GBP": 1.27, "RUB": 0.011, "BTC": 60_000.0, "ETH": 3_300.0, "SOL": 145.0}
+
+_MANIFEST = "benchmark_manifest.json"
+_BATCH_SIZE = 10_000
+
+
+@contextmanager
+def use_data_directory(path: str, backend: str = None):
+    '''
+    Временное переключение settings['data_directory'] (и storage_backend) на каталог набора данных.
+    Кеш DatabaseManager сбрасывается на входе и выходе, чтобы каталоги не смешивались.
+    '''
+    saved = {key: settings.get(key) for key in ('data_directory', 'storage_backend')}
+    settings['data_directory'] = path
+    if backend:
+        settings['storage_backend'] = backend
+    db_manager.clear_cache()
+    try:
+        yield get_backend()
+    finally:
+        get_backend().close()
+        for key, value in saved.items():
+            settings[key] = value
+        db_manager.clear_cache()
+
+
+def _user_dict(user_id: int, salt: str, hashed_password: str, registered: str) -> dict:
+    return {
+        "user_id": user_id,
+        "username": f"user{user_id:07d}",
+        "hashed_password": hashed_password,
+        "salt": salt,
+        "registration_date": registered,
+    }
+
+
+def _write_history(backend, codes: list, ticks: int, rng: random.Random) -> int:
+    '''
+    Случайное блуждание курсов <CODE>_USD с шагом в минуту, заканчивающееся текущим моментом
+    '''
+    pairs = [code for code in codes if code != 'USD']
+    if not pairs or ticks <= 0:
+        return 0
+    steps = ticks // len(pairs)
+    prices = {code: BASE_PRICES.get(code, 1.0) for code in pairs}
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=steps)
+    written = 0
+    batch = []
+    for step in range(steps):
+        ts = (start + timedelta(minutes=step)).isoformat()
+        for code in pairs:
+            prices[code] *= 1 + rng.gauss(0, 0.001)
+            batch.append({
+                "id": f"{code}_USD_{ts}",
+                "from_currency": code,
+                "to_currency": "USD",
+                "rate": round(prices[code], 8),
+                "timestamp": ts,
+                "source": "benchmark",
+            })
+        if len(batch) >= _BATCH_SIZE:
+            backend.append_history(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        backend.append_history(batch)
+        written += len(batch)
+    return written
+
+
+def generate_dataset(path: str, users: int, wallets: int, ticks: int, backend: str = 'json', seed: int = 0) -> dict:
+    '''
+    Синтетический каталог данных: пользователи user0000001.. с паролем BENCH_PASSWORD,
+    портфели с wallets кошельками (не больше числа известных валют), свежий снимок курсов
+    и ticks записей истории. Результат детерминирован по seed (кроме отметок времени).
+    Все пользователи разделяют одну соль и хэш — KDF вычисляется один раз, а не users раз.
+    '''
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    rng = random.Random(seed)
+    codes = list(CURRENCY_REGISTRY)
+    requested = {"users": users, "wallets": wallets, "ticks": ticks}
+    wallets = min(wallets, len(codes))
+    started = time.perf_counter()
+
+    with use_data_directory(path, backend) as store:
+        salt = f"{seed:032x}"
+        hashed_password = derive_password_hash(BENCH_PASSWORD, salt)
+        registered = datetime.now().isoformat()
+        store.add_users([_user_dict(uid, salt, hashed_password, registered) for uid in range(1, users + 1)])
+
+        for uid in range(1, users + 1):
+            held = ['USD'] + rng.sample([c for c in codes if c != 'USD'], wallets - 1)
+            balances = {code: 1_000_000.0 if code == 'USD' else round(rng.uniform(0.1, 100.0), 6) for code in held}
+            store.save_portfolio({
+                "user_id": uid,
+                "wallets": {code: {"currency_code": code, "balance": balance} for code, balance in balances.items()},
+            })
+
+        now = datetime.utcnow().isoformat()
+        pairs = {
+            f"{code}_USD": {"rate": BASE_PRICES.get(code, 1.0), "updated_at": now, "source": "benchmark"}
+            for code in codes if code != 'USD'
+        }
+        RatesStorage().save_snapshot(pairs)
+        written = _write_history(store, codes, ticks, rng)
+
+    manifest = {
+        "requested": requested,
+        "users": users,
+        "wallets": wallets,
+        "ticks": written,
+        "backend": backend,
+        "seed": seed,
+        "generated_at": datetime.now().isoformat(),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+    with open(os.path.join(path, _MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+def load_manifest(path: str):
+    try:
+        with open(os.path.join(path, _MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def ensure_dataset(path: str, scale: dict, backend: str = 'json', seed: int = 0) -> dict:
+    '''
+    Готовый набор данных: существующий каталог переиспользуется, если параметры совпадают
+    '''
+    manifest = load_manifest(path)
+    wanted = {"requested": dict(scale), "backend": backend, "seed": seed}
+    if manifest and all(manifest.get(k) == v for k, v in wanted.items()):
+        return manifest
+    return generate_dataset(path, scale["users"], scale["wallets"], scale["ticks"], backend, seed)
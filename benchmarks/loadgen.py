@@ -0,0 +1,249 @@
+# benchmarks/loadgen.py
+
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from valutatrade_hub.core.currencies import _CURRENCY_REGISTRY as CURRENCY_REGISTRY
+from valutatrade_hub.core.exceptions import InsufficientFundsError
+from valutatrade_hub.core.usecases import SystemCore
+from valutatrade_hub.infra.settings import settings
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+from .datagen import BASE_PRICES, BENCH_PASSWORD, use_data_directory
+from .suite import summarize
+
+DEFAULT_MIX = {"buy": 0.4, "sell": 0.3, "get_rate": 0.3}
+
+# стартовый баланс, который register_user кладёт на кошелёк базовой валюты
+_START_BALANCE = 1000.0
+_TOLERANCE = 1e-6
+
+
+def parse_mix(text: str) -> dict:
+    '''
+    "buy=0.4,sell=0.3,get_rate=0.3" -> {"buy": 0.4, ...}
+    '''
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Неизвестная операция '{name}' (доступны: {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise ValueError("Сумма весов операций должна быть положительной")
+    return mix
+
+
+def run_trader(trader_id: int, run_id: str, mix: dict, rate_per_trader: float, duration: float, seed: int,
+               username: str = None) -> dict:
+    '''
+    Один трейдер: регистрация (или вход в общий счёт username), вход и поток случайных операций
+    с темпом rate_per_trader оп/с. Расписание открытое: следующая операция планируется от старта,
+    а не от конца предыдущей, поэтому задержки из-за конкуренции за файлы не снижают целевую нагрузку.
+    '''
+    rng = random.Random(seed * 100_003 + trader_id)
+    core = SystemCore()
+    base = settings.get('default_base_currency', 'USD')
+    codes = [code for code in CURRENCY_REGISTRY if code != base]
+    latencies = {name: [] for name in ("register", "login", *mix)}
+    outcomes = Counter()
+    holdings = {}
+    trades_ok = 0
+
+    if username is None:
+        started = time.perf_counter()
+        username = core.register_user(f"load_{run_id}_{trader_id}", BENCH_PASSWORD).username
+        latencies["register"].append(time.perf_counter() - started)
+    started = time.perf_counter()
+    user = core.login_user(username, BENCH_PASSWORD)
+    latencies["login"].append(time.perf_counter() - started)
+
+    kinds, weights = zip(*mix.items())
+    interval = 1.0 / rate_per_trader if rate_per_trader > 0 else 0.0
+    begin = time.perf_counter()
+    deadline = begin + duration
+    n = 0
+    while True:
+        scheduled = begin + n * interval
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        n += 1
+
+        kind = rng.choices(kinds, weights)[0]
+        code = rng.choice(codes)
+        op_started = time.perf_counter()
+        try:
+            if kind == "buy":
+                amount = round(rng.uniform(1.0, 20.0) / BASE_PRICES[code], 8)
+                core.buy_currency(user, code, amount)
+                holdings[code] = holdings.get(code, 0.0) + amount
+                trades_ok += 1
+            elif kind == "sell":
+                held = holdings.get(code, 0.0)
+                # в половине случаев — больше, чем есть: проверка отказов под нагрузкой
+                # (на общем счёте holdings — только покупки этого трейдера, остаток могли продать другие)
+                amount = round(held * rng.uniform(0.1, 0.9), 8) if held and rng.random() < 0.5 else 1.0
+                core.sell_currency(user, code, amount)
+                holdings[code] = max(held - amount, 0.0)
+                trades_ok += 1
+            else:
+                core.get_rate(code, base)
+            outcome = "ok"
+        except (InsufficientFundsError, ValueError):
+            outcome = "rejected"
+        except Exception as e:
+            outcome = f"error:{type(e).__name__}"
+        latencies[kind].append(time.perf_counter() - op_started)
+        outcomes[f"{kind}:{outcome}"] += 1
+
+    return {
+        "trader_id": trader_id,
+        "user_id": user.user_id,
+        "username": user.username,
+        "latencies": latencies,
+        "outcomes": dict(outcomes),
+        "trades_ok": trades_ok,
+        "elapsed_s": time.perf_counter() - begin,
+    }
+
+
+def _trader_process(args) -> dict:
+    # отдельный процесс (spawn): свой SystemCore и свои блокировки, общий каталог данных
+    data_dir, backend, *trader_args = args
+    settings['data_directory'] = data_dir
+    settings['storage_backend'] = backend
+    return run_trader(*trader_args)
+
+
+def audit(core: SystemCore, traders: list) -> dict:
+    '''
+    Сверка балансов с журналом сделок по каждому счёту: стартовый баланс плюс сумма сделок из журнала
+    должны совпасть с портфелем, а число сделок в журнале — с числом успешных сделок всех трейдеров счёта.
+    Каждый user_id должен находиться через get_user_by_id с тем же именем, что при входе.
+    '''
+    base = settings.get('default_base_currency', 'USD')
+    accounts = {}
+    for trader in traders:
+        account = accounts.setdefault(trader["user_id"], {"username": trader["username"], "trades_ok": 0})
+        account["trades_ok"] += trader["trades_ok"]
+
+    mismatches = []
+    unresolved = []
+    unrecorded = 0
+    trades_in_ledger = 0
+    for user_id, account in accounts.items():
+        user = core.backend.get_user_by_id(user_id)
+        if user is None or user["username"] != account["username"]:
+            unresolved.append({"user_id": user_id, "username": account["username"],
+                               "resolved": user["username"] if user else None})
+        trades = core.get_trades(user_id)
+        trades_in_ledger += len(trades)
+        unrecorded += account["trades_ok"] - len(trades)
+        expected = {base: _START_BALANCE}
+        for t in trades:
+            code = t["pair"].split('_')[0]
+            sign = 1 if t["side"] == "buy" else -1
+            expected[code] = expected.get(code, 0.0) + sign * t["amount"]
+            expected[base] = expected.get(base, 0.0) - sign * t["total"]
+
+        portfolio = core.get_portfolio(user_id)
+        actual = {code: w.balance for code, w in portfolio.wallets.items()} if portfolio else {}
+        for code in set(expected) | set(actual):
+            want, got = expected.get(code, 0.0), actual.get(code, 0.0)
+            if abs(want - got) > _TOLERANCE * max(1.0, abs(want)):
+                mismatches.append({"user_id": user_id, "currency": code, "expected": want, "actual": got})
+    return {
+        "users_checked": len(accounts),
+        "trades_in_ledger": trades_in_ledger,
+        "unrecorded_trades": unrecorded,
+        "unresolved_users": unresolved,
+        "balance_mismatches": mismatches,
+        "consistent": not mismatches and not unresolved and unrecorded == 0,
+    }
+
+
+def run_load(traders: int, rate: float, duration: float, mode: str = 'thread', data_dir: str = None,
+             backend: str = 'json', mix: dict = None, seed: int = 0, accounts: int = None, keep: bool = False) -> dict:
+    '''
+    Нагрузка traders трейдерами с суммарным темпом rate оп/с в течение duration секунд.
+    accounts — число общих счетов: они регистрируются заранее, трейдер i торгует счётом i % accounts
+    (проверка потерянных обновлений при одновременной торговле одним портфелем); без accounts
+    у каждого трейдера свой счёт. Без data_dir используется временный каталог, который после
+    прогона удаляется (keep=True — оставить для разбора). Снимок курсов перед стартом
+    перезаписывается свежими отметками времени, иначе get_rate отказывал бы по rates_max_age_seconds.
+    '''
+    if accounts is not None and not 0 < accounts <= traders:
+        raise ValueError("Число общих счетов должно быть от 1 до числа трейдеров")
+    mix = mix or DEFAULT_MIX
+    temporary = data_dir is None
+    data_dir = os.path.abspath(data_dir or tempfile.mkdtemp(prefix='valutatrade-load-'))
+    run_id = f"{random.Random(seed).getrandbits(32):08x}{int(time.time()) % 100_000:05d}"
+    per_trader = rate / traders if traders else 0.0
+
+    try:
+        with use_data_directory(data_dir, backend):
+            storage = RatesStorage()
+            now = datetime.utcnow().isoformat()
+            current = storage.backend.load_rates()["pairs"]
+            pairs = {
+                f"{code}_USD": {"rate": current.get(f"{code}_USD", {}).get("rate", BASE_PRICES[code]),
+                                "updated_at": now, "source": "loadgen"}
+                for code in CURRENCY_REGISTRY if code != 'USD'
+            }
+            storage.save_snapshot(pairs)
+
+            usernames = [None] * traders
+            if accounts:
+                core = SystemCore()
+                shared = [core.register_user(f"load_{run_id}_acct{j}", BENCH_PASSWORD).username for j in range(accounts)]
+                usernames = [shared[i % accounts] for i in range(traders)]
+            jobs = [(i, run_id, mix, per_trader, duration, seed, usernames[i]) for i in range(traders)]
+            started = time.perf_counter()
+            if mode == 'process':
+                ctx = multiprocessing.get_context('spawn')
+                with ctx.Pool(traders) as pool:
+                    results = pool.map(_trader_process, [(data_dir, backend, *job) for job in jobs])
+            else:
+                with ThreadPoolExecutor(max_workers=traders, thread_name_prefix='trader') as executor:
+                    results = list(executor.map(lambda job: run_trader(*job), jobs))
+            wall = time.perf_counter() - started
+
+            audit_report = audit(SystemCore(), results)
+    finally:
+        if temporary and not keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    by_kind = {}
+    for kind in ("register", "login", *mix):
+        durations = [d for r in results for d in r["latencies"].get(kind, [])]
+        if durations:
+            by_kind[kind] = summarize(durations)
+    outcomes = Counter()
+    for r in results:
+        outcomes.update(r["outcomes"])
+    operations = sum(outcomes.values())
+    trading = max((r["elapsed_s"] for r in results), default=0.0)
+    return {
+        "config": {
+            "traders": traders, "accounts": accounts or traders, "target_rate": rate, "duration_s": duration, "mode": mode,
+            "backend": backend, "data_dir": data_dir, "data_kept": not temporary or keep, "mix": mix, "seed": seed,
+        },
+        "operations": operations,
+        "wall_s": round(wall, 3),
+        # по времени торговли, без регистрации и входа (они замеряются отдельно)
+        "throughput_ops_s": round(operations / trading, 2) if trading else 0.0,
+        "latency": by_kind,
+        "outcomes": dict(sorted(outcomes.items())),
+        "audit": audit_report,
+    }
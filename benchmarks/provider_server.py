@@ -0,0 +1,246 @@
+# benchmarks/provider_server.py
+
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from valutatrade_hub.parser_service.config import parser_config
+
+from .datagen import BASE_PRICES
+
+_COINGECKO_PATH = "/api/v3/simple/price"
+_EXCHANGERATE_PREFIX = "/v6/"
+
+
+def synthetic_series(steps: int = 1000, seed: int = 0) -> list:
+    '''
+    Случайное блуждание курсов к USD: список снимков {код: курс}
+    '''
+    rng = random.Random(seed)
+    prices = dict(BASE_PRICES)
+    series = []
+    for _ in range(steps):
+        for code in prices:
+            prices[code] *= 1 + rng.gauss(0, 0.001)
+        series.append(dict(prices))
+    return series
+
+
+def load_series(path: str) -> list:
+    '''
+    Снимки курсов из записанной истории: сегменты history/*.jsonl, файл .jsonl
+    или устаревший exchange_rates.json (список записей). Записи группируются по timestamp,
+    отсутствующие в шаге пары берутся из предыдущего снимка.
+    '''
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.jsonl')))
+    else:
+        files = [path]
+    records = []
+    for name in files:
+        with open(name, 'r', encoding='utf-8') as f:
+            if name.endswith('.jsonl'):
+                records.extend(json.loads(line) for line in f if line.endswith("\n"))
+            else:
+                records.extend(json.load(f))
+
+    steps = {}
+    for r in records:
+        if r.get('to_currency') == 'USD':
+            steps.setdefault(str(r['timestamp']), {})[r['from_currency']] = float(r['rate'])
+    series = []
+    current = dict(BASE_PRICES)
+    for ts in sorted(steps):
+        current = {**current, **steps[ts]}
+        series.append(current)
+    if not series:
+        raise ValueError(f"В {path} нет записей курсов к USD")
+    return series
+
+
+class ProviderServer(ThreadingHTTPServer):
+    '''
+    Локальная замена CoinGecko (/api/v3/simple/price) и ExchangeRate-API (/v6/<ключ>/latest/<база>).
+    Каждый запрос к источнику продвигает его серию на шаг (или шаг меняется каждые step_seconds).
+    latency_ms ± jitter_ms — задержка ответа, error_rate — доля ответов 500,
+    payload_entries — число дополнительных синтетических курсов в ответе (объём json).
+    Ответы несут ETag и Cache-Control, на совпавший If-None-Match отвечается 304.
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), series=None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, payload_entries: int = 0, step_seconds: float = 0.0,
+                 cache_control: str = "no-cache", seed: int = 0):
+        super().__init__(address, ProviderHandler)
+        self.series = series or synthetic_series(seed=seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.payload_entries = payload_entries
+        self.step_seconds = step_seconds
+        self.cache_control = cache_control
+        self.rng = random.Random(seed)
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.positions = {}
+        self.stats = {"requests": 0, "errors": 0, "not_modified": 0, "by_source": {}}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_snapshot(self, source: str) -> dict:
+        with self.lock:
+            if self.step_seconds > 0:
+                position = int((time.monotonic() - self.started) / self.step_seconds)
+            else:
+                position = self.positions.get(source, 0)
+                self.positions[source] = position + 1
+            return self.series[position % len(self.series)]
+
+    def draw(self):
+        '''
+        (задержка в секундах, ответить ли ошибкой)
+        '''
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.rng.random() < self.error_rate
+        return delay, fail
+
+    def record(self, source: str, status: int):
+        with self.lock:
+            self.stats["requests"] += 1
+            by_source = self.stats["by_source"].setdefault(source, {})
+            by_source[str(status)] = by_source.get(str(status), 0) + 1
+            if status >= 500:
+                self.stats["errors"] += 1
+            elif status == 304:
+                self.stats["not_modified"] += 1
+
+    def coingecko_body(self, ids: list, vs: str) -> dict:
+        snapshot = self.next_snapshot("coingecko")
+        id_to_ticker = {v: k for k, v in parser_config.CRYPTO_ID_MAP.items()}
+        body = {}
+        for coin_id in ids:
+            ticker = id_to_ticker.get(coin_id)
+            if ticker in snapshot:
+                body[coin_id] = {vs: round(snapshot[ticker], 8)}
+        for i in range(self.payload_entries):
+            body[f"synthetic-coin-{i}"] = {vs: round(1.0 + i / 1000, 8)}
+        return body
+
+    def exchangerate_body(self, base: str) -> dict:
+        snapshot = self.next_snapshot("exchangerate")
+        usd_per_base = 1.0 if base == 'USD' else snapshot.get(base)
+        if usd_per_base is None:
+            return {"result": "error", "error-type": "unsupported-code"}
+        # conversion_rates: сколько единиц валюты за одну единицу base
+        rates = {"USD": round(usd_per_base, 10)}
+        for code, usd_rate in snapshot.items():
+            rates[code] = round(usd_per_base / usd_rate, 10)
+        rates[base] = 1
+        for i in range(self.payload_entries):
+            rates[f"X{i:04d}"] = round(1.0 + i / 1000, 6)
+        now = int(time.time())
+        return {
+            "result": "success",
+            "base_code": base,
+            "time_last_update_unix": now,
+            "time_next_update_unix": now + 3600,
+            "conversion_rates": rates,
+        }
+
+
+class ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ProviderServer
+
+    def log_message(self, format, *args):
+        # журнал запросов не нужен: статистика доступна по /__stats
+        pass
+
+    def _send_json(self, status: int, body, source: str, cacheable: bool = False):
+        payload = json.dumps(body).encode('utf-8')
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if cacheable and self.headers.get('If-None-Match') == etag:
+            status, payload = 304, b''
+        # счётчик обновляется до ответа: клиент, получивший ответ, видит его в статистике
+        self.server.record(source, status)
+        self.send_response(status)
+        if cacheable:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', self.server.cache_control)
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            with self.server.lock:
+                stats = json.loads(json.dumps(self.server.stats))
+            return self._send_json(200, stats, 'stats')
+
+        if parsed.path == _COINGECKO_PATH:
+            source = 'coingecko'
+        elif parsed.path.startswith(_EXCHANGERATE_PREFIX) and '/latest/' in parsed.path:
+            source = 'exchangerate'
+        else:
+            return self._send_json(404, {"error": "not found"}, 'unknown')
+
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send_json(500, {"error": "injected failure"}, source)
+
+        if source == 'coingecko':
+            query = parse_qs(parsed.query)
+            ids = ','.join(query.get('ids', [''])).split(',')
+            vs = query.get('vs_currencies', ['usd'])[0].lower()
+            body = self.server.coingecko_body([i for i in ids if i], vs)
+        else:
+            base = parsed.path.rstrip('/').rsplit('/', 1)[-1].upper()
+            body = self.server.exchangerate_body(base)
+        self._send_json(200, body, source, cacheable=True)
+
+
+def start_server(**options) -> ProviderServer:
+    '''
+    Запуск сервера в фоновом потоке; остановка — server.shutdown(); server.server_close()
+    '''
+    server = ProviderServer(**options)
+    thread = threading.Thread(target=server.serve_forever, name='provider-server', daemon=True)
+    thread.start()
+    return server
+
+
+def point_clients_at(url: str) -> dict:
+    '''
+    Перенаправление клиентов API текущего процесса на url; возвращает прежние значения
+    '''
+    saved = {
+        "COINGECKO_URL": parser_config.COINGECKO_URL,
+        "EXCHANGERATE_API_URL": parser_config.EXCHANGERATE_API_URL,
+        "EXCHANGERATE_API_KEY": parser_config.EXCHANGERATE_API_KEY,
+    }
+    parser_config.COINGECKO_URL = url + _COINGECKO_PATH
+    parser_config.EXCHANGERATE_API_URL = url + _EXCHANGERATE_PREFIX.rstrip('/')
+    parser_config.EXCHANGERATE_API_KEY = parser_config.EXCHANGERATE_API_KEY or 'offline'
+    return saved
+
+
+def restore_clients(saved: dict):
+    for name, value in saved.items():
+        setattr(parser_config, name, value)
@@ -0,0 +1,227 @@
+# benchmarks/suite.py
+
+import io
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from valutatrade_hub.cli.interface import CLI
+from valutatrade_hub.core.currencies import _CURRENCY_REGISTRY as CURRENCY_REGISTRY
+from valutatrade_hub.core.models import User
+from valutatrade_hub.core.usecases import SystemCore
+from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+from .datagen import BASE_PRICES, BENCH_PASSWORD, ensure_dataset, use_data_directory
+from .provider_server import point_clients_at, restore_clients, start_server
+
+# число повторов каждого сценария по умолчанию (KDF-сценарии заметно дороже остальных)
+DEFAULT_ITERATIONS = {
+    "register_user": 20,
+    "login_user": 20,
+    "buy_currency": 200,
+    "get_rate": 2000,
+    "show_rates": 200,
+    "append_history": 200,
+    "update_rates": 20,
+}
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(durations: list) -> dict:
+    '''
+    Сводка по длительностям операций (секунды) в миллисекундах
+    '''
+    ordered = sorted(durations)
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "total_s": round(total, 6),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4) if ordered else 0.0,
+        "min_ms": round(ordered[0] * 1000, 4) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "ops_per_s": round(len(ordered) / total, 2) if total else 0.0,
+    }
+
+
+class BenchContext:
+    '''
+    Состояние одного прогона над рабочей копией набора данных
+    '''
+
+    def __init__(self, users: int, seed: int):
+        self.core = SystemCore()
+        self.cli = CLI()
+        self.users = users
+        self.rng = random.Random(seed)
+        self.codes = list(CURRENCY_REGISTRY)
+        self.run_id = f"{self.rng.getrandbits(32):08x}"
+
+    def random_user_id(self) -> int:
+        return self.rng.randint(1, self.users)
+
+
+def _timed(iterations: int, prepare, operation) -> list:
+    '''
+    prepare(i) выполняется вне замера, operation(prepared) — под замером
+    '''
+    durations = []
+    for i in range(iterations):
+        prepared = prepare(i)
+        started = time.perf_counter()
+        operation(prepared)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def bench_register_user(ctx: BenchContext, iterations: int) -> list:
+    return _timed(
+        iterations,
+        lambda i: f"bench_{ctx.run_id}_{i}",
+        lambda name: ctx.core.register_user(name, BENCH_PASSWORD),
+    )
+
+
+def bench_login_user(ctx: BenchContext, iterations: int) -> list:
+    return _timed(
+        iterations,
+        lambda i: f"user{ctx.random_user_id():07d}",
+        lambda name: ctx.core.login_user(name, BENCH_PASSWORD),
+    )
+
+
+def bench_buy_currency(ctx: BenchContext, iterations: int) -> list:
+    targets = [c for c in ctx.codes if c != 'USD']
+
+    def prepare(i):
+        user = User(**ctx.core.backend.get_user_by_id(ctx.random_user_id()))
+        return user, ctx.rng.choice(targets)
+
+    return _timed(iterations, prepare, lambda args: ctx.core.buy_currency(args[0], args[1], 0.0001))
+
+
+def bench_get_rate(ctx: BenchContext, iterations: int) -> list:
+    return _timed(
+        iterations,
+        lambda i: ctx.rng.sample(ctx.codes, 2),
+        lambda pair: ctx.core.get_rate(pair[0], pair[1]),
+    )
+
+
+def bench_show_rates(ctx: BenchContext, iterations: int) -> list:
+    def operation(_):
+        with redirect_stdout(io.StringIO()):
+            ctx.cli.handle_show_rates([])
+
+    return _timed(iterations, lambda i: None, operation)
+
+
+def bench_append_history(ctx: BenchContext, iterations: int) -> list:
+    # одна операция — одно обновление курсов (по записи на пару)
+    start = datetime.utcnow()
+
+    def prepare(i):
+        ts = (start + timedelta(seconds=i)).isoformat()
+        return [
+            {"id": f"{code}_USD_{ts}", "from_currency": code, "to_currency": "USD",
+             "rate": BASE_PRICES.get(code, 1.0), "timestamp": ts, "source": "benchmark"}
+            for code in ctx.codes if code != 'USD'
+        ]
+
+    return _timed(iterations, prepare, ctx.core.backend.append_history)
+
+
+def bench_update_rates(ctx: BenchContext, iterations: int) -> list:
+    # полный цикл RatesUpdater против локального сервера-заглушки: запросы, снимок, история, переоценка
+    server = start_server(seed=ctx.rng.randint(0, 2**31))
+    saved = point_clients_at(server.url)
+    try:
+        updater = RatesUpdater()
+        return _timed(iterations, lambda i: None, lambda _: updater.run_update())
+    finally:
+        restore_clients(saved)
+        server.shutdown()
+        server.server_close()
+
+
+CASES = {
+    "register_user": bench_register_user,
+    "login_user": bench_login_user,
+    "buy_currency": bench_buy_currency,
+    "get_rate": bench_get_rate,
+    "show_rates": bench_show_rates,
+    "append_history": bench_append_history,
+    "update_rates": bench_update_rates,
+}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_scale(dataset_dir: str, scale: dict, backend: str, cases: list, iterations=None, seed: int = 0) -> dict:
+    '''
+    Прогон сценариев над рабочей копией набора данных (исходный каталог не изменяется)
+    '''
+    manifest = ensure_dataset(dataset_dir, scale, backend, seed)
+    work_dir = tempfile.mkdtemp(prefix='valutatrade-bench-')
+    try:
+        data_dir = os.path.join(work_dir, 'data')
+        shutil.copytree(dataset_dir, data_dir)
+        with use_data_directory(data_dir, backend):
+            # снимок курсов набора мог устареть (rates_max_age_seconds) — обновляем отметки времени
+            storage = RatesStorage()
+            now = datetime.utcnow().isoformat()
+            pairs = {pair: {**info, "updated_at": now} for pair, info in storage.backend.load_rates()["pairs"].items()}
+            storage.save_snapshot(pairs)
+
+            ctx = BenchContext(manifest["users"], seed)
+            results = {}
+            for name in cases:
+                count = iterations or DEFAULT_ITERATIONS[name]
+                results[name] = summarize(CASES[name](ctx, count))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {"dataset": manifest, "cases": results}
+
+
+def run_suite(scales: dict, data_root: str, backend: str = 'json', cases=None, iterations=None, seed: int = 0) -> dict:
+    '''
+    Прогон по всем масштабам; результат — словарь, готовый к сохранению в json
+    '''
+    cases = list(cases or CASES)
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend,
+            "seed": seed,
+        },
+        "scales": {},
+    }
+    for scale_name, scale in scales.items():
+        dataset_dir = os.path.join(data_root, f"{scale_name}-{backend}")
+        report["scales"][scale_name] = run_scale(dataset_dir, scale, backend, cases, iterations, seed)
+    return report
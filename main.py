@@ -1,14 +1,51 @@
 #!/usr/bin/env python3
 
+import argparse
+import os
+import shlex
+import sys
+
 from valutatrade_hub.cli.interface import CLI
 from valutatrade_hub.core.utils import ensure_data_files
 
+TOKEN_ENV = "VALUTATRADE_SESSION_TOKEN"
+
 
 def main():
     '''Точка входа'''
+    parser = argparse.ArgumentParser(
+        description="ValutaTrade Hub. Без аргументов запускается интерактивный режим.",
+    )
+    parser.add_argument("--json", action="store_true", help="вывод результата каждой команды одной строкой json")
+    parser.add_argument("--script", metavar="FILE", help="выполнить команды из файла ('-' — из stdin)")
+    # токен не принимается аргументом: командная строка процесса видна другим пользователям (ps)
+    parser.add_argument("--token-stdin", action="store_true",
+                        help=f"прочитать токен сессии из первой строки stdin (или задать переменную {TOKEN_ENV})")
+    parser.add_argument("--stop-on-error", action="store_true", help="остановить сценарий на первой ошибке")
+    parser.add_argument("--profile", action="store_true",
+                        help="профилировать каждую команду (cProfile): дамп в profile_dir, top-N в stderr")
+    parser.add_argument("command", nargs=argparse.REMAINDER,
+                        help="команда и её аргументы, например: get-rate --from BTC --to USD")
+    args = parser.parse_args()
+
     ensure_data_files()
-    app = CLI()
-    app.run()
+    app = CLI(profile=True if args.profile else None, output=sys.stdout)
+    token = sys.stdin.readline().strip() if args.token_stdin else os.environ.get(TOKEN_ENV, '').strip()
+    if token and not app.execute(shlex.join(['login', '--token', token]), args.json):
+        sys.exit(1)
+
+    if args.command:
+        ok = app.run_script([shlex.join(args.command)], json_output=args.json)
+    elif args.script:
+        if args.script == '-':
+            ok = app.run_script(sys.stdin, args.json, args.stop_on_error)
+        else:
+            with open(args.script, encoding='utf-8') as f:
+                ok = app.run_script(f, args.json, args.stop_on_error)
+    else:
+        app.run()
+        return
+    sys.exit(0 if ok else 1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
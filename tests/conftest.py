@@ -0,0 +1,59 @@
+# tests/conftest.py
+
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+from valutatrade_hub.infra.settings import settings
+
+# журнал тестов не должен попадать в logs/ рабочего каталога; настройка задаётся до импорта logging_config
+settings['log_file'] = os.path.join(tempfile.mkdtemp(prefix='valutatrade-tests-'), 'valutatrade.log')
+
+from valutatrade_hub.infra.database import db_manager  # noqa: E402
+from valutatrade_hub.infra.storage_backend import get_backend  # noqa: E402
+
+RATES = {"EUR_USD": 1.08, "RUB_USD": 0.011, "BTC_USD": 60000.0, "ETH_USD": 3300.0}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend_name(request):
+    return request.param
+
+
+@pytest.fixture
+def data_dir(tmp_path, backend_name):
+    '''
+    Пустой каталог данных для одного теста; настройки и кеш DatabaseManager восстанавливаются после теста
+    '''
+    saved = dict(settings._settings)
+    settings['data_directory'] = str(tmp_path / 'data')
+    settings['storage_backend'] = backend_name
+    db_manager.clear_cache()
+    try:
+        yield tmp_path / 'data'
+    finally:
+        get_backend().close()
+        settings._settings.clear()
+        settings._settings.update(saved)
+        db_manager.clear_cache()
+
+
+@pytest.fixture
+def backend(data_dir):
+    return get_backend()
+
+
+def seed_rates(backend, rates=RATES, updated_at=None):
+    updated_at = updated_at or datetime.utcnow().isoformat()
+    pairs = {pair: {"rate": rate, "updated_at": updated_at, "source": "test"} for pair, rate in rates.items()}
+    backend.update_rates(pairs, updated_at)
+
+
+@pytest.fixture
+def core(backend):
+    from valutatrade_hub.core.usecases import SystemCore
+
+    seed_rates(backend)
+    return SystemCore()
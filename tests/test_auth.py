@@ -0,0 +1,62 @@
+# tests/test_auth.py
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from valutatrade_hub.core.utils import verify_password_hash
+from valutatrade_hub.infra.settings import settings
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("stored", [
+    "scrypt$abc$8$1$00ff",
+    "scrypt$3$8$1$00ff",
+    "scrypt$16384$8$00ff",
+    "bogus$1$00ff",
+    "pbkdf2_sha256$00ff",
+    "$",
+])
+def test_malformed_hash_is_a_failed_check(stored):
+    assert verify_password_hash("secret", "salt", stored) is False
+
+
+def test_malformed_stored_hash_fails_login_cleanly(core):
+    core.register_user("alice", "secret1")
+    user = core.backend.get_user_by_username("alice")
+    core.backend.update_user({**user, "hashed_password": "scrypt$not-a-number$8$1$00"})
+
+    with pytest.raises(ValueError, match="Неверный пароль"):
+        core.login_user("alice", "secret1")
+
+
+def test_hash_upgrade_revokes_sessions(core):
+    user = core.register_user("bob", "secret1")
+    token = core.create_session(core.login_user("bob", "secret1"))
+    assert core.sessions.validate(token) is not None
+
+    settings['scrypt_n'] = 2 ** 10
+    core.login_user("bob", "secret1")
+    assert core.sessions.validate(token) is None
+    assert core.backend.get_user_by_id(user.user_id)["hashed_password"].startswith("scrypt$1024$")
+
+
+def test_token_is_read_from_environment_not_argv(tmp_path):
+    env = {**os.environ, "PYTHONPATH": _ROOT, "VALUTATRADE_SESSION_TOKEN": "no-such-token",
+           "VALUTATRADE_DATA_DIR": str(tmp_path / "data")}
+    result = subprocess.run([sys.executable, os.path.join(_ROOT, "main.py"), "--json", "show-trades"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    record = json.loads(result.stdout)
+    assert record["command"] == "login" and not record["ok"]
+    assert "no-such-token" not in result.stdout
+
+    result = subprocess.run([sys.executable, os.path.join(_ROOT, "main.py"), "--token-stdin", "--json", "show-trades"],
+                            cwd=tmp_path, env={**env, "VALUTATRADE_SESSION_TOKEN": ""}, input="bad-token\n",
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    assert json.loads(result.stdout)["command"] == "login"
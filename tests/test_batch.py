@@ -0,0 +1,42 @@
+# tests/test_batch.py
+
+import pytest
+
+
+@pytest.fixture
+def user(core):
+    return core.register_user("trader", "secret-password")
+
+
+@pytest.mark.parametrize("amount", ["nan", "inf", "-inf", "NaN"])
+def test_batch_rejects_non_finite_amount(core, user, amount):
+    report = core.execute_batch([{"side": "buy", "currency": "BTC", "amount": amount}], user.user_id)
+
+    assert report["executed"] == 0
+    assert len(report["errors"]) == 1
+    wallets = core.get_portfolio(user.user_id).wallets
+    assert wallets["USD"].balance == 1000.0
+    assert "BTC" not in wallets
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf")])
+def test_buy_and_sell_reject_non_finite_amount(core, user, amount):
+    with pytest.raises(ValueError):
+        core.buy_currency(user, "BTC", amount)
+    with pytest.raises(ValueError):
+        core.sell_currency(user, "BTC", amount)
+    assert core.get_portfolio(user.user_id).wallets["USD"].balance == 1000.0
+
+
+def test_batch_executes_valid_orders(core, user):
+    rows = [
+        {"side": "buy", "currency": "BTC", "amount": "0.01"},
+        {"side": "sell", "currency": "BTC", "amount": "0.004"},
+    ]
+    report = core.execute_batch(rows, user.user_id)
+
+    assert report["executed"] == 2
+    wallets = core.get_portfolio(user.user_id).wallets
+    assert wallets["BTC"].balance == pytest.approx(0.006)
+    assert wallets["USD"].balance == pytest.approx(1000.0 - 0.006 * 60000.0)
+    assert len(core.get_trades(user.user_id)) == 2
@@ -0,0 +1,29 @@
+# tests/test_cli_json.py
+
+import io
+import json
+from contextlib import redirect_stdout
+
+from valutatrade_hub.cli.interface import CLI
+
+
+def test_json_records_go_to_dedicated_stream(core):
+    output = io.StringIO()
+    cli = CLI(output=output)
+    stray = io.StringIO()
+    with redirect_stdout(stray):
+        assert cli.execute("get-rate --from BTC --to USD", json_output=True)
+        assert not cli.execute("get-rate --from XXX --to USD", json_output=True)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["ok"] for r in records] == [True, False]
+    assert records[0]["command"] == "get-rate"
+    assert "XXX" in records[1]["message"]
+    assert stray.getvalue() == ""
+
+
+def test_json_parse_error_is_a_record(core):
+    output = io.StringIO()
+    assert not CLI(output=output).execute('get-rate --from "BTC', json_output=True)
+    record = json.loads(output.getvalue())
+    assert record["command"] is None and not record["ok"]
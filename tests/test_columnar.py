@@ -0,0 +1,49 @@
+# tests/test_columnar.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from valutatrade_hub.infra.columnar import ColumnarHistory  # noqa: E402
+
+from .conftest import seed_rates  # noqa: E402
+
+
+def _tick(rate, ts):
+    return {"id": f"BTC_USD_{ts}", "from_currency": "BTC", "to_currency": "USD",
+            "rate": rate, "timestamp": ts, "source": "test"}
+
+
+def test_new_ticks_are_appended_without_rebuild(backend, monkeypatch):
+    backend.append_history([_tick(1.0, "2026-01-01T00:00:00"), _tick(2.0, "2026-01-01T00:01:00")])
+    history = ColumnarHistory()
+    assert history.refresh() == {"BTC_USD": 2}
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("полное перестроение не ожидалось")
+
+    monkeypatch.setattr(history, "build", no_rebuild)
+    seed_rates(backend)
+    assert not history.is_stale()
+
+    backend.append_history([_tick(3.0, "2026-01-01T00:02:00")])
+    assert history.is_stale()
+    ts, rates = history.load("BTC_USD")
+    assert list(rates) == [1.0, 2.0, 3.0]
+
+    # тик из прошлого вливается на своё место
+    backend.append_history([_tick(1.5, "2026-01-01T00:00:30")])
+    ts, rates = history.load("BTC_USD")
+    assert list(rates) == [1.0, 1.5, 2.0, 3.0]
+    assert list(np.diff(ts) > 0) == [True, True, True]
+
+
+def test_bars_match_full_rebuild(backend):
+    backend.append_history([_tick(float(i), f"2026-01-01T00:{i:02d}:00") for i in range(30)])
+    history = ColumnarHistory()
+    history.refresh()
+    backend.append_history([_tick(float(i), f"2026-01-01T00:{i:02d}:00") for i in range(30, 60)])
+    incremental = history.bars("BTC_USD", 600)
+    history.build()
+    assert history.bars("BTC_USD", 600) == incremental
+    assert [b["ticks"] for b in incremental] == [10] * 6
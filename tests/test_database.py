@@ -0,0 +1,73 @@
+# tests/test_database.py
+
+import json
+import os
+
+import pytest
+
+from valutatrade_hub.infra import database
+from valutatrade_hub.infra.database import db_manager
+from valutatrade_hub.infra.session_store import SessionStore
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_failed_transaction_leaves_cache_and_file(data_dir):
+    db_manager.save('sample.json', [{"n": 1}])
+
+    with pytest.raises(RuntimeError):
+        with db_manager.transaction('sample.json') as data:
+            data[0]["n"] = 2
+            data.append({"n": 3})
+            raise RuntimeError("abort")
+
+    assert db_manager.load('sample.json') == [{"n": 1}]
+    assert json.loads((data_dir / 'sample.json').read_text(encoding='utf-8')) == [{"n": 1}]
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_failed_save_drops_cache_entry(data_dir, monkeypatch):
+    db_manager.save('sample.json', [{"n": 1}])
+    cached = db_manager.load('sample.json')
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, 'dump', broken_dump)
+    with pytest.raises(OSError):
+        with db_manager.transaction('sample.json') as data:
+            data[0]["n"] = 2
+    monkeypatch.undo()
+
+    assert cached == [{"n": 1}]
+    assert str(data_dir / 'sample.json') not in db_manager._cache
+    assert db_manager.load('sample.json') == [{"n": 1}]
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_save_does_not_cache_a_newer_file(data_dir, monkeypatch):
+    real_replace = os.replace
+
+    def replace_then_other_writer(src, dst):
+        real_replace(src, dst)
+        # другой процесс успевает заменить файл сразу после нашего rename
+        other = dst + '.other'
+        with open(other, 'w', encoding='utf-8') as f:
+            json.dump([{"n": "other", "pad": "x" * 10}], f)
+        real_replace(other, dst)
+
+    monkeypatch.setattr(database.os, 'replace', replace_then_other_writer)
+    db_manager.save('sample.json', [{"n": 1}])
+    monkeypatch.undo()
+
+    assert db_manager.load('sample.json') == [{"n": "other", "pad": "x" * 10}]
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_revoke_does_not_mutate_loaded_sessions(data_dir):
+    store = SessionStore()
+    token = store.issue({"user_id": 1, "username": "alice", "registration_date": "2026-01-01"})
+    before = db_manager.load(store.sessions_file)
+    store.revoke(token)
+
+    assert len(before) == 1
+    assert store.validate(token) is None
@@ -0,0 +1,64 @@
+# tests/test_history.py
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from valutatrade_hub.core.exceptions import RateNotFoundError
+
+
+def _record(pair, rate, ts):
+    from_code, to_code = pair.split('_')
+    return {"id": f"{pair}_{ts}", "from_currency": from_code, "to_currency": to_code,
+            "rate": rate, "timestamp": ts, "source": "test"}
+
+
+def test_cross_rate_goes_through_usd(core):
+    core.backend.append_history([
+        _record("EUR_USD", 1.10, "2026-01-01T10:00:00"),
+        _record("BTC_USD", 50000.0, "2026-01-01T11:00:00"),
+    ])
+
+    rate, ts = core.get_rate_at("BTC", "EUR", datetime(2026, 1, 1, 12))
+    assert rate == pytest.approx(50000.0 / 1.10)
+    assert ts.startswith("2026-01-01T10:00:00")
+
+    rate, _ = core.get_rate_at("USD", "EUR", datetime(2026, 1, 1, 12, tzinfo=timezone.utc))
+    assert rate == pytest.approx(1 / 1.10)
+
+
+def test_cross_rate_goes_through_configured_base(core):
+    core.settings['default_base_currency'] = 'EUR'
+    core.backend.append_history([
+        _record("USD_EUR", 0.9, "2026-01-01T10:00:00"),
+        _record("RUB_EUR", 0.01, "2026-01-01T10:00:00"),
+    ])
+
+    rate, _ = core.get_rate_at("RUB", "USD", datetime(2026, 1, 1, 12))
+    assert rate == pytest.approx(0.01 / 0.9)
+
+
+def test_history_miss_is_not_found(core):
+    core.backend.append_history([_record("EUR_USD", 1.10, "2026-01-01T10:00:00")])
+    with pytest.raises(RateNotFoundError):
+        core.get_rate_at("EUR", "USD", datetime(2025, 12, 31))
+    with pytest.raises(RateNotFoundError):
+        core.get_rate_at("BTC", "EUR", datetime(2026, 1, 2))
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_legacy_history_is_visible_to_lookups(core, data_dir):
+    core.backend.append_history([_record("EUR_USD", 1.10, "2026-01-02T00:00:00")])
+    assert core.get_rate_at("EUR", "USD", datetime(2026, 1, 3))[0] == pytest.approx(1.10)
+    (data_dir / "exchange_rates.json").write_text(
+        json.dumps([_record("EUR_USD", 1.05, "2025-06-01T00:00:00")]), encoding="utf-8")
+
+    assert core.get_rate_at("EUR", "USD", datetime(2025, 7, 1))[0] == pytest.approx(1.05)
+    assert core.get_rate_at("EUR", "USD", datetime(2026, 1, 3))[0] == pytest.approx(1.10)
+    # чтение не переносит файл: перенос выполняет только convert-history
+    assert (data_dir / "exchange_rates.json").exists()
+
+    assert core.convert_history() == 1
+    assert not (data_dir / "exchange_rates.json").exists()
+    assert core.get_rate_at("EUR", "USD", datetime(2025, 7, 1))[0] == pytest.approx(1.05)
@@ -0,0 +1,49 @@
+# tests/test_http_cache.py
+
+import pytest
+
+from benchmarks.provider_server import start_server
+from valutatrade_hub.parser_service.http_cache import http_cache
+
+_PATH = "/api/v3/simple/price"
+_PARAMS = {"ids": "bitcoin", "vs_currencies": "usd"}
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(**options):
+        server = start_server(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_response_without_freshness_is_revalidated(data_dir, server_factory):
+    server = server_factory(cache_control="", step_seconds=3600)
+    first = http_cache.get_json(server.url + _PATH, params=_PARAMS)
+    second = http_cache.get_json(server.url + _PATH, params=_PARAMS)
+
+    assert not first.from_cache and second.from_cache
+    assert second.data == first.data
+    assert server.stats["requests"] == 2
+    assert server.stats["not_modified"] == 1
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_revalidate_bypasses_fresh_entry(data_dir, server_factory):
+    server = server_factory(cache_control="max-age=600", step_seconds=3600)
+    http_cache.get_json(server.url + _PATH, params=_PARAMS)
+    http_cache.get_json(server.url + _PATH, params=_PARAMS)
+    assert server.stats["requests"] == 1
+
+    response = http_cache.get_json(server.url + _PATH, params=_PARAMS, revalidate=True)
+    assert response.status_code == 200
+    assert server.stats["requests"] == 2
+    assert server.stats["not_modified"] == 1
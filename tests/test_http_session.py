@@ -0,0 +1,79 @@
+# tests/test_http_session.py
+
+import time
+
+import pytest
+import requests
+
+from benchmarks.provider_server import point_clients_at, restore_clients, start_server
+from valutatrade_hub.parser_service import http_session
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient, ExchangeRateApiClient
+from valutatrade_hub.parser_service.http_cache import http_cache
+
+_PATH = "/api/v3/simple/price"
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+    http_session.close_session()
+
+    def start(**options):
+        server = start_server(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    http_session.close_session()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_retries_stop_at_deadline(data_dir, server_factory):
+    server = server_factory(latency_ms=200, error_rate=1.0)
+
+    started = time.monotonic()
+    response = http_cache.get_json(server.url + _PATH)
+    unbounded = time.monotonic() - started
+    assert response.status_code == 500
+    # без срока: первая попытка и два повтора, перед последним пауза 1 с
+    assert server.stats["requests"] == 3
+    assert unbounded >= 1.5
+
+    started = time.monotonic()
+    with http_session.request_deadline(time.monotonic() + 0.5):
+        response = http_cache.get_json(server.url + _PATH)
+    elapsed = time.monotonic() - started
+    assert response.status_code == 500
+    # второй повтор начался бы после срока и не выполняется
+    assert server.stats["requests"] == 5
+    assert elapsed < 0.9
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_request_after_deadline_is_not_sent(data_dir, server_factory):
+    server = server_factory()
+    with http_session.request_deadline(time.monotonic() - 1):
+        with pytest.raises(requests.Timeout):
+            http_cache.get_json(server.url + _PATH)
+    assert server.stats["requests"] == 0
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_clients_share_pooled_session(data_dir, server_factory):
+    server = server_factory()
+    saved = point_clients_at(server.url)
+    try:
+        session = http_session.get_session()
+        CoinGeckoClient().fetch_rates()
+        ExchangeRateApiClient().fetch_rates()
+        CoinGeckoClient().fetch_rates(revalidate=True)
+        assert http_session.get_session() is session
+    finally:
+        restore_clients(saved)
+
+    stats = http_session.connection_stats()
+    assert list(stats) == [server.url]
+    assert stats[server.url] == {"connections": 1, "requests": 3, "reused": 2}
@@ -0,0 +1,32 @@
+# tests/test_ledger.py
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from valutatrade_hub.infra.ledger import TradeLedger
+
+
+@pytest.fixture
+def ledger(data_dir):
+    ledger = TradeLedger()
+    for i in range(3):
+        ledger.append(7, "buy", "BTC_USD", 0.1 * (i + 1), 60000.0, 6000.0 * (i + 1))
+    return ledger
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_limit(ledger):
+    assert ledger.get_trades(7, limit=0) == []
+    assert [t["amount"] for t in ledger.get_trades(7, limit=2)] == pytest.approx([0.2, 0.3])
+    assert len(ledger.get_trades(7, limit=10)) == 3
+    with pytest.raises(ValueError):
+        ledger.get_trades(7, limit=-1)
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_since_accepts_offset_aware_time(ledger):
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert len(ledger.get_trades(7, since=hour_ago)) == 3
+    assert ledger.get_trades(7, since=datetime.now(timezone(timedelta(hours=5))) + timedelta(minutes=1)) == []
+    assert len(ledger.get_trades(7, since=datetime.now() - timedelta(minutes=1))) == 3
@@ -0,0 +1,42 @@
+# tests/test_loadgen.py
+
+import os
+import shutil
+
+import pytest
+
+from benchmarks.loadgen import run_load
+
+
+@pytest.mark.parametrize("backend_name", ["json", "sqlite"])
+def test_shared_accounts_stay_consistent(tmp_path, backend_name):
+    report = run_load(traders=4, rate=80, duration=1.0, data_dir=str(tmp_path / "data"),
+                      backend=backend_name, seed=1, accounts=2)
+
+    audit = report["audit"]
+    assert audit["users_checked"] == 2
+    assert audit["unresolved_users"] == []
+    assert audit["consistent"], audit
+    assert audit["trades_in_ledger"] > 0
+
+
+def test_accounts_must_not_exceed_traders(tmp_path):
+    with pytest.raises(ValueError):
+        run_load(traders=2, rate=1, duration=0.1, data_dir=str(tmp_path / "data"), accounts=3)
+
+
+@pytest.mark.parametrize("keep", [False, True])
+def test_temporary_data_dir_is_removed_unless_kept(keep):
+    report = run_load(traders=1, rate=20, duration=0.2, seed=2, keep=keep)
+
+    data_dir = report["config"]["data_dir"]
+    assert report["config"]["data_kept"] is keep
+    assert os.path.isdir(data_dir) is keep
+    if keep:
+        shutil.rmtree(data_dir)
+
+
+def test_explicit_data_dir_is_kept(tmp_path):
+    report = run_load(traders=1, rate=20, duration=0.2, data_dir=str(tmp_path / "data"), seed=3)
+    assert report["config"]["data_kept"]
+    assert (tmp_path / "data" / "rates.json").exists()
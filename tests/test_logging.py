@@ -0,0 +1,52 @@
+# tests/test_logging.py
+
+import json
+import logging
+import queue
+
+from valutatrade_hub.logging_config import JsonLinesFormatter, LazyQueueHandler
+
+
+def _queued(emit):
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("valutatrade-test-queue")
+    logger.propagate = False
+    handler = LazyQueueHandler(log_queue)
+    logger.addHandler(handler)
+    try:
+        emit(logger)
+    finally:
+        logger.removeHandler(handler)
+    return log_queue.get_nowait()
+
+
+def test_message_is_formatted_before_queueing():
+    wallet = {"balance": 10.0}
+
+    def emit(logger):
+        logger.warning("wallet %s of user %d", wallet, 7)
+        # изменение аргумента после вызова логгера не должно попасть в журнал
+        wallet["balance"] = 0.0
+
+    record = _queued(emit)
+    assert record.msg == "wallet {'balance': 10.0} of user 7"
+    assert record.args is None
+    assert record.getMessage() == record.msg
+
+
+def test_exception_is_queued_as_text():
+    def emit(logger):
+        try:
+            raise ValueError("broken rate")
+        except ValueError:
+            logger.exception("update failed for %s", "coingecko")
+
+    record = _queued(emit)
+    assert record.exc_info is None
+    assert "ValueError: broken rate" in record.exc_text
+
+    text = logging.Formatter("%(levelname)s %(message)s").format(record)
+    assert text.startswith("ERROR update failed for coingecko\nTraceback")
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert entry["message"] == "update failed for coingecko"
+    assert "ValueError: broken rate" in entry["exception"]
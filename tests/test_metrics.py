@@ -0,0 +1,59 @@
+# tests/test_metrics.py
+
+import pytest
+
+from valutatrade_hub.metrics import metrics
+
+_OK = '{action="BUY",outcome="OK"}'
+_ERROR = '{action="BUY",outcome="ERROR"}'
+
+
+def _samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            samples[name] = float(value)
+    return samples
+
+
+def _delta(before: dict, after: dict, name: str) -> float:
+    return after.get(name, 0.0) - before.get(name, 0.0)
+
+
+def test_trade_is_exposed_as_counter_and_histogram(core):
+    user = core.register_user("alice", "secret-password")
+    before = _samples(metrics.to_prometheus())
+
+    core.buy_currency(user, "BTC", 0.001)
+    with pytest.raises(ValueError):
+        core.buy_currency(user, "BTC", -1)
+    text = metrics.to_prometheus()
+    after = _samples(text)
+
+    assert "# TYPE valutatrade_actions_total counter" in text
+    assert "# TYPE valutatrade_action_seconds histogram" in text
+    assert _delta(before, after, "valutatrade_actions_total" + _OK) == 1
+    assert _delta(before, after, "valutatrade_actions_total" + _ERROR) == 1
+
+    assert _delta(before, after, "valutatrade_action_seconds_count" + _OK) == 1
+    assert _delta(before, after, 'valutatrade_action_seconds_bucket{action="BUY",outcome="OK",le="+Inf"}') == 1
+    assert _delta(before, after, "valutatrade_action_seconds_sum" + _OK) > 0
+
+    # корзины накопительные: счётчики не убывают к +Inf
+    buckets = [value for name, value in after.items()
+               if name.startswith('valutatrade_action_seconds_bucket{action="BUY",outcome="OK"')]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == after["valutatrade_action_seconds_count" + _OK]
+
+
+def test_prometheus_file_matches_exposition(core, tmp_path):
+    user = core.register_user("bob", "secret-password")
+    core.buy_currency(user, "EUR", 5)
+
+    path = tmp_path / "metrics" / "valutatrade.prom"
+    metrics.write_prometheus(str(path))
+    written = _samples(path.read_text(encoding="utf-8"))
+    assert written["valutatrade_actions_total" + _OK] >= 1
+    assert "valutatrade_db_cache_hits_total" in written
+    assert not list(path.parent.glob("*.tmp"))
@@ -0,0 +1,56 @@
+# tests/test_profiling.py
+
+import io
+import json
+import os
+import pstats
+import subprocess
+import sys
+
+import pytest
+
+from valutatrade_hub.profiling import CommandProfiler
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _functions(path) -> set:
+    return {func for _, _, func in pstats.Stats(str(path)).stats}
+
+
+def test_profiler_dumps_stats_and_passes_errors_through(tmp_path):
+    stream = io.StringIO()
+    profiler = CommandProfiler(directory=str(tmp_path), top_n=5, stream=stream)
+
+    assert profiler.run("busy work", _busy, 1000) == _busy(1000)
+    assert os.path.basename(profiler.last_dump).endswith("-busy_work.prof")
+    assert "_busy" in _functions(profiler.last_dump)
+    assert "[profile] busy work" in stream.getvalue()
+
+    with pytest.raises(ZeroDivisionError):
+        profiler.run("fail", lambda: 1 / 0)
+    assert os.path.exists(profiler.last_dump)
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+
+
+def test_profile_flag_writes_readable_dump(tmp_path):
+    env = {**os.environ, "PYTHONPATH": _ROOT, "VALUTATRADE_DATA_DIR": str(tmp_path / "data"),
+           "VALUTATRADE_PROFILE_DIR": str(tmp_path / "profiles")}
+    env.pop("VALUTATRADE_SESSION_TOKEN", None)
+    result = subprocess.run(
+        [sys.executable, os.path.join(_ROOT, "main.py"), "--profile", "--json", "get-rate", "--from", "BTC", "--to", "USD"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    # stdout — только запись команды, отчёт профилировщика уходит в stderr
+    assert json.loads(result.stdout)["command"] == "get-rate"
+    assert "[profile] get-rate" in result.stderr
+
+    dumps = list((tmp_path / "profiles").glob("*-get-rate.prof"))
+    assert len(dumps) == 1
+    assert "handle_get_rate" in _functions(dumps[0])
@@ -0,0 +1,95 @@
+# tests/test_provider_server.py
+
+import json
+import os
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.provider_server import point_clients_at, restore_clients, start_server, synthetic_series
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient, ExchangeRateApiClient
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+    saved = []
+
+    def start(**options):
+        server = start_server(**options)
+        servers.append(server)
+        saved.append(point_clients_at(server.url))
+        return server
+
+    yield start
+    for values in reversed(saved):
+        restore_clients(values)
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_clients_read_provider_formats(data_dir, server_factory):
+    server_factory()
+    first = synthetic_series()[0]
+
+    crypto = CoinGeckoClient().fetch_rates()
+    fiat = ExchangeRateApiClient().fetch_rates()
+
+    assert crypto["BTC_USD"]["rate"] == pytest.approx(first["BTC"])
+    assert crypto["ETH_USD"]["source"] == "CoinGecko"
+    assert fiat["EUR_USD"]["rate"] == pytest.approx(first["EUR"])
+    assert fiat["RUB_USD"]["rate"] == pytest.approx(first["RUB"])
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_injected_errors_and_stats_endpoint(data_dir, server_factory):
+    server = server_factory(error_rate=1.0)
+
+    with pytest.raises(ApiRequestError, match="HTTP 500"):
+        CoinGeckoClient().fetch_rates()
+
+    with urllib.request.urlopen(server.url + "/__stats", timeout=5) as response:
+        stats = json.loads(response.read())
+    # первая попытка и повторы адаптера сессии — все с ответом 500
+    assert stats["errors"] == stats["requests"] >= 1
+    assert stats["by_source"]["coingecko"] == {"500": stats["requests"]}
+
+    with pytest.raises(urllib.error.HTTPError) as info:
+        urllib.request.urlopen(server.url + "/unknown", timeout=5)
+    assert info.value.code == 404
+
+
+def test_env_urls_point_cli_at_provider(tmp_path):
+    server = start_server()
+    try:
+        env = {**os.environ, "PYTHONPATH": _ROOT, "VALUTATRADE_DATA_DIR": str(tmp_path / "data"),
+               "VALUTATRADE_COINGECKO_URL": server.url + "/api/v3/simple/price",
+               "VALUTATRADE_EXCHANGERATE_URL": server.url + "/v6",
+               "EXCHANGERATE_API_KEY": "offline"}
+        env.pop("VALUTATRADE_SESSION_TOKEN", None)
+        result = subprocess.run([sys.executable, os.path.join(_ROOT, "main.py"), "--json", "update-rates"],
+                                cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result.returncode == 0, result.stderr
+    record = json.loads(result.stdout)
+    assert record["ok"]
+    assert {name: state["status"] for name, state in record["result"]["sources"].items()} == {
+        "coingecko": "ok", "exchangerate": "ok",
+    }
+    assert set(server.stats["by_source"]) == {"coingecko", "exchangerate"}
+    assert list(record["result"]["connections"]) == [server.url]
+
+    rates = json.loads((tmp_path / "data" / "rates.json").read_text(encoding="utf-8"))
+    assert rates["pairs"]["BTC_USD"]["source"] == "CoinGecko"
+    assert rates["pairs"]["EUR_USD"]["source"] == "ExchangeRate-API"
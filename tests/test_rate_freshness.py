@@ -0,0 +1,90 @@
+# tests/test_rate_freshness.py
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from valutatrade_hub.core import utils
+from valutatrade_hub.core.exceptions import StaleRateError
+from valutatrade_hub.core.usecases import SystemCore
+from valutatrade_hub.infra.settings import settings
+
+from .conftest import seed_rates
+
+
+def _utc_ago(seconds):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).replace(tzinfo=None).isoformat()
+
+
+class _Refresher:
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+
+
+@pytest.fixture
+def limits():
+    settings['rates_ttl_seconds'] = 60
+    settings['rates_max_age_seconds'] = 3600
+
+
+def test_ttl_expiry_serves_rate_and_refreshes_once_in_background(backend, limits):
+    seed_rates(backend, updated_at=_utc_ago(600))
+    refresher = _Refresher()
+    core = SystemCore(refresher=refresher)
+
+    rate, _ = core.get_rate("BTC", "USD")
+    assert rate == 60000.0
+    assert refresher.started.wait(2)
+    # пока обновление идёт, повторные запросы не запускают второе
+    core.get_rate("EUR", "USD")
+    refresher.release.set()
+    core._refresh_thread.join(2)
+    assert refresher.calls == 1
+
+
+def test_fresh_rate_does_not_refresh(backend, limits):
+    seed_rates(backend, updated_at=_utc_ago(10))
+    refresher = _Refresher()
+    SystemCore(refresher=refresher).get_rate("BTC", "USD")
+    time.sleep(0.1)
+    assert refresher.calls == 0
+
+
+def test_rate_older_than_max_age_is_rejected(backend, limits):
+    seed_rates(backend, updated_at=_utc_ago(7200))
+    refresher = _Refresher()
+    refresher.release.set()
+    with pytest.raises(StaleRateError) as info:
+        SystemCore(refresher=refresher).get_rate("BTC", "USD")
+    assert info.value.age_seconds > 3600
+    assert refresher.started.wait(2)
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset недоступен")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_fresh_install_rates_are_fresh_west_of_utc(data_dir, limits, new_york, monkeypatch):
+    monkeypatch.setattr(utils, "DATA_DIR", str(data_dir))
+    utils.ensure_data_files()
+
+    rate, updated_at = SystemCore().get_rate("BTC", "USD")
+    assert rate == pytest.approx(59543.10)
+    assert abs(datetime.fromisoformat(updated_at) - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=1)
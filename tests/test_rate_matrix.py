@@ -0,0 +1,62 @@
+# tests/test_rate_matrix.py
+
+import pytest
+
+from valutatrade_hub.core.models import Portfolio
+from valutatrade_hub.core.rate_matrix import RateMatrix
+from valutatrade_hub.infra import sqlite_backend
+
+_PAIRS = {
+    "EUR_USD": {"rate": 1.1, "updated_at": "2026-01-01T10:00:00"},
+    "BTC_USD": {"rate": 50000.0, "updated_at": "2026-01-01T09:00:00"},
+}
+
+
+def test_cross_rate_is_triangulated_through_base():
+    matrix = RateMatrix.from_pairs(_PAIRS, "USD")
+
+    rate, updated_at = matrix.lookup("EUR", "BTC")
+    assert rate == pytest.approx(1.1 / 50000)
+    assert updated_at == "2026-01-01T09:00:00"
+    assert matrix.convert(2.0, "BTC", "EUR") == pytest.approx(2 * 50000 / 1.1)
+
+
+def test_unknown_pair_is_not_priced_as_zero():
+    matrix = RateMatrix.from_pairs(_PAIRS, "USD")
+    assert matrix.convert(5.0, "SOL", "USD") is None
+
+    portfolio = Portfolio(1, {
+        "EUR": {"currency_code": "EUR", "balance": 10.0},
+        "SOL": {"currency_code": "SOL", "balance": 3.0},
+    })
+    assert portfolio.get_total_value("USD", matrix) == pytest.approx(11.0)
+
+
+def test_revaluation_reports_unpriced_currency(core):
+    core.backend.save_portfolio({"user_id": 1, "wallets": {
+        "EUR": {"currency_code": "EUR", "balance": 10.0},
+        "SOL": {"currency_code": "SOL", "balance": 3.0},
+    }})
+    snapshot = core.revalue_portfolios()
+    assert snapshot["unpriced"] == ["SOL"]
+    assert snapshot["navs"]["1"] == pytest.approx(10.8)
+
+
+@pytest.mark.parametrize("backend_name", ["sqlite"])
+def test_sqlite_matrix_is_parsed_once_per_refresh(backend, monkeypatch):
+    def build(pairs):
+        return RateMatrix.from_pairs(pairs, "USD").to_dict()
+
+    backend.update_rates(_PAIRS, "2026-01-01T10:00:00", build)
+    parsed = []
+    real_loads = sqlite_backend.json.loads
+    monkeypatch.setattr(sqlite_backend.json, "loads", lambda text: parsed.append(1) or real_loads(text))
+
+    first = backend.load_rates()["matrix"]
+    assert backend.load_rates()["matrix"] is first
+    assert len(parsed) == 1
+
+    backend.update_rates({"EUR_USD": {"rate": 1.2, "updated_at": "2026-01-01T11:00:00"}}, "2026-01-01T11:00:00", build)
+    matrix = RateMatrix.from_dict(backend.load_rates()["matrix"])
+    assert len(parsed) == 2
+    assert matrix.lookup("EUR", "USD")[0] == pytest.approx(1.2)
@@ -0,0 +1,114 @@
+# tests/test_scheduler.py
+
+import time
+
+import pytest
+
+from valutatrade_hub.parser_service import scheduler as scheduler_module
+from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.scheduler import Scheduler
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class _FakeEvent:
+    '''
+    Event планировщика на фиктивных часах: wait(timeout) переводит часы, а не спит
+    '''
+
+    def __init__(self, clock, until):
+        self.clock = clock
+        self.until = until
+
+    def is_set(self):
+        return self.clock.now > self.until
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout
+        return self.is_set()
+
+    def set(self):
+        self.until = float('-inf')
+
+    def clear(self):
+        pass
+
+
+class _StubUpdater:
+    '''
+    Обновление без сети: статусы источников задаются сценарием, вызовы записываются с моментом по часам
+    '''
+
+    def __init__(self, names, clock=None, outcomes=None):
+        self.clients = {name: object() for name in names}
+        self.clock = clock
+        self.outcomes = outcomes or {}
+        self.calls = []
+
+    def run_update(self, source=None):
+        self.calls.append((source, self.clock.now if self.clock else None))
+        script = self.outcomes.get(source)
+        status = script.pop(0) if script else "ok"
+        return {"updated": 0, "sources": {source: {"status": status}}}
+
+
+def _config(**intervals):
+    return ParserConfig(UPDATE_INTERVALS=intervals, SCHEDULER_JITTER=0.0,
+                        BACKOFF_BASE_SECONDS=5.0, BACKOFF_MAX_SECONDS=30.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(scheduler_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_backoff_grows_on_failure_and_resets_on_success(clock):
+    updater = _StubUpdater(["api"], clock, {"api": ["error"] * 5 + ["ok", "error"]})
+    scheduler = Scheduler(_config(api=60.0), updater)
+    scheduler._reset_schedule()
+
+    delays = []
+    for _ in range(7):
+        scheduler._run_source("api")
+        delays.append(scheduler.next_run["api"] - clock.now)
+    assert delays == [5.0, 10.0, 20.0, 30.0, 30.0, 60.0, 5.0]
+    assert scheduler.status()["api"]["failures"] == 1
+
+
+def test_sources_run_on_their_own_intervals(clock):
+    updater = _StubUpdater(["crypto", "fiat"], clock)
+    scheduler = Scheduler(_config(crypto=10.0, fiat=25.0), updater)
+    scheduler._reset_schedule()
+    scheduler._stop_event = _FakeEvent(clock, until=clock.now + 60)
+
+    scheduler._run_loop()
+
+    runs = {}
+    for name, at in updater.calls:
+        runs.setdefault(name, []).append(at - 1000.0)
+    assert runs == {"crypto": [0, 10, 20, 30, 40, 50, 60], "fiat": [0, 25, 50]}
+
+
+def test_stop_wakes_sleeping_loop():
+    updater = _StubUpdater(["api"])
+    scheduler = Scheduler(_config(api=3600.0), updater)
+    scheduler.start()
+    deadline = time.monotonic() + 2
+    while not updater.calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert updater.calls and scheduler.is_running
+
+    # поток спит в Event.wait до следующего запуска через час; stop() будит его сразу
+    started = time.monotonic()
+    scheduler.stop()
+    assert time.monotonic() - started < 1.0
+    assert not scheduler._thread.is_alive()
+    assert not scheduler.is_running
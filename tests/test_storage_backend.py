@@ -0,0 +1,146 @@
+# tests/test_storage_backend.py
+
+from datetime import datetime
+
+import pytest
+
+from valutatrade_hub.infra.migrate import migrate
+from valutatrade_hub.infra.storage_backend import StorageBackend, create_backend
+
+
+def _user(user_id, username):
+    return {"user_id": user_id, "username": username, "hashed_password": "scrypt$16384$8$1$00", "salt": "s",
+            "registration_date": "2026-01-01T00:00:00"}
+
+
+def _record(pair, rate, ts):
+    from_code, to_code = pair.split('_')
+    return {"id": f"{pair}_{ts}", "from_currency": from_code, "to_currency": to_code,
+            "rate": rate, "timestamp": ts, "source": "test"}
+
+
+def test_backend_implements_interface(backend, backend_name):
+    assert isinstance(backend, StorageBackend)
+    assert type(backend).__name__.lower().startswith(backend_name)
+
+
+def test_users(backend):
+    assert backend.next_user_id() == 1
+    assert backend.create_user("alice", lambda uid: _user(uid, "alice"))["user_id"] == 1
+    assert backend.create_user("alice", lambda uid: _user(uid, "alice")) is None
+    backend.add_user(_user(2, "bob"))
+
+    assert backend.get_user_by_username("bob")["user_id"] == 2
+    assert backend.get_user_by_id(1)["username"] == "alice"
+    assert backend.get_user_by_username("nobody") is None
+    assert backend.get_user_by_id(99) is None
+    assert backend.next_user_id() == 3
+
+    backend.update_user({**_user(1, "alice"), "salt": "changed"})
+    assert backend.get_user_by_id(1)["salt"] == "changed"
+    assert sorted(u["username"] for u in backend.iter_users()) == ["alice", "bob"]
+
+
+def test_add_users_in_bulk(backend):
+    backend.add_user(_user(1, "alice"))
+    assert backend.add_users(_user(uid, f"user{uid}") for uid in range(2, 202)) == 200
+    assert backend.add_users([]) == 0
+
+    assert backend.get_user_by_username("user150")["user_id"] == 150
+    assert backend.get_user_by_id(201)["username"] == "user201"
+    assert backend.next_user_id() == 202
+    assert len(list(backend.iter_users())) == 201
+
+
+def test_portfolio_transaction_commits_and_rolls_back(backend):
+    backend.save_portfolio({"user_id": 1, "wallets": {"USD": {"currency_code": "USD", "balance": 100.0}}})
+
+    with backend.portfolio_transaction(1) as data:
+        data["wallets"]["BTC"] = {"currency_code": "BTC", "balance": 0.5}
+    assert backend.get_portfolio(1)["wallets"]["BTC"]["balance"] == 0.5
+
+    with pytest.raises(RuntimeError):
+        with backend.portfolio_transaction(1) as data:
+            data["wallets"]["USD"]["balance"] = 0.0
+            raise RuntimeError("abort")
+    assert backend.get_portfolio(1)["wallets"]["USD"]["balance"] == 100.0
+
+    with backend.portfolio_transaction(2) as data:
+        data["wallets"]["USD"] = {"currency_code": "USD", "balance": 5.0}
+    assert sorted(p["user_id"] for p in backend.iter_portfolios()) == [1, 2]
+    assert backend.get_portfolio(3) is None
+
+
+def test_rates_snapshot_is_merged(backend):
+    backend.update_rates({"BTC_USD": {"rate": 1.0, "updated_at": "2026-01-01T00:00:00"}}, "2026-01-01T00:00:00")
+    backend.update_rates({"EUR_USD": {"rate": 2.0, "updated_at": "2026-01-01T00:01:00"}}, "2026-01-01T00:01:00",
+                         build_matrix=lambda pairs: {"pairs": sorted(pairs)})
+
+    rates = backend.load_rates()
+    assert set(rates["pairs"]) == {"BTC_USD", "EUR_USD"}
+    assert rates["last_refresh"] == "2026-01-01T00:01:00"
+    assert rates["matrix"] == {"pairs": ["BTC_USD", "EUR_USD"]}
+
+
+def test_history_lookup_and_incremental_reads(backend):
+    start = backend.history_tail()
+    backend.append_history([_record("BTC_USD", 1.0, "2026-01-01T00:00:00"),
+                            _record("BTC_USD", 2.0, "2026-01-01T01:00:00")])
+    middle = backend.history_tail()
+    backend.append_history([_record("EUR_USD", 1.1, "2026-01-01T02:00:00")])
+    end = backend.history_tail()
+
+    assert [r["rate"] for r in backend.iter_history()] == [1.0, 2.0, 1.1]
+    assert [r["rate"] for r in backend.iter_history_between(None, end)] == [1.0, 2.0, 1.1]
+    assert [r["rate"] for r in backend.iter_history_between(start, middle)] == [1.0, 2.0]
+    assert [r["rate"] for r in backend.iter_history_between(middle, end)] == [1.1]
+    assert list(backend.iter_history_between(end, end)) == []
+
+    rate, ts = backend.rate_at("BTC_USD", datetime(2026, 1, 1, 0, 30))
+    assert rate == 1.0 and ts.startswith("2026-01-01T00:00:00")
+    assert backend.rate_at("BTC_USD", datetime(2025, 12, 31)) is None
+    assert backend.rate_at("SOL_USD", datetime(2026, 1, 2)) is None
+
+
+def test_nav_snapshot_roundtrip(backend):
+    assert backend.load_nav_snapshot() is None
+    backend.save_nav_snapshot({"base": "USD", "computed_at": "2026-01-01T00:00:00", "total": 3.0,
+                               "navs": {"1": 1.0, "2": 2.0}})
+    snapshot = backend.load_nav_snapshot()
+    assert snapshot["base"] == "USD"
+    assert {str(k): v for k, v in snapshot["navs"].items()} == {"1": 1.0, "2": 2.0}
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_migrate_json_to_sqlite(backend):
+    backend.add_user(_user(1, "alice"))
+    backend.save_portfolio({"user_id": 1, "wallets": {"USD": {"currency_code": "USD", "balance": 10.0}}})
+    backend.update_rates({"BTC_USD": {"rate": 1.0, "updated_at": "2026-01-01T00:00:00"}}, "2026-01-01T00:00:00")
+    backend.append_history([_record("BTC_USD", 1.0, "2026-01-01T00:00:00")])
+
+    target = create_backend("sqlite")
+    try:
+        assert migrate(backend, target) == {"users": 1, "portfolios": 1, "rates": 1, "history": 1}
+        assert target.get_user_by_username("alice")["user_id"] == 1
+        assert target.get_portfolio(1)["wallets"]["USD"]["balance"] == 10.0
+        assert target.rate_at("BTC_USD", datetime(2026, 1, 2))[0] == 1.0
+        # повторный перенос не дублирует пользователей и историю
+        assert migrate(backend, target)["users"] == 0
+        assert len(list(target.iter_history())) == 1
+    finally:
+        target.close()
+
+
+@pytest.mark.parametrize("backend_name", ["sqlite"])
+def test_migrate_sqlite_to_json_adds_users_in_bulk(backend, monkeypatch):
+    backend.add_users(_user(uid, f"user{uid}") for uid in range(1, 2501))
+    target = create_backend("json")
+    target.add_user(_user(1, "user1"))
+
+    def one_by_one(user_data):
+        raise AssertionError("migrate must not add users one by one")
+
+    monkeypatch.setattr(target, "add_user", one_by_one)
+    assert migrate(backend, target)["users"] == 2499
+    assert target.next_user_id() == 2501
+    assert target.get_user_by_username("user2500")["user_id"] == 2500
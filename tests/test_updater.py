@@ -0,0 +1,116 @@
+# tests/test_updater.py
+
+import threading
+import time
+
+import pytest
+
+from benchmarks.provider_server import point_clients_at, restore_clients, start_server
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.infra.settings import settings
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient
+from valutatrade_hub.parser_service.config import parser_config
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+
+class _FailingClient:
+    def fetch_rates(self, revalidate=False):
+        raise ApiRequestError("provider unreachable")
+
+
+class _StaticClient:
+    def fetch_rates(self, revalidate=False):
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        return {"BTC_USD": {"rate": 61000.0, "updated_at": now, "source": "test"}}
+
+
+class _SlowClient:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.threads = []
+
+    def fetch_rates(self, revalidate=False):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.seconds)
+        return {}
+
+
+@pytest.fixture
+def short_deadline(monkeypatch):
+    monkeypatch.setattr(parser_config, "UPDATE_DEADLINE", 0.3)
+
+
+def test_run_update_reports_without_printing(backend, capsys):
+    updater = RatesUpdater()
+    updater.clients = {"bad": _FailingClient(), "good": _StaticClient()}
+
+    report = updater.run_update()
+
+    assert capsys.readouterr().out == ""
+    assert report["updated"] == 1
+    assert report["sources"]["bad"]["status"] == "error"
+    assert report["sources"]["good"]["status"] == "ok"
+    assert backend.load_rates()["pairs"]["BTC_USD"]["rate"] == 61000.0
+
+
+def test_unknown_source_is_reported_not_printed(backend, capsys):
+    report = RatesUpdater().run_update("nope")
+
+    assert capsys.readouterr().out == ""
+    assert report == {"updated": 0, "sources": {"nope": {"status": "error", "error": "unknown source"}}}
+
+
+def test_revaluation_is_debounced(backend, monkeypatch):
+    settings['nav_revalue_min_interval_seconds'] = 3600
+    updater = RatesUpdater()
+    updater.clients = {"good": _StaticClient()}
+    calls = []
+    monkeypatch.setattr(updater, "revalue_portfolios", lambda: calls.append(1))
+
+    updater.run_update()
+    updater.run_update()
+    assert calls == [1]
+
+    settings['nav_revalue_min_interval_seconds'] = 0
+    updater.run_update()
+    assert calls == [1, 1]
+
+
+def test_slow_source_does_not_outlive_deadline(backend, short_deadline):
+    slow = _SlowClient(5)
+    updater = RatesUpdater()
+    updater.clients = {"slow": slow, "good": _StaticClient()}
+
+    started = time.monotonic()
+    report = updater.run_update()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert report["sources"]["slow"]["status"] == "timeout"
+    assert report["sources"]["good"]["status"] == "ok"
+    # незавершённый опрос не держит выход из процесса
+    assert slow.threads and all(t.daemon for t in slow.threads)
+
+
+def test_requests_are_cut_at_deadline(backend, short_deadline):
+    server = start_server(latency_ms=3000)
+    saved = point_clients_at(server.url)
+    try:
+        updater = RatesUpdater()
+        updater.clients = {"coingecko": CoinGeckoClient()}
+
+        started = time.monotonic()
+        report = updater.run_update()
+        # сам запрос прерывается по сроку, а не по REQUEST_TIMEOUT или ответу сервера
+        for thread in threading.enumerate():
+            if thread.name == "rates-fetch-coingecko":
+                thread.join(1.0)
+                assert not thread.is_alive()
+        elapsed = time.monotonic() - started
+    finally:
+        restore_clients(saved)
+        server.shutdown()
+        server.server_close()
+
+    assert report["sources"]["coingecko"]["status"] in ("timeout", "error")
+    assert elapsed < 2.0
@@ -0,0 +1,86 @@
+# tests/test_user_store.py
+
+import json
+
+import pytest
+
+from valutatrade_hub.infra.database import db_manager
+from valutatrade_hub.infra.storage_backend import create_backend
+
+
+def _user(user_id, username):
+    return {"user_id": user_id, "username": username, "hashed_password": "x", "salt": "s",
+            "registration_date": "2026-01-01T00:00:00"}
+
+
+@pytest.fixture
+def loaded_files(monkeypatch):
+    '''
+    Имена файлов, прочитанных через DatabaseManager.load (с кешем и без)
+    '''
+    names = []
+    original = db_manager.load
+
+    def load(filename):
+        names.append(filename)
+        return original(filename)
+
+    monkeypatch.setattr(db_manager, "load", load)
+    return names
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_store_follows_other_writers(backend, data_dir):
+    for uid, name in ((1, "alice"), (2, "bob")):
+        backend.add_user(_user(uid, name))
+    assert backend.get_user_by_username("bob")["user_id"] == 2
+    assert backend.get_user_by_id("1")["username"] == "alice"
+    assert not (data_dir / "users.json").exists()
+
+    # второй экземпляр хранилища — как другой процесс над тем же каталогом
+    other = create_backend("json")
+    other.add_user(_user(3, "carol"))
+    other.update_user({**_user(1, "alice"), "salt": "changed"})
+
+    assert backend.get_user_by_username("carol")["user_id"] == 3
+    assert backend.get_user_by_id(1)["salt"] == "changed"
+    assert backend.next_user_id() == 4
+    backend.add_user(_user(4, "dave"))
+    assert other.get_user_by_username("dave")["user_id"] == 4
+    assert backend.get_user_by_username("nobody") is None
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_login_does_not_parse_users_json(core, data_dir, loaded_files):
+    # крупный устаревший users.json рядом с новыми файлами пользователей
+    (data_dir / "users.json").write_text(json.dumps([_user(uid, f"old{uid}") for uid in range(1, 501)]))
+    core.register_user("alice", "secret-password")
+    assert core.backend.get_user_by_username("alice")["user_id"] == 501
+
+    db_manager.clear_cache()
+    loaded_files.clear()
+    assert core.login_user("alice", "secret-password").username == "alice"
+    assert "users.json" not in loaded_files
+    assert all(len(json.loads((data_dir / name).read_text())) < 10 for name in loaded_files if name.startswith("users"))
+
+
+@pytest.mark.parametrize("backend_name", ["json"])
+def test_legacy_users_until_migrated(backend, data_dir, loaded_files):
+    (data_dir / "users.json").write_text(json.dumps([_user(1, "alice"), _user(2, "bob")]))
+    assert backend.get_user_by_username("bob")["user_id"] == 2
+    assert backend.next_user_id() == 3
+
+    # изменение не перенесённого пользователя переносит только его
+    backend.update_user({**_user(1, "alice"), "salt": "changed"})
+    assert (data_dir / "users" / "1.json").exists()
+    assert [u["salt"] for u in backend.iter_users()] == ["changed", "s"]
+
+    assert backend.migrate_users() == 1
+    assert backend.migrate_users() == 0
+    assert (data_dir / "users.json").exists()
+    loaded_files.clear()
+    assert backend.get_user_by_username("nobody") is None
+    assert backend.get_user_by_id(2)["username"] == "bob"
+    assert backend.next_user_id() == 3
+    assert [u["user_id"] for u in backend.iter_users()] == [1, 2]
+    assert "users.json" not in loaded_files
@@ -1,19 +1,76 @@
 # valutatrade_hub/cli/interface.py
+import csv
+import io
+import json
 import shlex
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Optional
 
 from ..core.currencies import _CURRENCY_REGISTRY as CURRENCY_REGISTRY
-from ..core.exceptions import ApiRequestError, CurrencyNotFoundError, InsufficientFundsError
+from ..core.exceptions import ApiRequestError, CurrencyNotFoundError, InsufficientFundsError, RateNotFoundError
 from ..core.usecases import SystemCore
-from ..infra.database import db_manager
-from ..parser_service.config import parser_config
+from ..infra.settings import settings
+from ..metrics import Histogram, metrics
+from ..parser_service.http_session import connection_stats
+from ..parser_service.scheduler import Scheduler
 from ..parser_service.updater import RatesUpdater
+from ..profiling import CommandProfiler
 
 
 class CLI:
     '''Интерфейс программы'''
-    def __init__(self):
-        self.core = SystemCore()
+    def __init__(self, profile: Optional[bool] = None, output=None):
+        # поток для записей json фиксируется до запуска фоновых потоков:
+        # redirect_stdout в execute подменяет sys.stdout, но не этот поток
+        self.output = output or sys.stdout
+        self.core = SystemCore(refresher=self._refresh_rates)
         self.current_user = None
+        self.session_token = None
+        self.updater = None
+        self.scheduler = None
+        self.commands = self._commands()
+        if profile is None:
+            profile = settings.get('profile', False)
+        self.profiler = CommandProfiler() if profile else None
+
+    def _commands(self) -> dict:
+        '''Таблица команд: имя -> обработчик(args)'''
+        return {
+            'help': self.handle_help,
+            'register': self.handle_register,
+            'login': self.handle_login,
+            'logout': self.handle_logout,
+            'show-portfolio': self.handle_show_portfolio,
+            'buy': self.handle_buy,
+            'sell': self.handle_sell,
+            'batch-trade': self.handle_batch_trade,
+            'get-rate': self.handle_get_rate,
+            'update-rates': self.handle_update_rates,
+            'show-rates': self.handle_show_rates,
+            'rate-bars': self.handle_rate_bars,
+            'show-trades': self.handle_show_trades,
+            'show-nav': self.handle_show_nav,
+            'daemon': self.handle_daemon,
+            'stats': self.handle_stats,
+            'migrate-users': self.handle_migrate_users,
+            'migrate-portfolios': self.handle_migrate_portfolios,
+            'convert-history': self.handle_convert_history,
+        }
+
+    def dispatch(self, command: str, args: list):
+        '''
+        Выполнение одной команды. Обработчик печатает результат для человека
+        и возвращает данные (dict) при успехе или None при ошибке.
+        '''
+        handler = self.commands.get(command)
+        if handler is None:
+            print(f"Неизвестная команда: {command}")
+            return None
+        if self.profiler is not None:
+            return self.profiler.run(command, handler, args)
+        return handler(args)
 
     def run(self):
         print("Программа ValutaTrade Hub запущена.")
@@ -42,35 +99,105 @@ class CLI:
                 if command == 'exit':
                     print("Завершение работы")
                     break
-                elif command == 'help':
-                    self.print_help()
-                elif command == 'register':
-                    self.handle_register(args)
-                elif command == 'login':
-                    self.handle_login(args)
-                elif command == 'show-portfolio':
-                    self.handle_show_portfolio(args)
-                elif command == 'buy':
-                    self.handle_buy(args)
-                elif command == 'sell':
-                    self.handle_sell(args)
-                elif command == 'get-rate':
-                    self.handle_get_rate(args)
-                elif command == 'update-rates':
-                    self.handle_update_rates(args)
-                elif command == 'show-rates':
-                    self.handle_show_rates(args)
-                elif command == 'logout':
-                    self.current_user = None
-                    print("Вы вышли из системы.")
-                else:
-                    print(f"Неизвестная команда: {command}")
+                self.dispatch(command, args)
                     
             except KeyboardInterrupt:
                 print("\nВыход...")
                 break
             except Exception as e:
                 print(f"Критическая ошибка: {e}")
+        self.shutdown()
+
+    def execute(self, command_line: str, json_output: bool = False) -> bool:
+        '''
+        Неинтерактивное выполнение строки команды.
+        В режиме json вывод обработчика подавляется, а в self.output пишется одна строка
+        {"command", "ok", "result"} (при ошибке — "message" с текстом обработчика).
+        '''
+        try:
+            parts = shlex.split(command_line, comments=True)
+        except ValueError as e:
+            parts = None
+            error = f"Ошибка разбора команды: {e}"
+        if parts is None:
+            if json_output:
+                self._emit({"command": None, "ok": False, "result": None, "message": error})
+            else:
+                print(error)
+            return False
+        if not parts:
+            return True
+        command = parts[0].lower()
+        if not json_output:
+            try:
+                return self.dispatch(command, parts[1:]) is not None
+            except Exception as e:
+                print(f"Критическая ошибка: {e}")
+                return False
+
+        captured = io.StringIO()
+        try:
+            with redirect_stdout(captured):
+                result = self.dispatch(command, parts[1:])
+            message = captured.getvalue().strip()
+        except Exception as e:
+            result, message = None, str(e)
+
+        response = {"command": command, "ok": result is not None, "result": result}
+        if result is None:
+            response["message"] = message
+        self._emit(response)
+        return result is not None
+
+    def _emit(self, record: dict):
+        self.output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.output.flush()
+
+    def run_script(self, lines, json_output: bool = False, stop_on_error: bool = False) -> bool:
+        '''
+        Выполнение потока команд (stdin или файл) в одном процессе; строки с # — комментарии.
+        Возвращает True, если все команды выполнены успешно.
+        '''
+        all_ok = True
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.split()[0].lower() == 'exit':
+                    break
+                ok = self.execute(line, json_output)
+                all_ok = all_ok and ok
+                if not ok and stop_on_error:
+                    break
+        finally:
+            self.shutdown()
+        return all_ok
+
+    def shutdown(self):
+        if self.scheduler:
+            self.scheduler.stop()
+
+    def handle_help(self, args):
+        self.print_help()
+        return {"commands": sorted(self.commands) + ['exit']}
+
+    def handle_logout(self, args):
+        if self.session_token:
+            self.core.end_session(self.session_token)
+            self.session_token = None
+        self.current_user = None
+        print("Вы вышли из системы.")
+        return {}
+
+    def _get_updater(self) -> RatesUpdater:
+        if self.updater is None:
+            self.updater = RatesUpdater()
+        return self.updater
+
+    def _refresh_rates(self):
+        '''Фоновое обновление курсов по запросу SystemCore (устаревший курс)'''
+        return self._get_updater().run_update()
 
     def _parse_args(self, args_list):
         parsed = {}
@@ -100,6 +227,7 @@ class CLI:
             user = self.core.register_user(params['username'], params['password'])
             print(f"Пользователь '{user.username}' успешно зарегистрирован (id={user.user_id}).")
             print(f'Для входа в систему используйте команду: login --username {user.username} --password <ваш_пароль>')
+            return {"user_id": user.user_id, "username": user.username}
             
         except ValueError as e:
             print(f"Ошибка регистрации: {e}")
@@ -107,16 +235,30 @@ class CLI:
             print(f"Ошибка: {e}")
 
     def handle_login(self, args):
-        '''Авторизация пользователя'''
+        '''Авторизация пользователя по паролю или по токену сессии'''
         params = self._parse_args(args)
+        if params and 'token' in params:
+            try:
+                user = self.core.login_with_token(params['token'])
+            except ValueError as e:
+                print(f"{e}")
+                return
+            self.current_user = user
+            self.session_token = params['token']
+            print(f"{user.username} - вход выполнен (по токену)")
+            return {"user_id": user.user_id, "username": user.username}
+
         if not params or 'username' not in params or 'password' not in params:
-            print("Ошибка: введите --username и --password")
+            print("Ошибка: введите --username и --password (или --token <токен>)")
             return
             
         try:
             user = self.core.login_user(params['username'], params['password'])
             self.current_user = user
+            self.session_token = self.core.create_session(user)
             print(f"{user.username} - вход выполнен")
+            print(f"Токен сессии: {self.session_token}")
+            return {"user_id": user.user_id, "username": user.username, "token": self.session_token}
         except ValueError as e:
             print(f"{e}")
 
@@ -127,39 +269,39 @@ class CLI:
             return
             
         params = self._parse_args(args) or {}
-        base = params.get('base', self.core.settings.get('default_base_currency', 'USD'))
+        base = params.get('base', self.core.settings.get('default_base_currency', 'USD')).upper()
         
         try:
             portfolio = self.core.get_portfolio(self.current_user.user_id)
-            rates_data = self.core.get_rates()
+            matrix = self.core.get_rate_matrix()
             
             print(f"\nПортфель пользователя '{self.current_user.username}' (база: {base}):")
             print("-" * 50)
             
             total_val = 0.0
             wallets = portfolio.wallets
+            rows = []
+            unpriced = []
             
             if not wallets:
                 print("Портфель пуст.")
             
             for code, wallet in wallets.items():
-                val_in_base = 0.0
-                if code == base:
-                    val_in_base = wallet.balance
-                else:
-                    pair = f"{code}_{base}"
-                    rev_pair = f"{base}_{code}"
-                    
-                    if pair in rates_data:
-                        val_in_base = wallet.balance * rates_data[pair]['rate']
-                    elif rev_pair in rates_data:
-                        val_in_base = wallet.balance * (1 / rates_data[rev_pair]['rate'])
-                
+                val_in_base = matrix.convert(wallet.balance, code, base)
+                rows.append({"currency": code, "balance": wallet.balance, "value": val_in_base})
+                if val_in_base is None:
+                    # позиция без курса не входит в итог, а не считается нулевой
+                    unpriced.append(code)
+                    print(f"- {code:<5}: {wallet.balance:>12.4f}  -> {'нет курса':>12}")
+                    continue
                 total_val += val_in_base
                 print(f"- {code:<5}: {wallet.balance:>12.4f}  -> {val_in_base:>12.2f} {base}")
                 
             print("-" * 50)
             print(f"ИТОГО : {total_val:>12.2f} {base}\n")
+            if unpriced:
+                print(f"Нет курса для: {', '.join(unpriced)} (не входят в итог)")
+            return {"base": base, "wallets": rows, "total": total_val, "unpriced": unpriced}
             
         except Exception as e:
             print(f"Ошибка при отображении портфеля: {e}")
@@ -187,6 +329,7 @@ class CLI:
             print(f"Покупка выполнена: {amount} {currency.upper()} по курсу {rate} {base}")
             print("Изменения в портфеле:")
             print(f"Оценочная стоимость покупки:{cost:.2f} {base}")
+            return {"currency": currency.upper(), "amount": amount, "rate": rate, "cost": cost, "base": base}
             
         except ValueError as e:
             print(f"Ошибка валидации: {e}")
@@ -222,6 +365,7 @@ class CLI:
             print(f"Продажа выполнена: {amount} {currency.upper()} по курсу {rate} {base}/{currency.upper()}")
             print("Изменения в портфеле:")
             print(f"Оценочная выручка:{revenue:.2f} {base}")
+            return {"currency": currency.upper(), "amount": amount, "rate": rate, "revenue": revenue, "base": base}
             
         except ValueError as e:
             print(f"Ошибка валидации: {e}")
@@ -234,22 +378,84 @@ class CLI:
         except Exception as e:
             print(f"Ошибка транзакции: {e}")
 
+    def handle_batch_trade(self, args):
+        '''
+        Исполнение заявок из csv-файла (колонки side,currency,amount)
+        '''
+        if not self.current_user:
+            print("Войдите в систему (команда login)")
+            return
+
+        params = self._parse_args(args)
+        if not params or 'file' not in params:
+            print("Использование: batch-trade --file <orders.csv>")
+            return
+
+        try:
+            with open(params['file'], newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            print(f"Ошибка чтения файла: {e}")
+            return
+
+        own_id = self.current_user.user_id
+        foreign = [i for i, row in enumerate(rows, start=1) if row.get('user_id') not in (None, '', str(own_id))]
+        if foreign:
+            print(f"Ошибка: заявки в строках {foreign[:10]} относятся к другому пользователю")
+            return
+
+        try:
+            report = self.core.execute_batch(rows, default_user_id=own_id)
+        except Exception as e:
+            print(f"Ошибка исполнения пачки: {e}")
+            return
+
+        if report['errors']:
+            print(f"Пачка отклонена: ошибок проверки {len(report['errors'])} из {report['total']} заявок.")
+            for err in report['errors'][:20]:
+                print(f"  строка {err['line']}: {err['error']}")
+            return
+
+        failed = [r for r in report['results'] if r['status'] == 'error']
+        for r in failed[:20]:
+            print(f"  строка {r['line']}: {r['side']} {r['amount']} {r['currency']} — {r['error']}")
+        if len(failed) > 20:
+            print(f"  ... и ещё {len(failed) - 20}")
+        print(f"Исполнено: {report['executed']}, отклонено: {report['failed']} из {report['total']} "
+              f"за {report['elapsed_s']:.3f} с ({report['orders_per_sec']:.0f} заявок/с)")
+        return report
+
     def handle_get_rate(self, args):
         '''Получение текущего курса'''
         params = self._parse_args(args)
         if not params or 'from' not in params or 'to' not in params:
-            print("Использование: get-rate --from <CODE> --to <CODE>")
+            print("Использование: get-rate --from <CODE> --to <CODE> [--at <ISO дата>]")
             return
             
         try:
+            if 'at' in params:
+                try:
+                    at = datetime.fromisoformat(params['at'])
+                except ValueError:
+                    print("Ошибка: --at должен быть датой в формате ISO, например 2026-01-14T12:00:00")
+                    return
+                val, updated = self.core.get_rate_at(params['from'], params['to'], at)
+                print(f"Курс {params['from'].upper()} -> {params['to'].upper()} на {params['at']}: {val} "
+                      f"(котировка от: {updated})")
+                return {"from": params['from'].upper(), "to": params['to'].upper(), "rate": val, "updated_at": updated}
+
             val, updated = self.core.get_rate(params['from'], params['to'])
             print(f"Курс {params['from'].upper()} -> {params['to'].upper()}: {val} (обновлено: {updated})")
-            print(f"Обратный курс {params['to'].upper()} -> {params['from'].upper()}: {1/val} ")           
+            print(f"Обратный курс {params['to'].upper()} -> {params['from'].upper()}: {1/val} ")
+            return {"from": params['from'].upper(), "to": params['to'].upper(), "rate": val, "updated_at": updated}
         except CurrencyNotFoundError as e:
             print(f"Ошибка: {e}")
             available = ", ".join(sorted(CURRENCY_REGISTRY.keys()))
             print(f"Доступные валюты: {available}")
-            
+
+        except RateNotFoundError as e:
+            print(f"Ошибка: {e}")
+
         except ApiRequestError as e:
             print(f"Ошибка API: {e}")
             print(f" Курс {params['from'].upper()}→{params['to'].upper()} недоступен. Повторите попытку позже.")
@@ -263,12 +469,23 @@ class CLI:
         source = params.get('source')
         
         print("Запуск обновления курсов из внешних источников...")
-        updater = RatesUpdater()
-        
+        updater = self._get_updater()
+
         try:
-            count = updater.run_update(source)
+            # ручной запуск: свежесть http-кеша не учитывается, источники опрашиваются всегда
+            report = updater.run_update(source, revalidate=True)
+            count = report['updated']
+            for name, state in report['sources'].items():
+                if state['status'] == 'ok':
+                    print(f"  {name:<13}: OK, {state['count']} курсов за {state['elapsed_ms']} мс")
+                else:
+                    print(f"  {name:<13}: {state['status'].upper()} ({state['error']})")
+            for host, pool in connection_stats().items():
+                print(f"  {host}: соединений {pool['connections']}, запросов {pool['requests']}, "
+                      f"повторно использовано {pool['reused']}")
             if count > 0:
                 print(f"Обновление завершено. Всего обновлено пар: {count}.")
+                return {**report, "connections": connection_stats()}
             else:
                 print("Новых данных не получено. Проверьте соединение или API ключи.")
         except Exception as e:
@@ -282,14 +499,9 @@ class CLI:
         currency_filter = params.get('currency')
         top_n = int(params.get('top', 0))
         
-        raw_data = db_manager.load(parser_config.RATES_FILE)
-        
-        if isinstance(raw_data, dict) and "pairs" in raw_data:
-            rates_data = raw_data["pairs"]
-            updated_at = raw_data.get("last_refresh", "Unknown")
-        else:
-            rates_data = raw_data
-            updated_at = "Unknown (Legacy format)"
+        snapshot = self.core.backend.load_rates()
+        rates_data = snapshot["pairs"]
+        updated_at = snapshot.get("last_refresh") or "Unknown"
 
         if not rates_data:
             print("Локальная база курсов пуста. Выполните 'update-rates'.")
@@ -319,20 +531,248 @@ class CLI:
         for pair, rate in items:
             print(f"{pair:<10}: {rate:>15.6f}")
         print("-" * 40 + "\n")
+        return {"last_refresh": snapshot.get("last_refresh"), "rates": dict(items)}
+
+    def handle_rate_bars(self, args):
+        '''Свечи OHLC по истории курсов'''
+        params = self._parse_args(args)
+        if not params or 'pair' not in params:
+            print("Использование: rate-bars --pair <FROM_TO> [--interval <1m|1h|1d>] [--from <ISO>] [--to <ISO>] [--rebuild yes]")
+            return
+
+        try:
+            start = datetime.fromisoformat(params['from']) if 'from' in params else None
+            end = datetime.fromisoformat(params['to']) if 'to' in params else None
+            bars = self.core.get_rate_bars(
+                params['pair'], params.get('interval', '1h'), start, end, rebuild='rebuild' in params
+            )
+        except RuntimeError as e:
+            print(f"Ошибка: {e}")
+            return
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return
+
+        if not bars:
+            print(f"История для пары '{params['pair'].upper()}' не найдена.")
+            return
+
+        print(f"\nСвечи {params['pair'].upper()} (интервал {params.get('interval', '1h')}):")
+        print("-" * 96)
+        print(f"{'начало':<20} {'open':>14} {'high':>14} {'low':>14} {'close':>14} {'mean':>14} {'тики':>5}")
+        for b in bars:
+            print(f"{b['start'][:19]:<20} {b['open']:>14.6f} {b['high']:>14.6f} {b['low']:>14.6f} "
+                  f"{b['close']:>14.6f} {b['mean']:>14.6f} {b['ticks']:>5}")
+        print("-" * 96 + "\n")
+        return {"pair": params['pair'].upper(), "interval": params.get('interval', '1h'), "bars": bars}
+
+    def handle_show_trades(self, args):
+        '''Журнал сделок текущего пользователя'''
+        if not self.current_user:
+            print("Сначала выполните login")
+            return
+
+        params = self._parse_args(args)
+        if params is None:
+            return
+
+        try:
+            limit = int(params['limit']) if 'limit' in params else None
+            since = datetime.fromisoformat(params['since']) if 'since' in params else None
+        except ValueError:
+            print("Использование: show-trades [--limit <N>] [--since <ISO дата>]")
+            return
+        if limit is not None and limit < 0:
+            print("Ошибка: --limit должен быть неотрицательным целым числом")
+            return
+
+        try:
+            trades = self.core.get_trades(self.current_user.user_id, limit=limit, since=since)
+        except Exception as e:
+            print(f"Ошибка при чтении журнала сделок: {e}")
+            return
+
+        if not trades:
+            print("Сделок не найдено.")
+            return {"trades": []}
+
+        print(f"\nСделки пользователя '{self.current_user.username}':")
+        print("-" * 78)
+        for t in trades:
+            print(f"{t['ts'][:19]}  {t['side']:<4} {t['pair']:<8} {t['amount']:>14.6f} x {t['rate']:>14.6f} "
+                  f"= {t['total']:>12.2f}")
+        print("-" * 78 + "\n")
+        return {"trades": trades}
+
+    def handle_daemon(self, args):
+        '''Фоновое обновление курсов по расписанию: daemon start|stop|status'''
+        action = args[0].lower() if args else 'status'
+        if action == 'start':
+            if self.scheduler is None:
+                self.scheduler = Scheduler(updater=self._get_updater())
+            if self.scheduler.is_running:
+                print("Планировщик уже запущен.")
+                return
+            self.scheduler.start()
+            print("Планировщик запущен.")
+            return {"running": True}
+        elif action == 'stop':
+            if not self.scheduler or not self.scheduler.is_running:
+                print("Планировщик не запущен.")
+                return
+            self.scheduler.stop()
+            print("Планировщик остановлен.")
+            return {"running": False}
+        elif action == 'status':
+            if not self.scheduler or not self.scheduler.is_running:
+                print("Планировщик не запущен.")
+                return {"running": False}
+            status = self.scheduler.status()
+            for name, info in status.items():
+                print(f"  {name:<13}: каждые {info['interval']:.0f} с, следующий запуск через "
+                      f"{info['next_in']:.1f} с, ошибок подряд: {info['failures']}")
+            return {"running": True, "sources": status}
+        else:
+            print("Использование: daemon start|stop|status")
+
+    def handle_show_nav(self, args):
+        '''Стоимость всех портфелей (NAV) по последней переоценке'''
+        params = self._parse_args(args)
+        if params is None:
+            return
+        try:
+            top_n = int(params.get('top', 10))
+        except ValueError:
+            print("Использование: show-nav [--top <N>] [--revalue yes]")
+            return
+
+        try:
+            if 'revalue' in params:
+                snapshot = self.core.revalue_portfolios()
+            else:
+                snapshot = self.core.get_nav_snapshot()
+        except Exception as e:
+            print(f"Ошибка переоценки портфелей: {e}")
+            return
+
+        if not snapshot:
+            print("Переоценка ещё не выполнялась. Выполните 'update-rates' или 'show-nav --revalue yes'.")
+            return
+
+        base = snapshot['base']
+        navs = snapshot['navs']
+        print(f"\nПереоценка портфелей на {snapshot['computed_at'][:19]} (курсы: {snapshot.get('last_refresh') or 'Unknown'})")
+        print(f"Портфелей: {len(navs)}, расчёт: {snapshot['elapsed_ms']} мс")
+        print("-" * 40)
+        ranked = sorted(navs.items(), key=lambda x: x[1], reverse=True)
+        for user_id, nav in ranked[:top_n]:
+            print(f"user {user_id:<8}: {nav:>18.2f} {base}")
+        if self.current_user:
+            own = navs.get(str(self.current_user.user_id))
+            if own is not None:
+                print(f"Ваш портфель : {own:>18.2f} {base}")
+        print("-" * 40)
+        print(f"ИТОГО        : {snapshot['total']:>18.2f} {base}")
+        if snapshot.get('unpriced'):
+            print(f"Нет курса для: {', '.join(snapshot['unpriced'])}")
+        print()
+        return snapshot
+
+    def handle_stats(self, args):
+        '''Метрики процесса: задержки операций, ввод-вывод, запросы к API, кеш и блокировки'''
+        params = self._parse_args(args)
+        if params is None:
+            return
+
+        counters = {}
+        histograms = {}
+        for metric in metrics.metrics():
+            if isinstance(metric, Histogram):
+                for key, entry in metric.summary().items():
+                    histograms[metric.name + self._labels(key)] = entry
+            else:
+                for key, value in metric.items():
+                    counters[metric.name + self._labels(key)] = value
+        collected = {name: value for name, _kind, _help, value in metrics.collected()}
+
+        print("\nЗадержки (мс):")
+        print(f"{'метрика':<58} {'count':>7} {'avg':>9} {'p95':>9}")
+        print("-" * 86)
+        for name, entry in histograms.items():
+            print(f"{name:<58} {entry['count']:>7} {entry['avg'] * 1000:>9.3f} {entry['p95'] * 1000:>9.1f}")
+        print("\nСчётчики:")
+        print("-" * 86)
+        for name, value in {**counters, **collected}.items():
+            shown = f"{value:,.0f}" if float(value).is_integer() else f"{value:.6f}"
+            print(f"{name:<70} {shown:>15}")
+        print()
+
+        result = {"histograms": histograms, "counters": counters, "collected": collected}
+        if 'export' in params:
+            try:
+                metrics.write_prometheus(params['export'])
+            except OSError as e:
+                print(f"Ошибка записи метрик: {e}")
+                return
+            print(f"Метрики записаны в {params['export']} (формат Prometheus).")
+            result["exported"] = params['export']
+        return result
+
+    @staticmethod
+    def _labels(key) -> str:
+        return '{' + ','.join(f'{k}={v}' for k, v in key) + '}' if key else ''
+
+    def handle_migrate_users(self, args):
+        '''Перенос users.json в отдельные файлы пользователей'''
+        try:
+            count = self.core.migrate_users()
+            print(f"Перенесено пользователей: {count}.")
+            return {"migrated": count}
+        except Exception as e:
+            print(f"Ошибка миграции: {e}")
+
+    def handle_migrate_portfolios(self, args):
+        '''Перенос portfolios.json в отдельные файлы пользователей'''
+        try:
+            count = self.core.migrate_portfolios()
+            print(f"Перенесено портфелей: {count}.")
+            return {"migrated": count}
+        except Exception as e:
+            print(f"Ошибка миграции: {e}")
+
+    def handle_convert_history(self, args):
+        '''Перенос exchange_rates.json в сегменты истории'''
+        try:
+            count = self.core.convert_history()
+            print(f"Перенесено записей истории: {count}.")
+            return {"converted": count}
+        except Exception as e:
+            print(f"Ошибка конвертации истории: {e}")
 
     def print_help(self):
         print("""
         Доступные команды:
         -----------------
         register --username <name> --password <pass> - Регистрация
-        login    --username <name> --password <pass> - Вход
+        login    --username <name> --password <pass> - Вход (выдаёт токен сессии)
+        login    --token <token>                     - Вход по токену сессии
         logout                                       - Выход
         show-portfolio [--base <CODE>]               - Состояние кошелька
         buy      --currency <CODE> --amount <num>    - Купить валюту
         sell     --currency <CODE> --amount <num>    - Продать валюту
         get-rate --from <CODE> --to <CODE>           - Получить курс пары
+                 [--at <ISO дата>]                   - курс на указанный момент (по истории)
         update-rates [--source <name>]               - Обновить курсы из API
         show-rates   [--currency <CODE>] [--top <N>] - Показать локальную базу курсов
+        rate-bars --pair <PAIR> [--interval <1h>]    - Свечи OHLC по истории (нужен numpy)
+        show-trades  [--limit <N>] [--since <TS>]    - Журнал сделок
+        show-nav     [--top <N>] [--revalue yes]     - Стоимость всех портфелей (NAV)
+        batch-trade --file <orders.csv>              - Исполнить заявки из файла (side,currency,amount)
+        daemon   start|stop|status                   - Обновление курсов по расписанию в фоне
+        stats    [--export <file.prom>]              - Метрики процесса (задержки, ввод-вывод, API)
+        migrate-users                                - Перенести users.json в файлы пользователей
+        migrate-portfolios                           - Перенести portfolios.json в файлы пользователей
+        convert-history                              - Перенести exchange_rates.json в сегменты истории
         exit                                         - Завершить работу
         help                                         - Показать это сообщение
         """)
\ No newline at end of file
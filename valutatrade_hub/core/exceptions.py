@@ -17,8 +17,31 @@ class CurrencyNotFoundError(ValutaTradeError):
         self.code = code
         super().__init__(f"Неизвестная валюта '{code}'")
 
+class RateNotFoundError(ValutaTradeError):
+    '''Курс пары не найден в истории'''
+    def __init__(self, pair, at):
+        self.pair = pair
+        self.at = at
+        super().__init__(f"Курс {pair} на момент {at} не найден в истории")
+
 class ApiRequestError(ValutaTradeError):
     '''Обращение к неизвестному API'''
     def __init__(self, reason):
         self.reason = reason
-        super().__init__(f"Ошибка при обращении к внешнему API: {reason}")
\ No newline at end of file
+        super().__init__(f"Ошибка при обращении к внешнему API: {reason}")
+
+class StaleRateError(ApiRequestError):
+    '''Курс старше допустимого предела'''
+    def __init__(self, pair, age_seconds, max_age_seconds):
+        self.pair = pair
+        self.age_seconds = age_seconds
+        self.max_age_seconds = max_age_seconds
+        super().__init__(
+            f"курс {pair} устарел ({int(age_seconds)} с при пределе {int(max_age_seconds)} с)"
+        )
+
+class StorageError(ValutaTradeError):
+    '''Ошибка чтения хранилища данных'''
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f"Ошибка хранилища данных: {reason}")
\ No newline at end of file
@@ -1,9 +1,9 @@
 # valutatrade_hub/core/models.py
 import datetime
-import hashlib
+import secrets
 
-#import uuid
-from .utils import hash_password
+from .rate_matrix import RateMatrix
+from .utils import derive_password_hash, password_hash_outdated, verify_password_hash
 
 
 class User:
@@ -14,8 +14,7 @@ class User:
         self._username = username
         
         if password and not hashed_password:
-            #self._salt = uuid.uuid4().hex
-            self._salt = hashlib.sha256().hexdigest()
+            self._salt = secrets.token_hex(16)
             self.password = password 
 
         else:
@@ -64,7 +63,7 @@ class User:
     def password(self, raw_password):
         if len(raw_password) < 4:
             raise ValueError("Пароль должен быть не короче 4 символов")
-        self._hashed_password = hash_password(raw_password, self._salt)
+        self._hashed_password = derive_password_hash(raw_password, self._salt)
 
     def get_user_info(self):
         return {
@@ -74,11 +73,15 @@ class User:
         }
 
     def change_password(self, new_password):
+        self._salt = secrets.token_hex(16)
         self.password = new_password
 
     def verify_password(self, password):
-        check_hash = hash_password(password, self._salt)
-        return check_hash == self._hashed_password
+        return verify_password_hash(password, self._salt, self._hashed_password)
+
+    def password_needs_upgrade(self):
+        '''Хэш в устаревшем формате или с другими параметрами KDF'''
+        return password_hash_outdated(self._hashed_password)
     
     def to_dict(self):
         return {
@@ -157,25 +160,20 @@ class Portfolio:
     def get_total_value(self, base_currency='USD', rates_data=None):
         '''
         Функция для суммирования.
+        rates_data — матрица кросс-курсов RateMatrix или словарь пар.
+        Кошельки в валютах без курса к базовой в сумму не входят.
         '''
-        total = 0.0
         base = base_currency.upper()
-        
+        if rates_data is None:
+            rates_data = {}
+        if not isinstance(rates_data, RateMatrix):
+            rates_data = RateMatrix.from_pairs(rates_data, base)
+
+        total = 0.0
         for wallet in self._wallets.values():
-            if wallet.currency_code == base:
-                total += wallet.balance
-                continue
-            
-            pair = f"{wallet.currency_code}_{base}"
-            
-            rate = 0.0
-            if rates_data and pair in rates_data:
-                rate = rates_data[pair]['rate']
-            elif rates_data and f"{base}_{wallet.currency_code}" in rates_data:
-                rate = 1 / rates_data[f"{base}_{wallet.currency_code}"]['rate']
-            
-            total += wallet.balance * rate
-            
+            value = rates_data.convert(wallet.balance, wallet.currency_code, base)
+            if value is not None:
+                total += value
         return total
 
     def to_dict(self):
@@ -0,0 +1,122 @@
+# valutatrade_hub/core/rate_matrix.py
+
+from typing import Dict, List, Optional, Tuple
+
+
+class RateMatrix:
+    '''
+    Плотная матрица курсов N×N по целочисленным id валют.
+    rates[i][j] — сколько единиц валюты j стоит одна единица валюты i.
+    Пары без прямой котировки получаются триангуляцией через базовую валюту.
+    '''
+
+    def __init__(self, currencies: List[str], rates: List[List[Optional[float]]],
+                 updated_at: List[Optional[str]], last_refresh: Optional[str] = None):
+        self.currencies = currencies
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(currencies)}
+        self.rates = rates
+        self.updated_at = updated_at
+        self.last_refresh = last_refresh
+
+    @classmethod
+    def from_pairs(cls, pairs: dict, base: str, last_refresh: Optional[str] = None) -> 'RateMatrix':
+        '''
+        Построение матрицы по словарю пар вида {"BTC_USD": {"rate": ..., "updated_at": ...}}
+        '''
+        quotes = []
+        codes = {base}
+        for pair, info in pairs.items():
+            parts = pair.split('_')
+            if len(parts) != 2:
+                continue
+            rate = info['rate'] if isinstance(info, dict) else info
+            if not rate:
+                continue
+            updated = info.get('updated_at') if isinstance(info, dict) else None
+            quotes.append((parts[0], parts[1], float(rate), updated))
+            codes.update(parts)
+
+        # стоимость единицы каждой валюты в базовой
+        value = {base: 1.0}
+        updated_at = {base: None}
+        for _ in range(len(codes)):
+            changed = False
+            for frm, to, rate, updated in quotes:
+                if to in value and frm not in value:
+                    value[frm] = rate * value[to]
+                    updated_at[frm] = _older(updated, updated_at[to])
+                    changed = True
+                elif frm in value and to not in value:
+                    value[to] = value[frm] / rate
+                    updated_at[to] = _older(updated, updated_at[frm])
+                    changed = True
+            if not changed:
+                break
+
+        currencies = sorted(codes)
+        n = len(currencies)
+        rates = [[None] * n for _ in range(n)]
+        for i, a in enumerate(currencies):
+            for j, b in enumerate(currencies):
+                if a in value and b in value:
+                    rates[i][j] = value[a] / value[b]
+
+        matrix = cls(currencies, rates, [updated_at.get(c) for c in currencies], last_refresh)
+        for frm, to, rate, _ in quotes:
+            i, j = matrix.index[frm], matrix.index[to]
+            rates[i][j] = rate
+            rates[j][i] = 1 / rate
+        return matrix
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict, base: str) -> 'RateMatrix':
+        '''
+        Матрица, сохранённая вместе со снимком, если она соответствует ему; иначе строится заново
+        '''
+        last_refresh = snapshot.get("last_refresh")
+        stored = snapshot.get("matrix")
+        if stored and last_refresh and stored.get("last_refresh") == last_refresh:
+            return cls.from_dict(stored)
+        return cls.from_pairs(snapshot["pairs"], base, last_refresh)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RateMatrix':
+        return cls(data['currencies'], data['rates'], data['updated_at'], data.get('last_refresh'))
+
+    def to_dict(self) -> dict:
+        return {
+            "currencies": self.currencies,
+            "rates": self.rates,
+            "updated_at": self.updated_at,
+            "last_refresh": self.last_refresh,
+        }
+
+    def lookup(self, from_code: str, to_code: str) -> Optional[Tuple[float, Optional[str]]]:
+        '''
+        (курс, время обновления более старой из котировок) или None
+        '''
+        i = self.index.get(from_code)
+        j = self.index.get(to_code)
+        if i is None or j is None:
+            return None
+        rate = self.rates[i][j]
+        if rate is None:
+            return None
+        return rate, _older(self.updated_at[i], self.updated_at[j])
+
+    def convert(self, amount: float, from_code: str, to_code: str) -> Optional[float]:
+        '''
+        Пересчёт суммы; None, если курса пары нет: вызывающий сам решает, пропустить ли позицию
+        '''
+        if from_code == to_code:
+            return amount
+        found = self.lookup(from_code, to_code)
+        return amount * found[0] if found else None
+
+
+def _older(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
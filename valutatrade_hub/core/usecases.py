@@ -1,187 +1,412 @@
 # valutatrade_hub/core/usecases.py
 
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
 from ..decorators import log_action
-from ..infra.database import db_manager
+from ..infra.columnar import ColumnarHistory, parse_interval
+from ..infra.history_store import to_epoch
+from ..infra.ledger import TradeLedger
+from ..infra.session_store import SessionStore
 from ..infra.settings import settings
+from ..infra.storage_backend import get_backend
+from ..logging_config import app_logger
 from .currencies import get_currency
-from .exceptions import ApiRequestError, InsufficientFundsError
+from .exceptions import ApiRequestError, InsufficientFundsError, RateNotFoundError, StaleRateError, ValutaTradeError
 from .models import Portfolio, User
+from .rate_matrix import RateMatrix
+from .valuation import ValuationEngine
 
 
 class SystemCore:
-    def __init__(self):
-        self.db = db_manager
+    def __init__(self, refresher: Optional[Callable[[], object]] = None):
+        '''
+        refresher — функция обновления курсов из внешних источников; вызывается в фоне,
+        когда get_rate встречает курс старше rates_ttl_seconds
+        '''
+        self.backend = get_backend()
         self.settings = settings
+        self.ledger = TradeLedger()
+        self.sessions = SessionStore()
+        self._rate_matrix = None
+        self.refresher = refresher
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
 
-    @log_action("REGISTER")
+    @log_action("REGISTER", log_args=False)
     def register_user(self, username, password):
         ''' Функция регистрации нового пользователя '''
-        users_file = self.settings.get('users_file', 'users.json')
-        users_data = self.db.load(users_file)
-        
-        for u in users_data:
-            if u['username'] == username:
-                raise ValueError(f"Имя пользователя '{username}' уже занято")
-        
-        new_id = 1
-        if users_data:
-            new_id = max(u['user_id'] for u in users_data) + 1
-            
-        new_user = User(user_id=new_id, username=username, password=password)
-        
-        users_data.append(new_user.to_dict())
-        self.db.save(users_file, users_data)
-        
-        portfolios_file = self.settings.get('portfolio_file', 'portfolios.json')
-        portfolios_data = self.db.load(portfolios_file)
-        
-        new_portfolio = Portfolio(new_id)
+        created = []
+
+        def make_user(new_id):
+            created.append(User(user_id=new_id, username=username, password=password))
+            return created[0].to_dict()
+
+        if self.backend.create_user(username, make_user) is None:
+            raise ValueError(f"Имя пользователя '{username}' уже занято")
+        new_user = created[0]
+
+        new_portfolio = Portfolio(new_user.user_id)
         base_currency = self.settings.get('default_base_currency', 'USD')
         
         new_portfolio.add_currency(base_currency) 
         new_portfolio.get_wallet(base_currency).deposit(1000.0)
         
-        portfolios_data.append(new_portfolio.to_dict())
-        self.db.save(portfolios_file, portfolios_data)
+        self.backend.save_portfolio(new_portfolio.to_dict())
         
         return new_user
 
-    @log_action("LOGIN")
+    @log_action("LOGIN", log_args=False)
     def login_user(self, username, password):
         '''  Функция авторизации пользователя  '''
-        users_file = self.settings.get('users_file', 'users.json')
-        users_data = self.db.load(users_file)
-        user_dict = next((u for u in users_data if u['username'] == username), None)
+        user_dict = self.backend.get_user_by_username(username)
         
         if not user_dict:
             raise ValueError(f"Пользователь '{username}' не найден")
         
         user = User(**user_dict)
-        if user.verify_password(password):
-            return user
-        else:
+        if not user.verify_password(password):
             raise ValueError("Неверный пароль")
 
+        if user.password_needs_upgrade():
+            # перехэширование устаревшего хэша (или хэша со старыми параметрами KDF) с новой солью
+            user.change_password(password)
+            self.backend.update_user(user.to_dict())
+            # сессии, выданные под прежним хэшем, недействительны
+            revoked = self.sessions.revoke_user(user.user_id)
+            app_logger.info("Password hash upgraded for user_id=%s, %d sessions revoked", user.user_id, revoked)
+        return user
+
+    def create_session(self, user: User) -> str:
+        ''' Функция выдачи токена сессии после успешного входа '''
+        return self.sessions.issue(user.get_user_info())
+
+    def login_with_token(self, token):
+        ''' Функция входа по токену сессии (без вычисления KDF) '''
+        info = self.sessions.validate(token)
+        if info is None:
+            app_logger.error("LOGIN_TOKEN result=ERROR msg='invalid or expired token'")
+            raise ValueError("Токен сессии недействителен или истёк")
+        app_logger.info("LOGIN_TOKEN user_id=%s result=OK", info['user_id'])
+        return User(info['user_id'], info['username'], registration_date=info['registration_date'])
+
+    def end_session(self, token):
+        ''' Функция отзыва токена сессии '''
+        self.sessions.revoke(token)
+
     def get_portfolio(self, user_id):
         '''  Функция для просмотра портфолио '''
-        portfolios_file = self.settings.get('portfolio_file', 'portfolios.json')
-        data = self.db.load(portfolios_file)
-        p_data = next((p for p in data if p['user_id'] == user_id), None)
+        p_data = self.backend.get_portfolio(user_id)
         if not p_data:
             return Portfolio(user_id)
         return Portfolio(p_data['user_id'], p_data['wallets'])
 
     def save_portfolio(self, portfolio: Portfolio):
         ''' Функция сохранения портфолио '''
-        portfolios_file = self.settings.get('portfolio_file', 'portfolios.json')
-        data = self.db.load(portfolios_file)
-        for i, p in enumerate(data):
-            if p['user_id'] == portfolio.user_id:
-                data[i] = portfolio.to_dict()
-                self.db.save(portfolios_file, data)
-                return
-        data.append(portfolio.to_dict())
-        self.db.save(portfolios_file, data)
+        self.backend.save_portfolio(portfolio.to_dict())
+
+    @contextmanager
+    def _portfolio_transaction(self, user_id):
+        ''' Портфель для изменения под блокировкой хранилища; сохраняется при выходе без ошибок '''
+        with self.backend.portfolio_transaction(user_id) as p_data:
+            portfolio = Portfolio(user_id, p_data['wallets'])
+            yield portfolio
+            p_data['wallets'] = portfolio.to_dict()['wallets']
+
+    def migrate_users(self) -> int:
+        ''' Функция переноса users.json в отдельные файлы пользователей '''
+        return self.backend.migrate_users()
+
+    def migrate_portfolios(self) -> int:
+        ''' Функция переноса portfolios.json в отдельные файлы пользователей '''
+        return self.backend.migrate_portfolios()
+
+    def convert_history(self) -> int:
+        ''' Функция переноса exchange_rates.json в сегменты истории '''
+        return self.backend.convert_history()
+
+    def get_trades(self, user_id, limit=None, since=None):
+        ''' Функция получения журнала сделок пользователя '''
+        return self.ledger.get_trades(user_id, limit=limit, since=since)
 
     def get_rates(self):
         ''' Функция получения курсов '''
-        rates_file = self.settings.get('rates_file', 'rates.json')
-        data = self.db.load(rates_file)
-        if "pairs" in data:
-            return data["pairs"]
-        return data
+        return self.backend.load_rates()["pairs"]
+
+    def get_rate_matrix(self) -> RateMatrix:
+        ''' Функция получения матрицы кросс-курсов текущего снимка '''
+        snapshot = self.backend.load_rates()
+        last_refresh = snapshot.get("last_refresh")
+        if self._rate_matrix is not None and last_refresh and self._rate_matrix.last_refresh == last_refresh:
+            return self._rate_matrix
+
+        base = self.settings.get('default_base_currency', 'USD')
+        self._rate_matrix = RateMatrix.from_snapshot(snapshot, base)
+        return self._rate_matrix
 
     def get_rate(self, from_curr, to_curr):
-        '''Функция получения курса '''
+        '''Функция получения курса (прямая котировка или кросс-курс через базовую валюту) '''
+        from_code = get_currency(from_curr).code
+        to_code = get_currency(to_curr).code
+
+        found = self.get_rate_matrix().lookup(from_code, to_code)
+        if found is None:
+            raise ApiRequestError(f"Курс {from_code}_{to_code} не найден в базе данных.")
+
+        updated_at = found[1]
+        if updated_at:
+            age = time.time() - to_epoch(updated_at)
+            if age > self.settings.get('rates_ttl_seconds', 300):
+                self.refresh_rates_async()
+            max_age = self.settings.get('rates_max_age_seconds', 3600)
+            if age > max_age:
+                raise StaleRateError(f"{from_code}_{to_code}", age, max_age)
+        return found
+
+    def refresh_rates_async(self) -> bool:
+        '''Запуск фонового обновления курсов; одновременно выполняется не больше одного '''
+        if self.refresher is None:
+            return False
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            self._refresh_thread = threading.Thread(
+                target=self._run_refresh, name="rates-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+        return True
+
+    def _run_refresh(self):
+        try:
+            app_logger.info("Stale rates detected, background refresh started")
+            self.refresher()
+        except Exception as e:
+            app_logger.error("Background rates refresh failed: %s", e)
+
+    def get_rate_at(self, from_curr, to_curr, at):
+        '''Функция получения курса, действовавшего на момент at, по истории '''
         get_currency(from_curr)
         get_currency(to_curr)
+        from_code, to_code = from_curr.upper(), to_curr.upper()
 
-        rates = self.get_rates()
-        pair = f"{from_curr.upper()}_{to_curr.upper()}"
-        
-        if pair in rates:
-            return rates[pair]['rate'], rates[pair]['updated_at']
-        
-        reverse_pair = f"{to_curr.upper()}_{from_curr.upper()}"
-        if reverse_pair in rates:
-            return 1 / rates[reverse_pair]['rate'], rates[reverse_pair]['updated_at']
-            
-        raise ApiRequestError(f"Курс {pair} не найден в базе данных.")
+        found = self._history_rate(from_code, to_code, at)
+        if found:
+            return found
 
-    @log_action("BUY")
-    def buy_currency(self, user: User, currency_code: str, amount: float):
-        '''Функция покупки валюты за USD'''
+        # кросс-курс через базовую валюту: история хранит в основном пары <CODE>_<база>
+        base = self.settings.get('default_base_currency', 'USD').upper()
+        if base not in (from_code, to_code):
+            from_base = self._history_rate(from_code, base, at)
+            to_base = self._history_rate(to_code, base, at)
+            if from_base and to_base:
+                return from_base[0] / to_base[0], min(from_base[1], to_base[1])
+
+        raise RateNotFoundError(f"{from_code}_{to_code}", at)
+
+    def _history_rate(self, from_code, to_code, at):
+        ''' Прямая или обратная пара из истории: (rate, timestamp) или None '''
+        found = self.backend.rate_at(f"{from_code}_{to_code}", at)
+        if found:
+            return found
+        found = self.backend.rate_at(f"{to_code}_{from_code}", at)
+        if found:
+            return 1 / found[0], found[1]
+        return None
+
+    def revalue_portfolios(self):
+        '''Функция пакетной переоценки всех портфелей по текущему снимку курсов '''
+        return ValuationEngine(self.backend).revalue(self.get_rate_matrix())
+
+    def get_nav_snapshot(self):
+        '''Функция получения последней сохранённой переоценки портфелей '''
+        return ValuationEngine(self.backend).get_snapshot()
+
+    def get_rate_bars(self, pair, interval, start=None, end=None, rebuild=False):
+        '''Функция построения свечей OHLC по истории курсов пары '''
+        history = ColumnarHistory()
+        if rebuild:
+            history.build()
+        return history.bars(pair.upper(), parse_interval(interval), start, end)
+
+    def _trade_rate(self, target_code, base_currency):
+        ''' Курс сделки к базовой валюте; отсутствие курса — ошибка валидации '''
+        try:
+            rate, _ = self.get_rate(target_code, base_currency)
+        except StaleRateError:
+            raise
+        except ApiRequestError:
+            raise ValueError(f"Не удалось получить курс для {target_code} -> {base_currency}")
+        return rate
+
+    def _check_order(self, side, currency_code, amount):
+        ''' Проверка заявки; возвращает (код валюты, базовая валюта) '''
+        if not math.isfinite(amount):
+            raise ValueError(f"Некорректное количество '{amount}'")
         if amount <= 0:
             raise ValueError("Количество должно быть положительным")
-        
-        currency = get_currency(currency_code)
-        target_code = currency.code
-        
+
+        target_code = get_currency(currency_code).code
         base_currency = self.settings.get('default_base_currency', 'USD')
         if target_code == base_currency:
-            raise ValueError(f"Нельзя купить {base_currency} за {base_currency}")
+            if side == "buy":
+                raise ValueError(f"Нельзя купить {base_currency} за {base_currency}")
+            raise ValueError(f"Нельзя продать {base_currency}")
+        return target_code, base_currency
 
-        portfolio = self.get_portfolio(user.user_id)
-        
-        try:
-            rate, _ = self.get_rate(target_code, base_currency)
-        except ApiRequestError:
-             raise ValueError(f"Не удалось получить курс для {target_code} -> {base_currency}")
-             
+    @staticmethod
+    def _apply_buy(portfolio: Portfolio, target_code, base_currency, amount, rate):
+        ''' Покупка в портфеле в памяти; возвращает стоимость в базовой валюте '''
         cost_in_base = amount * rate
-        
         base_wallet = portfolio.get_wallet(base_currency)
         if not base_wallet:
-             raise ValueError(f"У вас нет кошелька {base_currency} для оплаты")
-             
+            raise ValueError(f"У вас нет кошелька {base_currency} для оплаты")
+
         if base_wallet.balance < cost_in_base:
             raise InsufficientFundsError(base_currency, base_wallet.balance, cost_in_base)
 
         base_wallet.withdraw(cost_in_base)
-        
+
         if not portfolio.get_wallet(target_code):
             portfolio.add_currency(target_code)
-        
-        portfolio.get_wallet(target_code).deposit(amount)
-        
-        self.save_portfolio(portfolio)
-        return cost_in_base, rate
 
-    @log_action("SELL")
-    def sell_currency(self, user: User, currency_code: str, amount: float):
-        '''Функция продажи валюты за USD'''
-        if amount <= 0:
-            raise ValueError("Количество должно быть положительным")
-        
-        currency = get_currency(currency_code)
-        target_code = currency.code
-        
-        base_currency = self.settings.get('default_base_currency', 'USD')
-        if target_code == base_currency:
-            raise ValueError(f"Нельзя продать {base_currency}")
+        portfolio.get_wallet(target_code).deposit(amount)
+        return cost_in_base
 
-        portfolio = self.get_portfolio(user.user_id)
+    @staticmethod
+    def _apply_sell(portfolio: Portfolio, target_code, base_currency, amount, rate):
+        ''' Продажа в портфеле в памяти; возвращает выручку в базовой валюте '''
+        revenue_in_base = amount * rate
         target_wallet = portfolio.get_wallet(target_code)
-        
+
         if not target_wallet or target_wallet.balance < amount:
             available = target_wallet.balance if target_wallet else 0.0
             raise InsufficientFundsError(target_code, available, amount)
-            
-        try:
-            rate, _ = self.get_rate(target_code, base_currency)
-        except ApiRequestError:
-             raise ValueError(f"Не удалось получить курс для {target_code} -> {base_currency}")
-        
-        revenue_in_base = amount * rate
-        
+
         target_wallet.withdraw(amount)
-        
+
         base_wallet = portfolio.get_wallet(base_currency)
         if not base_wallet:
             portfolio.add_currency(base_currency)
             base_wallet = portfolio.get_wallet(base_currency)
-            
+
         base_wallet.deposit(revenue_in_base)
-        
-        self.save_portfolio(portfolio)
-        return revenue_in_base, rate
\ No newline at end of file
+        return revenue_in_base
+
+    @log_action("BUY")
+    def buy_currency(self, user: User, currency_code: str, amount: float):
+        '''Функция покупки валюты за USD'''
+        target_code, base_currency = self._check_order("buy", currency_code, amount)
+        rate = self._trade_rate(target_code, base_currency)
+
+        with self._portfolio_transaction(user.user_id) as portfolio:
+            cost_in_base = self._apply_buy(portfolio, target_code, base_currency, amount, rate)
+
+        self.ledger.append(user.user_id, "buy", f"{target_code}_{base_currency}", amount, rate, cost_in_base)
+        return cost_in_base, rate
+
+    @log_action("SELL")
+    def sell_currency(self, user: User, currency_code: str, amount: float):
+        '''Функция продажи валюты за USD'''
+        target_code, base_currency = self._check_order("sell", currency_code, amount)
+        rate = self._trade_rate(target_code, base_currency)
+
+        with self._portfolio_transaction(user.user_id) as portfolio:
+            revenue_in_base = self._apply_sell(portfolio, target_code, base_currency, amount, rate)
+
+        self.ledger.append(user.user_id, "sell", f"{target_code}_{base_currency}", amount, rate, revenue_in_base)
+        return revenue_in_base, rate
+
+    def validate_orders(self, rows, default_user_id=None):
+        '''
+        Проверка пачки заявок до исполнения.
+        rows — словари с ключами side, currency, amount и необязательным user_id.
+        Возвращает (заявки, ошибки); курсы берутся из одного снимка.
+        '''
+        orders, errors = [], []
+        rates = {}
+        for line, row in enumerate(rows, start=1):
+            try:
+                side = str(row.get('side') or '').strip().lower()
+                if side not in ("buy", "sell"):
+                    raise ValueError(f"Неизвестная операция '{row.get('side')}' (ожидается buy или sell)")
+                try:
+                    amount = float(row.get('amount'))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Некорректное количество '{row.get('amount')}'")
+                raw_user = row.get('user_id') or default_user_id
+                if raw_user in (None, ''):
+                    raise ValueError("Не указан user_id")
+                user_id = int(raw_user)
+
+                target_code, base_currency = self._check_order(side, str(row.get('currency') or ''), amount)
+                if target_code not in rates:
+                    rates[target_code] = self._trade_rate(target_code, base_currency)
+            except (ValueError, ValutaTradeError) as e:
+                errors.append({"line": line, "error": str(e)})
+                continue
+
+            orders.append({
+                "line": line, "user_id": user_id, "side": side, "currency": target_code,
+                "base": base_currency, "amount": amount, "rate": rates[target_code],
+            })
+        return orders, errors
+
+    def execute_batch(self, rows, default_user_id=None):
+        '''
+        Исполнение пачки заявок: сначала проверяются все заявки, затем они исполняются
+        по зафиксированным курсам на портфелях в памяти. Каждый портфель читается и
+        записывается один раз, журнал сделок дописывается одной операцией.
+        При ошибках проверки ни одна заявка не исполняется.
+        '''
+        started = time.perf_counter()
+        orders, errors = self.validate_orders(rows, default_user_id)
+        report = {"total": len(orders) + len(errors), "executed": 0, "failed": 0,
+                  "results": [], "errors": errors, "elapsed_s": 0.0, "orders_per_sec": 0.0}
+        if errors:
+            report["elapsed_s"] = time.perf_counter() - started
+            app_logger.error("BATCH rejected: %d invalid order(s) of %d", len(errors), report['total'])
+            return report
+
+        by_user = {}
+        for order in orders:
+            by_user.setdefault(order["user_id"], []).append(order)
+
+        results = []
+        trades = []
+        for user_id, user_orders in by_user.items():
+            if self.backend.get_user_by_id(user_id) is None:
+                for order in user_orders:
+                    results.append({**order, "status": "error", "error": f"Пользователь {user_id} не найден"})
+                continue
+            with self._portfolio_transaction(user_id) as portfolio:
+                for order in user_orders:
+                    apply = self._apply_buy if order["side"] == "buy" else self._apply_sell
+                    try:
+                        total = apply(portfolio, order["currency"], order["base"], order["amount"], order["rate"])
+                    except (ValueError, ValutaTradeError) as e:
+                        results.append({**order, "status": "error", "error": str(e)})
+                        continue
+                    results.append({**order, "status": "ok", "total": total})
+                    trades.append((user_id, order["side"], f"{order['currency']}_{order['base']}",
+                                   order["amount"], order["rate"], total))
+
+        self.ledger.append_many(trades)
+
+        results.sort(key=lambda r: r["line"])
+        elapsed = time.perf_counter() - started
+        report.update({
+            "executed": len(trades),
+            "failed": len(results) - len(trades),
+            "results": results,
+            "elapsed_s": elapsed,
+            "orders_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+        })
+        app_logger.info(
+            "BATCH executed=%d failed=%d users=%d elapsed=%.3fs",
+            report['executed'], report['failed'], len(by_user), elapsed,
+            extra={"action": "BATCH", "latency_ms": round(elapsed * 1000, 3), "outcome": "OK"},
+        )
+        return report
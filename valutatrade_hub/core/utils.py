@@ -1,8 +1,11 @@
 # valutatrade_hub/core/utils.py
 import hashlib
+import hmac
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+
+from ..infra.settings import settings
 
 DATA_DIR = os.path.join(os.getcwd(), 'data')
 
@@ -11,13 +14,15 @@ def ensure_data_files():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
     
+    # отметки времени курсов — UTC без пояса, как у курсов из API (to_epoch считает такое время UTC)
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
     files = {
         'users.json': [],
         'portfolios.json': [],
         'rates.json': {
-            "BTC_USD": {"rate": 59543.10, "updated_at": datetime.now().isoformat()},
-            "EUR_USD": {"rate": 1.043, "updated_at": datetime.now().isoformat()},
-            "USD_USD": {"rate": 1.0, "updated_at": datetime.now().isoformat()}
+            "BTC_USD": {"rate": 59543.10, "updated_at": now},
+            "EUR_USD": {"rate": 1.043, "updated_at": now},
+            "USD_USD": {"rate": 1.0, "updated_at": now}
         }
     }
 
@@ -45,4 +50,53 @@ def save_json(filename, data):
 
 def hash_password(password: str, salt: str) -> str:
     ''' Функция хэширования пароля    '''
-    return hashlib.sha256((password + salt).encode('utf-8')).hexdigest()
\ No newline at end of file
+    return hashlib.sha256((password + salt).encode('utf-8')).hexdigest()
+    
+
+def _kdf_params() -> tuple:
+    ''' Текущие параметры KDF из настроек: ('scrypt', n, r, p) или ('pbkdf2_sha256', итерации) '''
+    if settings.get('password_kdf', 'scrypt') == 'scrypt' and hasattr(hashlib, 'scrypt'):
+        return ('scrypt', int(settings.get('scrypt_n')), int(settings.get('scrypt_r')), int(settings.get('scrypt_p')))
+    return ('pbkdf2_sha256', int(settings.get('pbkdf2_iterations')))
+
+
+def _derive(password: str, salt: str, params: tuple) -> str:
+    if params[0] == 'scrypt' and len(params) == 4:
+        n, r, p = params[1:]
+        digest = hashlib.scrypt(password.encode('utf-8'), salt=salt.encode('utf-8'),
+                                n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+    elif params[0] == 'pbkdf2_sha256' and len(params) == 2:
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), params[1])
+    else:
+        raise ValueError(f"неизвестные параметры KDF: {params}")
+    return '$'.join([str(x) for x in params] + [digest.hex()])
+
+
+def derive_password_hash(password: str, salt: str) -> str:
+    ''' Хэш пароля через scrypt или PBKDF2: строка вида "scrypt$n$r$p$<hex>" '''
+    return _derive(password, salt, _kdf_params())
+
+
+def verify_password_hash(password: str, salt: str, stored: str) -> bool:
+    '''
+    Проверка пароля по сохранённому хэшу (в том числе устаревшему sha256).
+    Повреждённый хэш (неизвестный алгоритм, нечисловые или недопустимые параметры) — просто неверный пароль.
+    '''
+    if not stored or not isinstance(stored, str):
+        return False
+    if '$' not in stored:
+        return hmac.compare_digest(hash_password(password, salt), stored)
+    parts = stored.split('$')
+    try:
+        params = (parts[0], *[int(x) for x in parts[1:-1]])
+        derived = _derive(password, salt, params)
+    except (ValueError, OverflowError, MemoryError):
+        return False
+    return hmac.compare_digest(derived, stored)
+
+
+def password_hash_outdated(stored: str) -> bool:
+    ''' Хэш устаревшего формата или с параметрами, отличными от текущих настроек '''
+    if not stored or '$' not in stored:
+        return True
+    return stored.rsplit('$', 1)[0] != '$'.join(str(x) for x in _kdf_params())
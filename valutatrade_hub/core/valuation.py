@@ -0,0 +1,96 @@
+# valutatrade_hub/core/valuation.py
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from ..infra.settings import settings
+from ..infra.storage_backend import get_backend
+from .rate_matrix import RateMatrix
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ValuationEngine:
+    '''
+    Пакетная переоценка всех портфелей (NAV) в базовой валюте.
+    Кошельки упаковываются в матрицу балансов пользователи × валюты, которая
+    умножается на вектор курсов валют к базовой. Без numpy используется обычный цикл.
+    '''
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+
+    def revalue(self, matrix: Optional[RateMatrix] = None, base: Optional[str] = None) -> dict:
+        '''
+        Переоценка всех портфелей по снимку курсов; результат сохраняется в хранилище.
+        elapsed_ms — весь проход: снимок курсов, чтение портфелей и расчёт (без записи результата).
+        '''
+        started = time.perf_counter()
+        base = (base or settings.get('default_base_currency', 'USD')).upper()
+        if matrix is None:
+            matrix = RateMatrix.from_snapshot(self.backend.load_rates(), base)
+
+        portfolios = list(self.backend.iter_portfolios())
+        user_ids, navs, unpriced = self._compute(portfolios, matrix, base)
+
+        snapshot = {
+            "base": base,
+            "last_refresh": matrix.last_refresh,
+            "computed_at": datetime.utcnow().isoformat(),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            "total": sum(navs),
+            "unpriced": sorted(unpriced),
+            "navs": {str(uid): nav for uid, nav in zip(user_ids, navs)},
+        }
+        self.backend.save_nav_snapshot(snapshot)
+        return snapshot
+
+    @staticmethod
+    def _compute(portfolios: list, matrix: RateMatrix, base: str):
+        '''
+        (id пользователей, NAV в базовой валюте, валюты без курса)
+        '''
+        base_idx = matrix.index.get(base)
+        if base_idx is None:
+            rate_to_base = [None] * len(matrix.currencies)
+        else:
+            rate_to_base = [row[base_idx] for row in matrix.rates]
+
+        user_ids = [p['user_id'] for p in portfolios]
+        unpriced = set()
+
+        if np is None:
+            navs = []
+            for p in portfolios:
+                nav = 0.0
+                for code, wallet in p['wallets'].items():
+                    j = matrix.index.get(code)
+                    if j is None or rate_to_base[j] is None:
+                        unpriced.add(code)
+                        continue
+                    nav += wallet['balance'] * rate_to_base[j]
+                navs.append(nav)
+            return user_ids, navs, unpriced
+
+        rows, cols, values = [], [], []
+        for i, p in enumerate(portfolios):
+            for code, wallet in p['wallets'].items():
+                j = matrix.index.get(code)
+                if j is None or rate_to_base[j] is None:
+                    unpriced.add(code)
+                    continue
+                rows.append(i)
+                cols.append(j)
+                values.append(wallet['balance'])
+
+        balances = np.zeros((len(portfolios), len(matrix.currencies)), dtype=np.float64)
+        balances[rows, cols] = values
+        navs = balances @ np.asarray([r or 0.0 for r in rate_to_base], dtype=np.float64)
+        return user_ids, navs.tolist(), unpriced
+
+    def get_snapshot(self) -> Optional[dict]:
+        return self.backend.load_nav_snapshot()
@@ -1,30 +1,56 @@
 # valutatrade_hub/decorators.py
 
 import functools
+import time
 
 from .logging_config import app_logger
+from .metrics import metrics
 
+_action_seconds = metrics.histogram('valutatrade_action_seconds', 'Latency of business operations')
+_actions_total = metrics.counter('valutatrade_actions_total', 'Business operations by outcome')
 
-def log_action(action_name):
+
+def log_action(action_name, log_args=True):
     '''
-    Декоратор логирования бизнес-операций
+    Декоратор логирования бизнес-операций.
+    Сообщение передаётся в %-стиле и форматируется в фоновом потоке логирования;
+    action, user_id, latency_ms и outcome дополнительно передаются как поля записи.
+    log_args=False скрывает аргументы (например, пароль).
     '''
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
 
-            user_id = args[1] if len(args) > 1 else "unknown"
+            subject = args[1] if len(args) > 1 else "unknown"
+            user_id = getattr(subject, 'user_id', subject)
+            shown_args = (args[2:], kwargs) if log_args else ('<hidden>', {})
+            started = time.perf_counter()
             
             try:
                 result = func(*args, **kwargs)
-                app_logger.info(
-                    f"{action_name} user_id={user_id} args={args[2:]} kwargs={kwargs} result=OK"
-                )
-                return result
             except Exception as e:
+                elapsed = time.perf_counter() - started
+                latency_ms = elapsed * 1000
+                _action_seconds.observe(elapsed, action=action_name, outcome="ERROR")
+                _actions_total.inc(action=action_name, outcome="ERROR")
                 app_logger.error(
-                    f"{action_name} user_id={user_id} result=ERROR type={type(e).__name__} msg='{str(e)}'"
+                    "%s user_id=%s result=ERROR type=%s msg='%s' latency_ms=%.3f",
+                    action_name, user_id, type(e).__name__, e, latency_ms,
+                    extra={"action": action_name, "user_id": user_id, "latency_ms": round(latency_ms, 3),
+                           "outcome": "ERROR", "error_type": type(e).__name__},
                 )
                 raise e
+
+            elapsed = time.perf_counter() - started
+            latency_ms = elapsed * 1000
+            _action_seconds.observe(elapsed, action=action_name, outcome="OK")
+            _actions_total.inc(action=action_name, outcome="OK")
+            app_logger.info(
+                "%s user_id=%s args=%r kwargs=%r result=OK latency_ms=%.3f",
+                action_name, user_id, shown_args[0], shown_args[1], latency_ms,
+                extra={"action": action_name, "user_id": user_id, "latency_ms": round(latency_ms, 3),
+                       "outcome": "OK"},
+            )
+            return result
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,201 @@
+# valutatrade_hub/infra/columnar.py
+
+import os
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+from .database import db_manager
+from .history_store import to_epoch
+from .settings import settings
+from .storage_backend import get_backend
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_interval(value: str) -> int:
+    '''
+    '30s', '5m', '1h', '1d' -> секунды
+    '''
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Некорректный интервал '{value}' (примеры: 1m, 15m, 1h, 1d)")
+    return int(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+class ColumnarHistory:
+    '''
+    Колоночное представление истории курсов: для каждой пары два непрерывных
+    массива float64 (timestamp epoch и курс) в файлах columnar/<PAIR>.ts.f64 и <PAIR>.rate.f64.
+    manifest.json хранит число точек по парам и отметку конца истории хранилища (history_tail):
+    новые тики дописываются в конец файлов, полное перестроение нужно, только если история
+    изменилась не дописыванием. Файлы открываются через memory map.
+    '''
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("Для колоночной истории требуется numpy (poetry install -E columnar)")
+        self.db = db_manager
+        self.backend = get_backend()
+        self.columnar_dir = settings.get('columnar_dir', 'columnar')
+        self.manifest_file = os.path.join(self.columnar_dir, 'manifest.json')
+
+    def _path(self, pair: str, column: str) -> str:
+        return self.db.path(os.path.join(self.columnar_dir, f"{pair}.{column}.f64"))
+
+    def _manifest(self) -> Optional[dict]:
+        manifest = self.db.load(self.manifest_file)
+        return manifest if isinstance(manifest, dict) and "tail" in manifest else None
+
+    def is_stale(self) -> bool:
+        manifest = self._manifest()
+        return manifest is None or manifest["tail"] != self.backend.history_tail()
+
+    @staticmethod
+    def _collect(records) -> dict:
+        '''
+        {pair: (timestamps, rates)} — массивы, отсортированные по времени
+        '''
+        columns = {}
+        for record in records:
+            pair = f"{record['from_currency']}_{record['to_currency']}"
+            ts_list, rate_list = columns.setdefault(pair, ([], []))
+            ts_list.append(to_epoch(record['timestamp']))
+            rate_list.append(float(record['rate']))
+        result = {}
+        for pair, (ts_list, rate_list) in columns.items():
+            ts = np.asarray(ts_list, dtype=np.float64)
+            order = np.argsort(ts, kind='stable')
+            result[pair] = (ts[order], np.asarray(rate_list, dtype=np.float64)[order])
+        return result
+
+    def build(self, tail=None) -> dict:
+        '''
+        Полное построение колонок по истории хранилища. Возвращает число точек по парам.
+        '''
+        with self.db.lock(self.manifest_file):
+            tail = tail if tail is not None else self.backend.history_tail()
+            os.makedirs(self.db.path(self.columnar_dir), exist_ok=True)
+            counts = {}
+            for pair, (ts, rates) in self._collect(self.backend.iter_history_between(None, tail)).items():
+                self._replace(self._path(pair, 'ts'), ts)
+                self._replace(self._path(pair, 'rate'), rates)
+                counts[pair] = len(ts)
+            self.db.save(self.manifest_file, {"tail": tail, "pairs": counts})
+        return counts
+
+    def refresh(self) -> dict:
+        '''
+        Дописывание тиков, появившихся после отметки в manifest.json; при необходимости — полное построение
+        '''
+        with self.db.lock(self.manifest_file):
+            manifest = self._manifest()
+            tail = self.backend.history_tail()
+            if manifest is None:
+                return self.build(tail)
+            if manifest["tail"] == tail:
+                return manifest["pairs"]
+            records = self.backend.iter_history_between(manifest["tail"], tail)
+            if records is None or not all(self._intact(pair, n) for pair, n in manifest["pairs"].items()):
+                return self.build(tail)
+
+            os.makedirs(self.db.path(self.columnar_dir), exist_ok=True)
+            counts = dict(manifest["pairs"])
+            for pair, (ts, rates) in self._collect(records).items():
+                counts[pair] = self._append(pair, ts, rates, counts.get(pair, 0))
+            self.db.save(self.manifest_file, {"tail": tail, "pairs": counts})
+        return counts
+
+    def _intact(self, pair: str, count: int) -> bool:
+        return all(
+            os.path.exists(path) and os.path.getsize(path) >= count * 8
+            for path in (self._path(pair, 'ts'), self._path(pair, 'rate'))
+        )
+
+    def _append(self, pair: str, ts, rates, count: int) -> int:
+        ts_path, rate_path = self._path(pair, 'ts'), self._path(pair, 'rate')
+        if count:
+            old_ts = self._read(ts_path, count)
+            if ts[0] < old_ts[-1]:
+                # тики из прошлого: слияние с перезаписью файлов пары
+                merged_ts = np.concatenate((old_ts, ts))
+                order = np.argsort(merged_ts, kind='stable')
+                merged_rates = np.concatenate((self._read(rate_path, count), rates))
+                self._replace(ts_path, merged_ts[order])
+                self._replace(rate_path, merged_rates[order])
+                return len(merged_ts)
+        for path, column in ((ts_path, ts), (rate_path, rates)):
+            with open(path, 'ab') as f:
+                # хвост от прерванного дописывания (за пределами числа точек в манифесте) отбрасывается
+                f.truncate(count * 8)
+                f.seek(count * 8)
+                f.write(column.tobytes())
+        return count + len(ts)
+
+    @staticmethod
+    def _read(path: str, count: int):
+        if not count:
+            return np.empty(0)
+        return np.memmap(path, dtype=np.float64, mode='r', shape=(count,))
+
+    @staticmethod
+    def _replace(path: str, array):
+        # замена через rename: уже открытые memory map продолжают видеть старый файл
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        os.replace(tmp_path, path)
+
+    def load(self, pair: str):
+        '''
+        (timestamps, rates) пары в виде массивов только для чтения (memory map)
+        '''
+        count = self.refresh().get(pair, 0)
+        return self._read(self._path(pair, 'ts'), count), self._read(self._path(pair, 'rate'), count)
+
+    def bars(self, pair: str, interval_seconds: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list:
+        '''
+        Свечи OHLC по интервалу: open/high/low/close, среднее и число тиков в баре
+        '''
+        ts, rates = self.load(pair)
+        lo = int(np.searchsorted(ts, to_epoch(start), side='left')) if start else 0
+        hi = int(np.searchsorted(ts, to_epoch(end), side='right')) if end else len(ts)
+        return resample_ohlc(np.asarray(ts[lo:hi]), np.asarray(rates[lo:hi]), interval_seconds)
+
+
+def resample_ohlc(ts, rates, interval_seconds: int) -> list:
+    '''
+    Векторная группировка отсортированных тиков в бары фиксированной длины
+    '''
+    if len(ts) == 0:
+        return []
+    buckets = np.floor_divide(ts, interval_seconds).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.concatenate((starts[1:], [len(ts)]))
+
+    counts = ends - starts
+    opens = rates[starts]
+    closes = rates[ends - 1]
+    highs = np.maximum.reduceat(rates, starts)
+    lows = np.minimum.reduceat(rates, starts)
+    means = np.add.reduceat(rates, starts) / counts
+
+    bars = []
+    for i, bucket in enumerate(buckets[starts]):
+        bar_start = datetime.fromtimestamp(int(bucket) * interval_seconds, timezone.utc).replace(tzinfo=None)
+        bars.append({
+            "start": bar_start.isoformat(),
+            "open": float(opens[i]),
+            "high": float(highs[i]),
+            "low": float(lows[i]),
+            "close": float(closes[i]),
+            "mean": float(means[i]),
+            "ticks": int(counts[i]),
+        })
+    return bars
@@ -1,21 +1,45 @@
 # valutatrade_hub/infra/database.py
 
+import copy
 import json
 import os
-from typing import Any
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
 
+from ..core.exceptions import StorageError
+from ..metrics import metrics
 from .settings import settings
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 
 class DatabaseManager:
     '''
-    singleton для управления доступом к json-файлам
+    singleton для управления доступом к json-файлам.
+    Разобранные файлы кешируются в памяти процесса и проверяются
+    по (mtime_ns, size, inode), поэтому повторное чтение неизменённого файла бесплатно.
+    Запись атомарная (временный файл + rename), изменения из нескольких процессов
+    выполняются через transaction() под advisory-блокировкой fcntl.
     '''
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
+            cls._instance._cache = OrderedDict()
+            cls._instance._cache_bytes = 0
+            cls._instance.cache_hits = 0
+            cls._instance.cache_misses = 0
+            cls._instance._cache_lock = threading.Lock()
+            cls._instance._held_locks = threading.local()
+            cls._instance._lock_stats = {"acquired": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
         return cls._instance
 
     def _get_full_path(self, filename: str) -> str:
@@ -24,20 +48,232 @@ class DatabaseManager:
             os.makedirs(data_dir)
         return os.path.join(data_dir, filename)
 
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _cache_get(self, path: str, stamp) -> Any:
+        with self._cache_lock:
+            entry = self._cache.get(path)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._cache.move_to_end(path)
+            return entry
+
+    def _cache_put(self, path: str, stamp, data: Any):
+        with self._cache_lock:
+            self._cache_drop_unlocked(path)
+            max_bytes = int(settings.get('db_cache_max_bytes'))
+            if stamp is None or stamp[1] > max_bytes:
+                return
+            self._cache[path] = (stamp, data)
+            self._cache_bytes += stamp[1]
+            while self._cache_bytes > max_bytes and self._cache:
+                _, (old_stamp, _) = self._cache.popitem(last=False)
+                self._cache_bytes -= old_stamp[1]
+
+    def _cache_drop_unlocked(self, path: str):
+        entry = self._cache.pop(path, None)
+        if entry is not None:
+            self._cache_bytes -= entry[0][1]
+
+    def _cache_drop(self, path: str):
+        with self._cache_lock:
+            self._cache_drop_unlocked(path)
+
+    @staticmethod
+    def _default_for(filename: str) -> Any:
+        return [] if "rates" not in filename else {}
+
     def load(self, filename: str) -> Any:
+        '''
+        Чтение json-файла. Возвращаемый объект разделяется с кешем и не должен изменяться на месте:
+        для изменений — transaction() (выдаёт копию) или новый объект, записанный через save.
+        '''
         path = self._get_full_path(filename)
-        if not os.path.exists(path):
-            return [] if "rates" not in filename else {}
-        
+        stamp = self._stamp(path)
+        if stamp is None or stamp[1] == 0:
+            return self._default_for(filename)
+
+        entry = self._cache_get(path, stamp)
+        if entry is not None:
+            self.cache_hits += 1
+            return entry[1]
+        self.cache_misses += 1
+
+        started = time.perf_counter()
         with open(path, 'r', encoding='utf-8') as f:
             try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return [] if "rates" not in filename else {}
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise StorageError(f"файл {filename} повреждён: {e}")
+        label = _metric_label(filename)
+        _load_seconds.observe(time.perf_counter() - started, file=label)
+        _read_bytes.inc(stamp[1], file=label)
+        self._cache_put(path, stamp, data)
+        return data
 
     def save(self, filename: str, data: Any):
+        '''
+        Атомарная запись: данные пишутся во временный файл и заменяют старый через rename,
+        поэтому читатели видят либо старую, либо новую версию целиком.
+        '''
         path = self._get_full_path(filename)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, default=str)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        started = time.perf_counter()
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, default=str)
+                f.flush()
+                if settings.get('db_fsync'):
+                    os.fsync(f.fileno())
+                # отпечаток берётся с записанного временного файла: rename сохраняет mtime, размер и inode,
+                # а повторный stat после rename мог бы увидеть уже файл другого процесса
+                st = os.fstat(f.fileno())
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        label = _metric_label(filename)
+        _save_seconds.observe(time.perf_counter() - started, file=label)
+        _written_bytes.inc(stamp[1], file=label)
+        self._cache_put(path, stamp, data)
+
+    @contextmanager
+    def lock(self, filename: str):
+        '''
+        Эксклюзивная advisory-блокировка файла данных (fcntl.flock на <файл>.lock).
+        Читателям она не нужна: запись атомарная.
+        Повторный захват тем же потоком не блокируется.
+        '''
+        path = self._get_full_path(filename) + '.lock'
+        held = getattr(self._held_locks, 'paths', None)
+        if held is None:
+            held = self._held_locks.paths = {}
+        if path in held:
+            held[path][1] += 1
+            try:
+                yield
+            finally:
+                held[path][1] -= 1
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, 'a+')
+        try:
+            started = time.perf_counter()
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            self._record_lock_wait(time.perf_counter() - started)
+            held[path] = [f, 1]
+            try:
+                yield
+            finally:
+                del held[path]
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+    @contextmanager
+    def transaction(self, filename: str):
+        '''
+        Чтение-изменение-запись под эксклюзивной блокировкой.
+        Блок получает копию данных, поэтому кеш не видит незаписанных изменений;
+        копия и перезапись — весь файл, поэтому транзакции ведутся над небольшими файлами
+        (портфель, пользователь, снимок курсов), а не над общими коллекциями.
+        Данные сохраняются при нормальном выходе из блока; при исключении (в том числе
+        при неудачной записи) файл не меняется, а запись кеша сбрасывается.
+        '''
+        with self.lock(filename):
+            data = copy.deepcopy(self.load(filename))
+            try:
+                yield data
+                self.save(filename, data)
+            except BaseException:
+                self._cache_drop(self._get_full_path(filename))
+                raise
+
+    def _record_lock_wait(self, waited: float):
+        with self._cache_lock:
+            stats = self._lock_stats
+            stats["acquired"] += 1
+            stats["wait_total_s"] += waited
+            stats["wait_max_s"] = max(stats["wait_max_s"], waited)
+
+    def lock_stats(self) -> dict:
+        '''
+        Число захватов блокировок и время ожидания (секунды)
+        '''
+        with self._cache_lock:
+            return dict(self._lock_stats)
+
+    def path(self, filename: str) -> str:
+        '''
+        Полный путь к файлу в каталоге данных (для файлов не в формате json)
+        '''
+        return self._get_full_path(filename)
+
+    def file_stamp(self, filename: str) -> Optional[Tuple[int, int, int]]:
+        '''
+        Отпечаток файла (mtime_ns, size, inode) или None, если файла нет
+        '''
+        return self._stamp(self._get_full_path(filename))
+
+    def cache_stats(self) -> dict:
+        '''
+        Счётчики попаданий/промахов кеша
+        '''
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "entries": len(self._cache),
+            "bytes": self._cache_bytes,
+        }
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def metrics_samples(self) -> list:
+        '''
+        Статистика кеша и блокировок для экспорта метрик
+        '''
+        cache = self.cache_stats()
+        locks = self.lock_stats()
+        return [
+            ("valutatrade_db_cache_hits_total", "counter", "DatabaseManager cache hits", cache["hits"]),
+            ("valutatrade_db_cache_misses_total", "counter", "DatabaseManager cache misses", cache["misses"]),
+            ("valutatrade_db_cache_entries", "gauge", "Files held in the DatabaseManager cache", cache["entries"]),
+            ("valutatrade_db_cache_bytes", "gauge", "Bytes held in the DatabaseManager cache", cache["bytes"]),
+            ("valutatrade_db_locks_acquired_total", "counter", "File locks acquired", locks["acquired"]),
+            ("valutatrade_db_lock_wait_seconds_total", "counter", "Time spent waiting for file locks", locks["wait_total_s"]),
+            ("valutatrade_db_lock_wait_max_seconds", "gauge", "Longest wait for a file lock", locks["wait_max_s"]),
+        ]
+
+
+_DIGITS = re.compile(r'\d+')
+
+
+def _metric_label(filename: str) -> str:
+    # portfolios/17.json -> portfolios/N.json: число меток не растёт с числом пользователей
+    return _DIGITS.sub('N', filename)
+
+
+_load_seconds = metrics.histogram('valutatrade_db_load_seconds', 'Time to read and parse a json file (cache misses)')
+_save_seconds = metrics.histogram('valutatrade_db_save_seconds', 'Time to serialize and atomically replace a json file')
+_read_bytes = metrics.counter('valutatrade_db_read_bytes_total', 'Bytes parsed by DatabaseManager.load')
+_written_bytes = metrics.counter('valutatrade_db_written_bytes_total', 'Bytes written by DatabaseManager.save')
 
-db_manager = DatabaseManager()
\ No newline at end of file
+db_manager = DatabaseManager()
+metrics.register_collector(db_manager.metrics_samples)
@@ -0,0 +1,307 @@
+# valutatrade_hub/infra/history_store.py
+
+import bisect
+import json
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from .database import db_manager
+from .settings import settings
+
+_POINT = struct.Struct('<dd')
+
+
+def to_epoch(value) -> float:
+    '''
+    ISO-строка или datetime -> секунды epoch; время без часового пояса считается UTC
+    '''
+    dt = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def from_epoch(value: float) -> str:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class RateTimeIndex:
+    '''
+    Индекс времени по парам: history/index/<PAIR>.tidx — отсортированные по времени
+    записи (timestamp, rate) фиксированной длины. Поиск курса на момент времени —
+    бинарный поиск по файлу, O(log n) чтений.
+    '''
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.index_dir)
+
+    def _path(self, pair: str) -> str:
+        return os.path.join(self.index_dir, f"{pair}.tidx")
+
+    def add(self, points: dict):
+        '''
+        points: {pair: [(epoch, rate), ...]}
+        '''
+        os.makedirs(self.index_dir, exist_ok=True)
+        for pair, items in points.items():
+            items.sort()
+            path = self._path(pair)
+            with open(path, 'a+b') as f:
+                size = f.seek(0, os.SEEK_END)
+                last_ts = None
+                if size >= _POINT.size:
+                    f.seek(size - _POINT.size)
+                    last_ts = _POINT.unpack(f.read(_POINT.size))[0]
+                if last_ts is None or items[0][0] >= last_ts:
+                    f.seek(0, os.SEEK_END)
+                    f.write(b''.join(_POINT.pack(ts, rate) for ts, rate in items))
+                    continue
+                f.seek(0)
+                raw = f.read(size - size % _POINT.size)
+            merged = sorted(list(_POINT.iter_unpack(raw)) + items)
+            with open(path, 'wb') as f:
+                f.write(b''.join(_POINT.pack(ts, rate) for ts, rate in merged))
+
+    def lookup(self, pair: str, at: float) -> Optional[Tuple[float, float]]:
+        '''
+        Последняя точка (timestamp, rate) с timestamp <= at или None
+        '''
+        try:
+            f = open(self._path(pair), 'rb')
+        except FileNotFoundError:
+            return None
+        with f:
+            count = f.seek(0, os.SEEK_END) // _POINT.size
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * _POINT.size)
+                ts, _ = _POINT.unpack(f.read(_POINT.size))
+                if ts <= at:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == 0:
+                return None
+            f.seek((lo - 1) * _POINT.size)
+            return _POINT.unpack(f.read(_POINT.size))
+
+
+class HistoryStore:
+    '''
+    История курсов в виде append-only сегментов history/rates-<YYYYMMDD>-<NNNN>.jsonl.
+    Новый сегмент начинается с новым днём (по timestamp записи) или при превышении размера.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.history_dir = settings.get('history_dir', 'history')
+        self.max_segment_bytes = int(settings.get('history_segment_max_bytes'))
+        self.legacy_file = settings.get('history_file', 'exchange_rates.json')
+        self.time_index = RateTimeIndex(os.path.join(self.db.path(self.history_dir), 'index'))
+        # (отпечаток exchange_rates.json, {pair: [(epoch, rate), ...]}) для поиска по не перенесённому файлу
+        self._legacy_points = None
+
+    def _dir_path(self) -> str:
+        path = self.db.path(self.history_dir)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def segments(self) -> List[str]:
+        '''
+        Полные пути сегментов в хронологическом порядке
+        '''
+        path = self._dir_path()
+        names = sorted(n for n in os.listdir(path) if n.startswith('rates-') and n.endswith('.jsonl'))
+        return [os.path.join(path, n) for n in names]
+
+    def _segment_for(self, day: str) -> str:
+        prefix = f"rates-{day}-"
+        existing = [p for p in self.segments() if os.path.basename(p).startswith(prefix)]
+        if existing:
+            last = existing[-1]
+            if os.path.getsize(last) < self.max_segment_bytes:
+                return last
+            seq = int(os.path.basename(last)[len(prefix):-len('.jsonl')]) + 1
+        else:
+            seq = 1
+        return os.path.join(self._dir_path(), f"{prefix}{seq:04d}.jsonl")
+
+    def append(self, records: list):
+        '''
+        Дописывание записей в конец текущих сегментов (стоимость зависит только от числа новых записей)
+        '''
+        by_day = {}
+        points = {}
+        for record in records:
+            day = str(record['timestamp'])[:10].replace('-', '')
+            by_day.setdefault(day, []).append(json.dumps(record, ensure_ascii=False) + "\n")
+            pair = f"{record['from_currency']}_{record['to_currency']}"
+            points.setdefault(pair, []).append((to_epoch(record['timestamp']), float(record['rate'])))
+
+        with self.db.lock(os.path.join(self.history_dir, 'segments')):
+            index_is_current = self.time_index.exists() or not self.segments()
+            for day, lines in by_day.items():
+                with open(self._segment_for(day), 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                    f.flush()
+                    if settings.get('db_fsync'):
+                        os.fsync(f.fileno())
+            if index_is_current:
+                self.time_index.add(points)
+
+    def rebuild_time_index(self):
+        '''
+        Построение индекса времени по всем сегментам
+        '''
+        points = {}
+        for record in self.iter_records():
+            pair = f"{record['from_currency']}_{record['to_currency']}"
+            points.setdefault(pair, []).append((to_epoch(record['timestamp']), float(record['rate'])))
+        tmp_dir = self.time_index.index_dir + '.tmp'
+        self._remove_dir(tmp_dir)
+        RateTimeIndex(tmp_dir).add(points)
+        self._remove_dir(self.time_index.index_dir)
+        os.replace(tmp_dir, self.time_index.index_dir)
+
+    @staticmethod
+    def _remove_dir(path: str):
+        if not os.path.isdir(path):
+            return
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+
+    def rate_at(self, pair: str, at) -> Optional[Tuple[float, str]]:
+        '''
+        Курс пары, действовавший на момент at: (rate, timestamp) или None.
+        Не перенесённый exchange_rates.json просматривается без изменения (перенос — только convert_legacy).
+        '''
+        if not self.time_index.exists():
+            with self.db.lock(os.path.join(self.history_dir, 'segments')):
+                if not self.time_index.exists():
+                    self.rebuild_time_index()
+        at = to_epoch(at)
+        point = self.time_index.lookup(pair, at)
+        legacy = self._legacy_lookup(pair, at)
+        if legacy is not None and (point is None or legacy[0] > point[0]):
+            point = legacy
+        if point is None:
+            return None
+        return point[1], from_epoch(point[0])
+
+    def _legacy_lookup(self, pair: str, at: float) -> Optional[Tuple[float, float]]:
+        '''
+        Последняя точка (timestamp, rate) пары в exchange_rates.json с timestamp <= at или None.
+        Точки по парам строятся один раз на отпечаток файла.
+        '''
+        stamp = self.db.file_stamp(self.legacy_file)
+        if stamp is None:
+            return None
+        cached = self._legacy_points
+        if cached is None or cached[0] != stamp:
+            history = self.db.load(self.legacy_file)
+            points = {}
+            for record in history if isinstance(history, list) else []:
+                key = f"{record['from_currency']}_{record['to_currency']}"
+                points.setdefault(key, []).append((to_epoch(record['timestamp']), float(record['rate'])))
+            for items in points.values():
+                items.sort()
+            cached = self._legacy_points = (stamp, points)
+        items = cached[1].get(pair)
+        if not items:
+            return None
+        pos = bisect.bisect_right(items, (at, float('inf')))
+        return items[pos - 1] if pos else None
+
+    @staticmethod
+    def _complete_size(path: str) -> int:
+        '''
+        Размер сегмента до конца последней полной строки (недописанная строка не учитывается)
+        '''
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            while size:
+                chunk = min(size, 65536)
+                f.seek(size - chunk)
+                newline = f.read(chunk).rfind(b"\n")
+                if newline >= 0:
+                    return size - chunk + newline + 1
+                size -= chunk
+        return 0
+
+    def tail(self) -> dict:
+        '''
+        Отметка текущего конца истории: размеры сегментов и отпечаток устаревшего файла
+        '''
+        stamp = self.db.file_stamp(self.legacy_file)
+        return {
+            "segments": {os.path.basename(p): self._complete_size(p) for p in self.segments()},
+            "legacy": list(stamp) if stamp else None,
+        }
+
+    def iter_between(self, start: Optional[dict], end: dict) -> Optional[Iterator[dict]]:
+        '''
+        Записи, дописанные между отметками start (None — с начала, включая устаревший файл) и end.
+        None, если история изменилась не дописыванием (перенос exchange_rates.json, пропавший сегмент).
+        '''
+        if start is not None:
+            if start.get("legacy") != end["legacy"]:
+                return None
+            for name, size in start.get("segments", {}).items():
+                if end["segments"].get(name, -1) < size:
+                    return None
+        return self._iter_between(start, end)
+
+    def _iter_between(self, start: Optional[dict], end: dict) -> Iterator[dict]:
+        if start is None and end["legacy"]:
+            history = self.db.load(self.legacy_file)
+            if isinstance(history, list):
+                yield from history
+        done = start["segments"] if start else {}
+        path = self._dir_path()
+        for name in sorted(end["segments"]):
+            offset, remaining = done.get(name, 0), end["segments"][name] - done.get(name, 0)
+            if remaining <= 0:
+                continue
+            with open(os.path.join(path, name), 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if remaining <= 0:
+                        break
+                    remaining -= len(line)
+                    yield json.loads(line)
+
+    def iter_records(self) -> Iterator[dict]:
+        '''
+        Потоковое чтение всех записей; недописанная последняя строка пропускается
+        '''
+        for path in self.segments():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+
+    def convert_legacy(self) -> int:
+        '''
+        Однократный перенос exchange_rates.json (json-массив) в сегменты.
+        Исходный файл переименовывается в exchange_rates.json.converted.
+        '''
+        if not self.db.file_stamp(self.legacy_file):
+            return 0
+        with self.db.lock(self.legacy_file):
+            # файл мог перенести параллельный процесс, пока ожидалась блокировка
+            if not self.db.file_stamp(self.legacy_file):
+                return 0
+            history = self.db.load(self.legacy_file)
+            if not isinstance(history, list):
+                history = []
+            self.append(history)
+            legacy_path = self.db.path(self.legacy_file)
+            os.replace(legacy_path, legacy_path + '.converted')
+        return len(history)
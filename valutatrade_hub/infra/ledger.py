@@ -0,0 +1,202 @@
+# valutatrade_hub/infra/ledger.py
+
+import json
+import os
+import struct
+from datetime import datetime
+from typing import List, Optional
+
+from .database import db_manager
+from .settings import settings
+
+_OFFSET = struct.Struct('<Q')
+
+
+def _comparable(value: datetime) -> datetime:
+    # ts в журнале — локальное время без пояса; время с поясом приводится к локальному
+    return value.astimezone()
+
+
+class TradeLedger:
+    '''
+    Журнал сделок: append-only файл trades.jsonl (одна сделка на строку)
+    и индекс trades_index/<user_id>.idx со смещениями строк пользователя.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.journal_file = settings.get('trades_file', 'trades.jsonl')
+        self.index_dir = settings.get('trades_index_dir', 'trades_index')
+
+    def _journal_path(self) -> str:
+        return self.db.path(self.journal_file)
+
+    def _index_dir_path(self, name: str) -> str:
+        path = self.db.path(os.path.join(self.index_dir, name))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _index_path(self, user_id: int) -> str:
+        return self._index_dir_path(f"{int(user_id)}.idx")
+
+    def _meta_path(self) -> str:
+        return self._index_dir_path('indexed_bytes')
+
+    @staticmethod
+    def _sync(f):
+        f.flush()
+        if settings.get('ledger_fsync'):
+            os.fsync(f.fileno())
+
+    def _read_indexed_bytes(self) -> Optional[int]:
+        try:
+            with open(self._meta_path(), 'r', encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_indexed_bytes(self, value: int):
+        tmp_path = self._meta_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(value))
+        os.replace(tmp_path, self._meta_path())
+
+    def _drop_index(self):
+        index_dir = os.path.dirname(self._meta_path())
+        for name in os.listdir(index_dir):
+            if name.endswith('.idx'):
+                os.remove(os.path.join(index_dir, name))
+
+    def _index_entry(self, user_id: int, offset: int):
+        with open(self._index_path(user_id), 'ab') as f:
+            f.write(_OFFSET.pack(offset))
+            self._sync(f)
+
+    def _last_offset(self, user_id: int) -> Optional[int]:
+        try:
+            with open(self._index_path(user_id), 'rb') as f:
+                if f.seek(0, os.SEEK_END) < _OFFSET.size:
+                    return None
+                f.seek(-_OFFSET.size, os.SEEK_END)
+                return _OFFSET.unpack(f.read(_OFFSET.size))[0]
+        except FileNotFoundError:
+            return None
+
+    def _catch_up(self):
+        '''
+        Доиндексация хвоста журнала, записанного без индекса (например, после сбоя)
+        '''
+        journal = self._journal_path()
+        if not os.path.exists(journal):
+            return
+        indexed = self._read_indexed_bytes()
+        if indexed is None:
+            self._drop_index()
+            indexed = 0
+        size = os.path.getsize(journal)
+        if indexed >= size:
+            return
+
+        with open(journal, 'rb') as f:
+            f.seek(indexed)
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                user_id = json.loads(line)['user_id']
+                if self._last_offset(user_id) != offset:
+                    self._index_entry(user_id, offset)
+                indexed = f.tell()
+        self._write_indexed_bytes(indexed)
+
+    @staticmethod
+    def _record(user_id: int, side: str, pair: str, amount: float, rate: float, total: float) -> dict:
+        return {
+            "ts": datetime.now().isoformat(),
+            "user_id": user_id,
+            "side": side,
+            "pair": pair,
+            "amount": amount,
+            "rate": rate,
+            "total": total,
+        }
+
+    def append(self, user_id: int, side: str, pair: str, amount: float, rate: float, total: float) -> dict:
+        '''
+        Запись исполненной сделки в журнал и индекс пользователя
+        '''
+        record = self._record(user_id, side, pair, amount, rate, total)
+        self._write([record])
+        return record
+
+    def append_many(self, trades: list) -> List[dict]:
+        '''
+        Запись пачки сделок одной операцией: trades — кортежи (user_id, side, pair, amount, rate, total)
+        '''
+        records = [self._record(*trade) for trade in trades]
+        if records:
+            self._write(records)
+        return records
+
+    def _write(self, records: List[dict]):
+        lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode('utf-8') for r in records]
+
+        with self.db.lock(self.journal_file):
+            self._catch_up()
+            with open(self._journal_path(), 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(b''.join(lines))
+                self._sync(f)
+            offsets = {}
+            for record, line in zip(records, lines):
+                offsets.setdefault(record["user_id"], []).append(offset)
+                offset += len(line)
+            for user_id, user_offsets in offsets.items():
+                with open(self._index_path(user_id), 'ab') as f:
+                    f.write(b''.join(_OFFSET.pack(o) for o in user_offsets))
+                    self._sync(f)
+            self._write_indexed_bytes(offset)
+
+    def _offsets(self, user_id: int) -> List[int]:
+        try:
+            with open(self._index_path(user_id), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return []
+        usable = len(raw) - len(raw) % _OFFSET.size
+        return [o for (o,) in _OFFSET.iter_unpack(raw[:usable])]
+
+    @staticmethod
+    def _read_at(f, offset: int) -> dict:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def get_trades(self, user_id: int, limit: Optional[int] = None, since: Optional[datetime] = None) -> List[dict]:
+        '''
+        Сделки пользователя в хронологическом порядке.
+        since ищется бинарным поиском по смещениям (время без пояса — локальное),
+        limit оставляет последние N записей (0 — ни одной).
+        '''
+        if limit is not None and limit < 0:
+            raise ValueError("limit не может быть отрицательным")
+        with self.db.lock(self.journal_file):
+            self._catch_up()
+        offsets = self._offsets(user_id)
+        if not offsets:
+            return []
+
+        with open(self._journal_path(), 'rb') as f:
+            if since is not None:
+                since = _comparable(since)
+                lo, hi = 0, len(offsets)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if _comparable(datetime.fromisoformat(self._read_at(f, offsets[mid])['ts'])) < since:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                offsets = offsets[lo:]
+            if limit is not None:
+                offsets = offsets[len(offsets) - min(limit, len(offsets)):]
+            return [self._read_at(f, o) for o in offsets]
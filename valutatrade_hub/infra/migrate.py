@@ -0,0 +1,79 @@
+# valutatrade_hub/infra/migrate.py
+
+import argparse
+
+from .storage_backend import StorageBackend, create_backend
+
+_BATCH_SIZE = 1000
+
+
+def migrate(source: StorageBackend, target: StorageBackend) -> dict:
+    '''
+    Копирование всех данных из одного хранилища в другое (offline, без работающего CLI).
+    История переносится только в хранилище с пустой историей.
+    '''
+    counts = {"users": 0, "portfolios": 0, "rates": 0, "history": 0}
+
+    # пользователи пишутся пачками: поштучное добавление в json-хранилище обновляет счётчик id на каждом
+    batch = []
+    for user in source.iter_users():
+        if target.get_user_by_username(user['username']) is None:
+            batch.append(user)
+        if len(batch) >= _BATCH_SIZE:
+            counts["users"] += target.add_users(batch)
+            batch = []
+    if batch:
+        counts["users"] += target.add_users(batch)
+
+    for portfolio in source.iter_portfolios():
+        target.save_portfolio(portfolio)
+        counts["portfolios"] += 1
+
+    rates = source.load_rates()
+    if rates["pairs"]:
+        target.update_rates(rates["pairs"], rates.get("last_refresh"))
+        counts["rates"] = len(rates["pairs"])
+
+    if next(target.iter_history(), None) is not None:
+        return counts
+
+    batch = []
+    for record in source.iter_history():
+        batch.append(record)
+        if len(batch) >= _BATCH_SIZE:
+            target.append_history(batch)
+            counts["history"] += len(batch)
+            batch = []
+    if batch:
+        target.append_history(batch)
+        counts["history"] += len(batch)
+
+    return counts
+
+
+def main():
+    '''Перенос данных между хранилищами: valutatrade-migrate --from json --to sqlite'''
+    parser = argparse.ArgumentParser(description="Перенос данных ValutaTrade Hub между хранилищами")
+    parser.add_argument("--from", dest="source", choices=["json", "sqlite"], required=True)
+    parser.add_argument("--to", dest="target", choices=["json", "sqlite"], required=True)
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("Источник и приёмник должны различаться")
+
+    source = create_backend(args.source)
+    target = create_backend(args.target)
+    try:
+        counts = migrate(source, target)
+    finally:
+        source.close()
+        target.close()
+
+    print(
+        f"Перенесено: пользователей {counts['users']}, портфелей {counts['portfolios']}, "
+        f"курсов {counts['rates']}, записей истории {counts['history']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# valutatrade_hub/infra/portfolio_store.py
+
+import copy
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .database import db_manager
+from .settings import settings
+
+
+class PortfolioStore:
+    '''
+    Хранилище портфелей: один json-файл на пользователя (portfolios/<user_id>.json).
+    Общий portfolios.json читается только для ещё не перенесённых пользователей.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.portfolios_dir = settings.get('portfolios_dir', 'portfolios')
+        self.legacy_file = settings.get('portfolio_file', 'portfolios.json')
+
+    def _filename(self, user_id: int) -> str:
+        return os.path.join(self.portfolios_dir, f"{int(user_id)}.json")
+
+    def load(self, user_id: int) -> Optional[dict]:
+        '''
+        Данные портфеля пользователя или None
+        '''
+        filename = self._filename(user_id)
+        if self.db.file_stamp(filename):
+            return self.db.load(filename)
+
+        legacy = self.db.load(self.legacy_file)
+        return next((p for p in legacy if p['user_id'] == user_id), None)
+
+    def save(self, portfolio_data: dict):
+        '''
+        Перезапись файла одного пользователя
+        '''
+        self.db.save(self._filename(portfolio_data['user_id']), portfolio_data)
+
+    @contextmanager
+    def transaction(self, user_id: int):
+        '''
+        Изменение портфеля под блокировкой файла пользователя
+        '''
+        filename = self._filename(user_id)
+        with self.db.lock(filename):
+            if self.db.file_stamp(filename):
+                with self.db.transaction(filename) as data:
+                    yield data
+                return
+
+            data = copy.deepcopy(self.load(user_id)) or {"user_id": user_id, "wallets": {}}
+            yield data
+            self.save(data)
+
+    def iter_all(self) -> Iterator[dict]:
+        '''
+        Все портфели: файлы пользователей и ещё не перенесённые записи portfolios.json
+        '''
+        seen = set()
+        portfolios_path = self.db.path(self.portfolios_dir)
+        if os.path.isdir(portfolios_path):
+            for name in os.listdir(portfolios_path):
+                if name.endswith('.json'):
+                    data = self.db.load(os.path.join(self.portfolios_dir, name))
+                    seen.add(data['user_id'])
+                    yield data
+
+        for p in self.db.load(self.legacy_file):
+            if p['user_id'] not in seen:
+                yield p
+
+    def migrate_legacy(self) -> int:
+        '''
+        Перенос портфелей из общего portfolios.json в отдельные файлы.
+        Уже существующие файлы пользователей не перезаписываются.
+        '''
+        migrated = 0
+        for p in self.db.load(self.legacy_file):
+            if self.db.file_stamp(self._filename(p['user_id'])):
+                continue
+            self.save(p)
+            migrated += 1
+        return migrated
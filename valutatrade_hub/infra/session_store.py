@@ -0,0 +1,69 @@
+# valutatrade_hub/infra/session_store.py
+
+import hashlib
+import secrets
+import time
+from typing import Optional
+
+from .database import db_manager
+from .settings import settings
+
+
+def _token_key(token: str) -> str:
+    # в файле хранится только хэш токена
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    '''
+    Токены сессий: sessions.json {sha256(токен): {"user_id", "username", "registration_date", "expires_at"}}.
+    Проверка токена — поиск в словаре без повторного вычисления KDF и чтения users.json.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.sessions_file = settings.get('sessions_file', 'sessions.json')
+
+    def _load(self) -> dict:
+        sessions = self.db.load(self.sessions_file)
+        return sessions if isinstance(sessions, dict) else {}
+
+    def issue(self, user_info: dict, ttl_seconds: Optional[int] = None) -> str:
+        '''
+        Новый токен для пользователя; просроченные записи удаляются
+        '''
+        ttl = ttl_seconds if ttl_seconds is not None else int(settings.get('session_ttl_seconds', 3600))
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        with self.db.lock(self.sessions_file):
+            sessions = {k: v for k, v in self._load().items() if v['expires_at'] > now}
+            sessions[_token_key(token)] = {**user_info, "expires_at": now + ttl}
+            self.db.save(self.sessions_file, sessions)
+        return token
+
+    def validate(self, token: str) -> Optional[dict]:
+        '''
+        Данные пользователя по действующему токену или None
+        '''
+        entry = self._load().get(_token_key(token))
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+        return entry
+
+    def revoke_user(self, user_id: int) -> int:
+        '''
+        Отзыв всех сессий пользователя (например, после смены хэша пароля); возвращает число отозванных
+        '''
+        with self.db.lock(self.sessions_file):
+            sessions = self._load()
+            kept = {k: v for k, v in sessions.items() if v['user_id'] != user_id}
+            if len(kept) != len(sessions):
+                self.db.save(self.sessions_file, kept)
+        return len(sessions) - len(kept)
+
+    def revoke(self, token: str):
+        with self.db.lock(self.sessions_file):
+            sessions = self._load()
+            key = _token_key(token)
+            if key in sessions:
+                self.db.save(self.sessions_file, {k: v for k, v in sessions.items() if k != key})
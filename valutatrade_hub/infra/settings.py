@@ -33,11 +33,35 @@ class SettingsLoader:
         default_settings = {
             'data_directory': 'data',
             'rates_ttl_seconds': 300,
+            'rates_max_age_seconds': 3600,
             'default_base_currency': 'USD',
             'log_level': 'INFO',
             'log_file': 'logs/valutatrade.log',
+            'log_format': 'text',
             'supported_currencies': ['USD', 'EUR', 'GBP', 'RUB', 'BTC', 'ETH', 'SOL'],
-            'api_timeout': 10
+            'api_timeout': 10,
+            'db_cache_max_bytes': 64 * 1024 * 1024,
+            'db_fsync': False,
+            'ledger_fsync': False,
+            'history_segment_max_bytes': 8 * 1024 * 1024,
+            'storage_backend': 'json',
+            'sqlite_file': 'valutatrade.db',
+            'nav_revalue_on_update': True,
+            # не чаще одной переоценки портфелей за столько секунд (обновления курсов идут каждые 10 с)
+            'nav_revalue_min_interval_seconds': 60,
+            'http_cache_enabled': True,
+            'password_kdf': 'scrypt',
+            'scrypt_n': 2 ** 14,
+            'scrypt_r': 8,
+            'scrypt_p': 1,
+            'pbkdf2_iterations': 600_000,
+            'session_ttl_seconds': 3600,
+            # файл метрик в формате Prometheus (пусто — не записывать)
+            'metrics_file': '',
+            # cProfile каждой команды CLI: дампы pstats в profile_dir, вывод top-N по cumulative
+            'profile': False,
+            'profile_dir': 'profiles',
+            'profile_top_n': 20,
         }
         
         self._settings.update(default_settings)
@@ -56,15 +80,23 @@ class SettingsLoader:
         env_mapping = {
             'VALUTATRADE_DATA_DIR': 'data_directory',
             'VALUTATRADE_RATES_TTL': 'rates_ttl_seconds',
+            'VALUTATRADE_RATES_MAX_AGE': 'rates_max_age_seconds',
             'VALUTATRADE_LOG_LEVEL': 'log_level',
+            'VALUTATRADE_LOG_FORMAT': 'log_format',
+            'VALUTATRADE_METRICS_FILE': 'metrics_file',
+            'VALUTATRADE_PROFILE': 'profile',
+            'VALUTATRADE_PROFILE_DIR': 'profile_dir',
             'VALUTATRADE_BASE_CURRENCY': 'default_base_currency',
+            'VALUTATRADE_STORAGE_BACKEND': 'storage_backend',
         }
         
         for env_var, setting_key in env_mapping.items():
             value = os.getenv(env_var)
             if value:
-                if setting_key == 'rates_ttl_seconds':
+                if setting_key in ('rates_ttl_seconds', 'rates_max_age_seconds'):
                     self._settings[setting_key] = int(value)
+                elif setting_key == 'profile':
+                    self._settings[setting_key] = value.lower() in ('1', 'true', 'yes', 'on')
                 else:
                     self._settings[setting_key] = value
     
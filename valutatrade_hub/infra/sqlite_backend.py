@@ -0,0 +1,282 @@
+# valutatrade_hub/infra/sqlite_backend.py
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .database import db_manager
+from .history_store import from_epoch, to_epoch
+from .settings import settings
+from .storage_backend import StorageBackend
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    hashed_password TEXT,
+    salt TEXT,
+    registration_date TEXT
+);
+CREATE TABLE IF NOT EXISTS wallets (
+    user_id INTEGER NOT NULL,
+    currency_code TEXT NOT NULL,
+    balance REAL NOT NULL,
+    PRIMARY KEY (user_id, currency_code)
+);
+CREATE TABLE IF NOT EXISTS rates (
+    pair TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    updated_at TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT,
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    rate REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS nav (
+    user_id INTEGER PRIMARY KEY,
+    nav REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_pair_ts ON history (from_currency, to_currency, timestamp);
+'''
+
+def _to_utc_iso(value) -> str:
+    return from_epoch(to_epoch(value))
+
+
+_USER_COLUMNS = ("user_id", "username", "hashed_password", "salt", "registration_date")
+_HISTORY_COLUMNS = ("id", "from_currency", "to_currency", "rate", "timestamp", "source")
+
+
+class SqliteStorageBackend(StorageBackend):
+    '''
+    Хранилище на sqlite3 (WAL): индексированные таблицы users/wallets/rates/history/nav.
+    Соединение открывается отдельно для каждого потока.
+    '''
+
+    def __init__(self, path: str = None):
+        self.path = path or db_manager.path(settings.get('sqlite_file', 'valutatrade.db'))
+        self._local = threading.local()
+        # (last_refresh, разобранная матрица): json матрицы разбирается только после обновления курсов
+        self._matrix_cache = None
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _immediate(self):
+        '''
+        Транзакция BEGIN IMMEDIATE: блокировка на запись берётся сразу
+        '''
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _user(self, where: str, value):
+        row = self._conn().execute(f"SELECT * FROM users WHERE {where} = ?", (value,)).fetchone()
+        return dict(row) if row else None
+
+    def get_user_by_username(self, username):
+        return self._user("username", username)
+
+    def get_user_by_id(self, user_id):
+        return self._user("user_id", user_id)
+
+    def next_user_id(self):
+        row = self._conn().execute("SELECT COALESCE(MAX(user_id), 0) + 1 FROM users").fetchone()
+        return row[0]
+
+    def add_user(self, user_data):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                tuple(user_data[c] for c in _USER_COLUMNS),
+            )
+
+    def add_users(self, users):
+        rows = [tuple(user_data[c] for c in _USER_COLUMNS) for user_data in users]
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def create_user(self, username, make_user):
+        with self._immediate() as conn:
+            if conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+                return None
+            new_id = conn.execute("SELECT COALESCE(MAX(user_id), 0) + 1 FROM users").fetchone()[0]
+            user_data = make_user(new_id)
+            conn.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)", tuple(user_data[c] for c in _USER_COLUMNS))
+            return user_data
+
+    def update_user(self, user_data):
+        with self._immediate() as conn:
+            cursor = conn.execute(
+                "UPDATE users SET username = ?, hashed_password = ?, salt = ?, registration_date = ? WHERE user_id = ?",
+                tuple(user_data[c] for c in _USER_COLUMNS[1:]) + (user_data['user_id'],),
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"Пользователь {user_data['user_id']} не найден")
+
+    def iter_users(self):
+        for row in self._conn().execute("SELECT * FROM users ORDER BY user_id"):
+            yield dict(row)
+
+    @staticmethod
+    def _read_portfolio(conn, user_id):
+        rows = conn.execute(
+            "SELECT currency_code, balance FROM wallets WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        return {
+            "user_id": user_id,
+            "wallets": {r["currency_code"]: {"currency_code": r["currency_code"], "balance": r["balance"]} for r in rows},
+        }
+
+    @staticmethod
+    def _write_portfolio(conn, portfolio_data):
+        user_id = portfolio_data['user_id']
+        conn.execute("DELETE FROM wallets WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            "INSERT INTO wallets VALUES (?, ?, ?)",
+            [(user_id, w['currency_code'], w['balance']) for w in portfolio_data['wallets'].values()],
+        )
+
+    def get_portfolio(self, user_id):
+        return self._read_portfolio(self._conn(), user_id)
+
+    def save_portfolio(self, portfolio_data):
+        with self._immediate() as conn:
+            self._write_portfolio(conn, portfolio_data)
+
+    @contextmanager
+    def portfolio_transaction(self, user_id):
+        with self._immediate() as conn:
+            data = self._read_portfolio(conn, user_id) or {"user_id": user_id, "wallets": {}}
+            yield data
+            self._write_portfolio(conn, data)
+
+    def iter_portfolios(self):
+        current = None
+        for row in self._conn().execute("SELECT * FROM wallets ORDER BY user_id"):
+            if current is None or current["user_id"] != row["user_id"]:
+                if current is not None:
+                    yield current
+                current = {"user_id": row["user_id"], "wallets": {}}
+            current["wallets"][row["currency_code"]] = {"currency_code": row["currency_code"], "balance": row["balance"]}
+        if current is not None:
+            yield current
+
+    def load_rates(self):
+        conn = self._conn()
+        pairs = {
+            r["pair"]: {"rate": r["rate"], "updated_at": r["updated_at"], "source": r["source"]}
+            for r in conn.execute("SELECT * FROM rates")
+        }
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('last_refresh', 'matrix')").fetchall())
+        last_refresh = meta.get('last_refresh')
+        cached = self._matrix_cache
+        if cached is not None and last_refresh is not None and cached[0] == last_refresh:
+            matrix = cached[1]
+        else:
+            matrix = json.loads(meta['matrix']) if meta.get('matrix') else None
+            self._matrix_cache = (last_refresh, matrix)
+        return {"pairs": pairs, "last_refresh": last_refresh, "matrix": matrix}
+
+    def update_rates(self, new_pairs, last_refresh, build_matrix=None):
+        with self._immediate() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rates VALUES (?, ?, ?, ?)",
+                [(pair, info['rate'], info.get('updated_at'), info.get('source')) for pair, info in new_pairs.items()],
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_refresh', ?)", (last_refresh,))
+            matrix = None
+            if build_matrix:
+                all_pairs = {r["pair"]: {"rate": r["rate"], "updated_at": r["updated_at"]}
+                             for r in conn.execute("SELECT * FROM rates")}
+                matrix = json.dumps(build_matrix(all_pairs))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('matrix', ?)", (matrix,))
+
+    def append_history(self, records):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO history ({', '.join(_HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(r.get(c) for c in _HISTORY_COLUMNS) for r in records],
+            )
+
+    def iter_history(self):
+        cursor = self._conn().execute(f"SELECT {', '.join(_HISTORY_COLUMNS)} FROM history ORDER BY seq")
+        for row in cursor:
+            yield dict(row)
+
+    def history_tail(self):
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM history").fetchone()[0]
+
+    def iter_history_between(self, start, end):
+        start = start or 0
+        if not isinstance(start, int) or start > end:
+            return None
+        cursor = self._conn().execute(
+            f"SELECT {', '.join(_HISTORY_COLUMNS)} FROM history WHERE seq > ? AND seq <= ? ORDER BY seq", (start, end),
+        )
+        return (dict(row) for row in cursor)
+
+    def rate_at(self, pair, at):
+        from_curr, to_curr = pair.split('_')
+        row = self._conn().execute(
+            "SELECT rate, timestamp FROM history WHERE from_currency = ? AND to_currency = ? AND timestamp <= ? "
+            "ORDER BY timestamp DESC LIMIT 1",
+            (from_curr, to_curr, _to_utc_iso(at)),
+        ).fetchone()
+        return (row["rate"], row["timestamp"]) if row else None
+
+    def save_nav_snapshot(self, snapshot):
+        header = {k: v for k, v in snapshot.items() if k != "navs"}
+        with self._immediate() as conn:
+            conn.execute("DELETE FROM nav")
+            conn.executemany(
+                "INSERT INTO nav VALUES (?, ?)",
+                [(int(uid), nav) for uid, nav in snapshot["navs"].items()],
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('nav', ?)", (json.dumps(header),))
+
+    def load_nav_snapshot(self):
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'nav'").fetchone()
+        if not row:
+            return None
+        snapshot = json.loads(row["value"])
+        snapshot["navs"] = {str(r["user_id"]): r["nav"] for r in conn.execute("SELECT * FROM nav ORDER BY user_id")}
+        return snapshot
@@ -0,0 +1,287 @@
+# valutatrade_hub/infra/storage_backend.py
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from .database import db_manager
+from .history_store import HistoryStore
+from .portfolio_store import PortfolioStore
+from .settings import settings
+from .user_store import UserStore
+
+
+class StorageBackend(ABC):
+    '''
+    Интерфейс хранилища: пользователи, портфели, текущие курсы и история курсов.
+    Все данные передаются в виде словарей того же формата, что и в json-файлах.
+    '''
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def get_user_by_id(self, user_id: int) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def next_user_id(self) -> int:
+        pass
+
+    @abstractmethod
+    def add_user(self, user_data: dict):
+        pass
+
+    @abstractmethod
+    def add_users(self, users: Iterable[dict]) -> int:
+        '''
+        Добавление пачки пользователей с готовыми id одной операцией (миграция, генерация данных).
+        Имена не проверяются. Возвращает число добавленных.
+        '''
+        pass
+
+    @abstractmethod
+    def create_user(self, username: str, make_user: Callable[[int], dict]) -> Optional[dict]:
+        '''
+        Атомарная регистрация: проверка имени, выдача id и запись make_user(id).
+        Возвращает None, если имя уже занято.
+        '''
+        pass
+
+    @abstractmethod
+    def update_user(self, user_data: dict):
+        '''
+        Перезапись существующего пользователя (например, после обновления хэша пароля)
+        '''
+        pass
+
+    @abstractmethod
+    def iter_users(self) -> Iterator[dict]:
+        pass
+
+    @abstractmethod
+    def get_portfolio(self, user_id: int) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def save_portfolio(self, portfolio_data: dict):
+        pass
+
+    @abstractmethod
+    def portfolio_transaction(self, user_id: int):
+        '''
+        Контекстный менеджер: данные портфеля для изменения, сохраняются при выходе без ошибок
+        '''
+        pass
+
+    @abstractmethod
+    def iter_portfolios(self) -> Iterator[dict]:
+        pass
+
+    @abstractmethod
+    def load_rates(self) -> dict:
+        '''
+        Снимок курсов: {"pairs": {...}, "last_refresh": ..., "matrix": {...} или None}
+        '''
+        pass
+
+    @abstractmethod
+    def update_rates(self, new_pairs: dict, last_refresh: str, build_matrix: Callable[[dict], dict] = None):
+        '''
+        Частичное обновление снимка: перезаписываются только переданные пары.
+        build_matrix(все пары) вызывается в той же транзакции, результат хранится вместе со снимком.
+        '''
+        pass
+
+    @abstractmethod
+    def append_history(self, records: list):
+        pass
+
+    @abstractmethod
+    def iter_history(self) -> Iterator[dict]:
+        pass
+
+    @abstractmethod
+    def history_tail(self) -> Any:
+        '''
+        Отметка текущего конца истории (значение, сериализуемое в json) для инкрементального чтения
+        '''
+        pass
+
+    @abstractmethod
+    def iter_history_between(self, start: Any, end: Any) -> Optional[Iterator[dict]]:
+        '''
+        Записи, добавленные после отметки start (None — с начала) и до отметки end.
+        None, если история изменилась не дописыванием и её нужно перечитать целиком.
+        '''
+        pass
+
+    @abstractmethod
+    def rate_at(self, pair: str, at: datetime) -> Optional[Tuple[float, str]]:
+        '''
+        Курс пары из истории, действовавший на момент at: (rate, timestamp) или None
+        '''
+        pass
+
+    @abstractmethod
+    def save_nav_snapshot(self, snapshot: dict):
+        '''
+        Сохранение результата переоценки портфелей: {"base", "computed_at", "navs": {user_id: nav}, ...}
+        '''
+        pass
+
+    @abstractmethod
+    def load_nav_snapshot(self) -> Optional[dict]:
+        pass
+
+    def migrate_users(self) -> int:
+        '''
+        Перенос пользователей из устаревшего формата (нужен только json-хранилищу)
+        '''
+        return 0
+
+    def migrate_portfolios(self) -> int:
+        '''
+        Перенос портфелей из устаревшего формата (нужен только json-хранилищу)
+        '''
+        return 0
+
+    def convert_history(self) -> int:
+        '''
+        Перенос истории из устаревшего формата (нужен только json-хранилищу)
+        '''
+        return 0
+
+    def close(self):
+        pass
+
+
+class JsonStorageBackend(StorageBackend):
+    '''
+    Хранилище на json-файлах в каталоге data_directory
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.user_store = UserStore()
+        self.portfolio_store = PortfolioStore()
+        self.rates_file = settings.get('rates_file', 'rates.json')
+        self.history_store = HistoryStore()
+        self.history_file = settings.get('history_file', 'exchange_rates.json')
+        self.nav_file = settings.get('nav_file', 'nav_snapshot.json')
+
+    def get_user_by_username(self, username):
+        return self.user_store.get_by_username(username)
+
+    def get_user_by_id(self, user_id):
+        return self.user_store.get_by_id(user_id)
+
+    def next_user_id(self):
+        return self.user_store.next_id()
+
+    def add_user(self, user_data):
+        self.user_store.add(user_data)
+
+    def add_users(self, users):
+        return self.user_store.add_many(users)
+
+    def create_user(self, username, make_user):
+        return self.user_store.create(username, make_user)
+
+    def update_user(self, user_data):
+        self.user_store.update(user_data)
+
+    def iter_users(self):
+        yield from self.user_store.iter_all()
+
+    def migrate_users(self):
+        return self.user_store.migrate_legacy()
+
+    def get_portfolio(self, user_id):
+        return self.portfolio_store.load(user_id)
+
+    def save_portfolio(self, portfolio_data):
+        self.portfolio_store.save(portfolio_data)
+
+    @contextmanager
+    def portfolio_transaction(self, user_id):
+        with self.portfolio_store.transaction(user_id) as data:
+            yield data
+
+    def iter_portfolios(self):
+        yield from self.portfolio_store.iter_all()
+
+    def migrate_portfolios(self):
+        return self.portfolio_store.migrate_legacy()
+
+    def load_rates(self):
+        data = self.db.load(self.rates_file)
+        if "pairs" in data:
+            return data
+        return {"pairs": data, "last_refresh": None, "matrix": None}
+
+    def update_rates(self, new_pairs, last_refresh, build_matrix=None):
+        with self.db.transaction(self.rates_file) as current_data:
+            if "pairs" not in current_data:
+                legacy_pairs = dict(current_data)
+                current_data.clear()
+                current_data["pairs"] = legacy_pairs
+            current_data["pairs"].update(new_pairs)
+            current_data["last_refresh"] = last_refresh
+            current_data["matrix"] = build_matrix(current_data["pairs"]) if build_matrix else None
+
+    def append_history(self, records):
+        self.history_store.append(records)
+
+    def iter_history(self):
+        if self.db.file_stamp(self.history_file):
+            history = self.db.load(self.history_file)
+            if isinstance(history, list):
+                yield from history
+        yield from self.history_store.iter_records()
+
+    def history_tail(self):
+        return self.history_store.tail()
+
+    def iter_history_between(self, start, end):
+        return self.history_store.iter_between(start, end)
+
+    def rate_at(self, pair, at):
+        return self.history_store.rate_at(pair, at)
+
+    def convert_history(self):
+        return self.history_store.convert_legacy()
+
+    def save_nav_snapshot(self, snapshot):
+        self.db.save(self.nav_file, snapshot)
+
+    def load_nav_snapshot(self):
+        return self.db.load(self.nav_file) or None
+
+
+_BACKENDS = {}
+
+
+def create_backend(name: str) -> StorageBackend:
+    '''
+    Новый экземпляр хранилища по имени ('json' или 'sqlite')
+    '''
+    if name == 'json':
+        return JsonStorageBackend()
+    if name == 'sqlite':
+        from .sqlite_backend import SqliteStorageBackend
+        return SqliteStorageBackend()
+    raise ValueError(f"Неизвестный тип хранилища: '{name}'")
+
+
+def get_backend() -> StorageBackend:
+    '''
+    Общий экземпляр хранилища, выбранного в настройках (storage_backend)
+    '''
+    name = settings.get('storage_backend', 'json')
+    key = (name, settings.get('data_directory', 'data'))
+    if key not in _BACKENDS:
+        _BACKENDS[key] = create_backend(name)
+    return _BACKENDS[key]
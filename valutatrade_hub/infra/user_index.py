@@ -0,0 +1,72 @@
+# valutatrade_hub/infra/user_index.py
+
+import threading
+from typing import Optional
+
+from .database import db_manager
+from .settings import settings
+
+
+class UserIndex:
+    '''
+    Индекс устаревшего общего users.json в памяти процесса: username -> позиция,
+    user_id -> позиция и счётчик следующего id.
+    Нужен UserStore только для ещё не перенесённых пользователей; строится по users.json,
+    который DatabaseManager уже держит в кеше, и перестраивается при изменении его отпечатка.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.users_file = settings.get('users_file', 'users.json')
+        self._lock = threading.Lock()
+        self._index = None
+
+    def rebuild(self, users_data: list = None) -> dict:
+        '''
+        Полное построение индекса по users.json
+        '''
+        stamp = self.db.file_stamp(self.users_file)
+        if users_data is None:
+            users_data = self.db.load(self.users_file)
+        usernames = {}
+        ids = {}
+        max_id = 0
+        for offset, u in enumerate(users_data):
+            usernames[u['username']] = offset
+            ids[u['user_id']] = offset
+            max_id = max(max_id, u['user_id'])
+
+        index = {"users_stamp": stamp, "next_id": max_id + 1, "usernames": usernames, "ids": ids}
+        with self._lock:
+            self._index = index
+        return index
+
+    def ensure(self) -> dict:
+        '''
+        Актуальный индекс; при изменении users.json извне индекс перестраивается
+        '''
+        index = self._index
+        if index is None or index["users_stamp"] != self.db.file_stamp(self.users_file):
+            return self.rebuild()
+        return index
+
+    def next_id(self) -> int:
+        return self.ensure()["next_id"]
+
+    def _get_at(self, offset: Optional[int], key: str, value) -> Optional[dict]:
+        if offset is None:
+            return None
+        users_data = self.db.load(self.users_file)
+        if offset < len(users_data) and users_data[offset][key] == value:
+            return users_data[offset]
+
+        index = self.rebuild(users_data)
+        offset = index["usernames" if key == 'username' else "ids"].get(value)
+        return users_data[offset] if offset is not None else None
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        return self._get_at(self.ensure()["usernames"].get(username), 'username', username)
+
+    def get_by_id(self, user_id: int) -> Optional[dict]:
+        user_id = int(user_id)
+        return self._get_at(self.ensure()["ids"].get(user_id), 'user_id', user_id)
@@ -0,0 +1,165 @@
+# valutatrade_hub/infra/user_store.py
+
+import hashlib
+import os
+from typing import Iterable, Iterator, Optional
+
+from .database import db_manager
+from .settings import settings
+from .user_index import UserIndex
+
+
+class UserStore:
+    '''
+    Хранилище пользователей: один json-файл на пользователя (users/<user_id>.json),
+    ссылка имя -> id (users/by_name/<sha1(имя)>.json) и счётчик следующего id (users/meta.json).
+    Вход и регистрация читают и пишут только эти маленькие файлы.
+    Общий users.json читается (через UserIndex) только для ещё не перенесённых пользователей;
+    после migrate_legacy он больше не читается, пока его не изменят.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.users_dir = settings.get('users_dir', 'users')
+        self.meta_file = os.path.join(self.users_dir, 'meta.json')
+        self.legacy_file = settings.get('users_file', 'users.json')
+        self.legacy_index = UserIndex()
+
+    def _filename(self, user_id: int) -> str:
+        return os.path.join(self.users_dir, f"{int(user_id)}.json")
+
+    def _name_filename(self, username: str) -> str:
+        digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+        return os.path.join(self.users_dir, 'by_name', digest + '.json')
+
+    def _legacy_pending(self) -> bool:
+        '''
+        Есть ли в users.json пользователи, которые ещё не перенесены
+        '''
+        stamp = self.db.file_stamp(self.legacy_file)
+        if stamp is None:
+            return False
+        migrated = self.db.load(self.meta_file).get('legacy_stamp') if self.db.file_stamp(self.meta_file) else None
+        return migrated != list(stamp)
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        link = self._name_filename(username)
+        if self.db.file_stamp(link):
+            user = self.get_by_id(self.db.load(link)['user_id'])
+            if user is not None and user['username'] == username:
+                return user
+        if self._legacy_pending():
+            return self.legacy_index.get_by_username(username)
+        return None
+
+    def get_by_id(self, user_id: int) -> Optional[dict]:
+        filename = self._filename(user_id)
+        if self.db.file_stamp(filename):
+            return self.db.load(filename)
+        if self._legacy_pending():
+            return self.legacy_index.get_by_id(user_id)
+        return None
+
+    def next_id(self) -> int:
+        '''
+        Следующий свободный id: из users/meta.json, при первом обращении — по users.json и файлам пользователей
+        '''
+        if self.db.file_stamp(self.meta_file):
+            return self.db.load(self.meta_file)['next_id']
+        next_id = self.legacy_index.next_id() if self.db.file_stamp(self.legacy_file) else 1
+        for user_id in self._record_ids():
+            next_id = max(next_id, user_id + 1)
+        return next_id
+
+    def _record_ids(self) -> list:
+        users_path = self.db.path(self.users_dir)
+        if not os.path.isdir(users_path):
+            return []
+        return sorted(int(name[:-5]) for name in os.listdir(users_path) if name.endswith('.json') and name[:-5].isdigit())
+
+    def _write(self, user_data: dict):
+        # сначала запись пользователя, потом ссылка на неё: ссылка никогда не ведёт в пустоту
+        self.db.save(self._filename(user_data['user_id']), user_data)
+        self.db.save(self._name_filename(user_data['username']), {
+            "username": user_data['username'], "user_id": user_data['user_id'],
+        })
+
+    def _bump_next_id(self, next_id: int, **extra):
+        meta = dict(self.db.load(self.meta_file)) if self.db.file_stamp(self.meta_file) else {"next_id": self.next_id()}
+        meta["next_id"] = max(meta["next_id"], next_id)
+        meta.update(extra)
+        self.db.save(self.meta_file, meta)
+
+    def add(self, user_data: dict):
+        with self.db.lock(self.meta_file):
+            self._write(user_data)
+            self._bump_next_id(user_data['user_id'] + 1)
+
+    def add_many(self, users: Iterable[dict]) -> int:
+        '''
+        Запись пачки пользователей с одним обновлением счётчика id
+        '''
+        with self.db.lock(self.meta_file):
+            added = 0
+            next_id = 1
+            for user_data in users:
+                self._write(user_data)
+                next_id = max(next_id, user_data['user_id'] + 1)
+                added += 1
+            if added:
+                self._bump_next_id(next_id)
+            return added
+
+    def create(self, username: str, make_user) -> Optional[dict]:
+        '''
+        Проверка имени, выдача id и запись под блокировкой users/meta.json
+        '''
+        with self.db.lock(self.meta_file):
+            if self.get_by_username(username):
+                return None
+            user_data = make_user(self.next_id())
+            self.add(user_data)
+            return user_data
+
+    def update(self, user_data: dict):
+        '''
+        Перезапись одного пользователя; не перенесённый пользователь из users.json переносится в свой файл
+        '''
+        with self.db.lock(self.meta_file):
+            if self.get_by_id(user_data['user_id']) is None:
+                raise ValueError(f"Пользователь {user_data['user_id']} не найден")
+            self._write(user_data)
+
+    def iter_all(self) -> Iterator[dict]:
+        '''
+        Все пользователи по возрастанию id: файлы пользователей и ещё не перенесённые записи users.json
+        '''
+        seen = set()
+        for user_id in self._record_ids():
+            seen.add(user_id)
+            yield self.db.load(self._filename(user_id))
+
+        if self._legacy_pending():
+            for u in self.db.load(self.legacy_file):
+                if u['user_id'] not in seen:
+                    yield u
+
+    def migrate_legacy(self) -> int:
+        '''
+        Перенос пользователей из общего users.json в отдельные файлы.
+        Уже существующие файлы пользователей не перезаписываются.
+        '''
+        with self.db.lock(self.meta_file), self.db.lock(self.legacy_file):
+            stamp = self.db.file_stamp(self.legacy_file)
+            if stamp is None:
+                return 0
+            migrated = 0
+            next_id = 1
+            for u in self.db.load(self.legacy_file):
+                next_id = max(next_id, u['user_id'] + 1)
+                if self.db.file_stamp(self._filename(u['user_id'])):
+                    continue
+                self._write(u)
+                migrated += 1
+            self._bump_next_id(next_id, legacy_stamp=list(stamp))
+            return migrated
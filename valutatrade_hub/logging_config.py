@@ -1,15 +1,69 @@
 # valutatrade_hub/logging_config.py
 
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 from .infra.settings import settings
 
+# поля, которые log_action передаёт через extra
+STRUCTURED_FIELDS = ("action", "user_id", "latency_ms", "outcome", "error_type")
+
+
+class LazyQueueHandler(QueueHandler):
+    '''
+    QueueHandler, оставляющий потоку QueueListener только форматирование строки журнала и запись в файл.
+    Сообщение собирается из %-аргументов (и исключение переводится в текст) в вызывающем потоке,
+    как у стандартного QueueHandler: аргументы могут измениться после вызова логгера.
+    В отличие от стандартного, запись не форматируется целиком дважды: уровень, время и
+    json-поля добавляет форматтер файла.
+    '''
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # traceback держит кадры вызывающего потока: в очередь уходит только его текст
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    '''
+    Одна запись — одна строка json: ts, level, logger, message и структурные поля log_action
+    '''
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 def setup_logging():
     '''
-    Функция для реализации логирования
+    Функция для реализации логирования: записи ставятся в очередь,
+    запись в файл (с ротацией) выполняет фоновый поток QueueListener
     '''
     log_file = settings.get('log_file', 'logs/valutatrade.log')
     log_dir = os.path.dirname(log_file)
@@ -18,13 +72,30 @@ def setup_logging():
 
     logger = logging.getLogger("valutatrade")
     logger.setLevel(settings.get('log_level', 'INFO'))
+    if logger.handlers:
+        return logger
 
     handler = RotatingFileHandler(log_file, maxBytes=1_000_000, backupCount=5)
-    formatter = logging.Formatter('%(levelname)s %(asctime)s %(message)s', datefmt='%Y-%m-%dT%H:%M:%S')
+    if settings.get('log_format', 'text') == 'json':
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter('%(levelname)s %(asctime)s %(message)s', datefmt='%Y-%m-%dT%H:%M:%S')
     handler.setFormatter(formatter)
-    
-    if not logger.handlers:
-        logger.addHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    # при выходе listener дописывает оставшиеся в очереди записи
+    atexit.register(listener.stop)
+
+    logger.addHandler(LazyQueueHandler(log_queue))
     return logger
 
-app_logger = setup_logging()
\ No newline at end of file
+app_logger = setup_logging()
+
+
+def get_logger(name: str) -> logging.Logger:
+    '''
+    Дочерний логгер "valutatrade.<name>": записи уходят в обработчики основного логгера
+    '''
+    return app_logger.getChild(name)
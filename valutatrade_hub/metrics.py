@@ -0,0 +1,174 @@
+# valutatrade_hub/metrics.py
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# границы корзин гистограмм задержек (секунды)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    body = ','.join(f'{k}="{v}"' for k, v in items)
+    return '{' + body + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def items(self) -> list:
+        with _lock:
+            return sorted(self.values.items())
+
+    def samples(self):
+        with _lock:
+            return [(self.name + _format_labels(key), value) for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    '''
+    Гистограмма с фиксированными корзинами: счётчики по корзинам, сумма и число наблюдений
+    '''
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                # [счётчики по корзинам + корзина +Inf, сумма, число]
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            else:
+                series[0][-1] += 1
+            series[1] += value
+            series[2] += 1
+
+    def summary(self) -> Dict[tuple, dict]:
+        '''
+        {метки: {"count", "sum", "avg", "p50", "p95", "p99"}}; квантили — верхние границы корзин
+        '''
+        result = {}
+        with _lock:
+            items = [(key, [list(s[0]), s[1], s[2]]) for key, s in self.series.items()]
+        for key, (counts, total, count) in sorted(items):
+            entry = {"count": count, "sum": total, "avg": total / count if count else 0.0}
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                entry[name] = self._quantile(counts, count, q)
+            result[key] = entry
+        return result
+
+    def _quantile(self, counts, count, q) -> float:
+        target = q * count
+        running = 0
+        for i, c in enumerate(counts):
+            running += c
+            if running >= target and c:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return 0.0
+
+    def samples(self):
+        lines = []
+        with _lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self.series.items())
+        for key, (counts, total, count) in items:
+            running = 0
+            for bound, c in zip(self.buckets, counts):
+                running += c
+                lines.append((self.name + '_bucket' + _format_labels(key, ('le', repr(bound))), running))
+            lines.append((self.name + '_bucket' + _format_labels(key, ('le', '+Inf')), count))
+            lines.append((self.name + '_sum' + _format_labels(key), total))
+            lines.append((self.name + '_count' + _format_labels(key), count))
+        return lines
+
+
+class MetricsRegistry:
+    '''
+    Реестр метрик процесса: счётчики и гистограммы по имени, экспорт в текстовом формате Prometheus
+    '''
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        with _lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str = '', buckets=LATENCY_BUCKETS) -> Histogram:
+        with _lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def register_collector(self, collect):
+        '''
+        collect() -> [(имя, тип, описание, значение)] — значения, которые считаются вне реестра
+        (например, статистика кеша DatabaseManager)
+        '''
+        self._collectors.append(collect)
+
+    def metrics(self) -> list:
+        with _lock:
+            return list(self._metrics.values())
+
+    def collected(self) -> list:
+        samples = []
+        for collect in self._collectors:
+            samples.extend(collect())
+        return samples
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            kind = 'histogram' if isinstance(metric, Histogram) else 'counter'
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            lines.extend(f"{name} {value}" for name, value in metric.samples())
+        for name, kind, help_text, value in self.collected():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        '''
+        Атомарная запись файла для textfile collector node exporter
+        '''
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+metrics = MetricsRegistry()
@@ -1,23 +1,24 @@
 # valutatrade_hub/parser_service/api_clients.py
 from abc import ABC, abstractmethod
-from datetime import datetime
 
 import requests
 
 from ..core.exceptions import ApiRequestError
 from .config import parser_config
+from .http_cache import http_cache
 
 
 class BaseApiClient(ABC):
     @abstractmethod
-    def fetch_rates(self) -> dict:
+    def fetch_rates(self, revalidate: bool = False) -> dict:
         '''
-        Функция для форматирования в словарный вид
+        Функция для форматирования в словарный вид.
+        revalidate=True — не полагаться на свежесть http-кеша (ручное обновление)
         '''
         pass
 
 class CoinGeckoClient(BaseApiClient):
-    def fetch_rates(self) -> dict:
+    def fetch_rates(self, revalidate: bool = False) -> dict:
         ids = ",".join(parser_config.CRYPTO_ID_MAP.values())
         vs_currency = parser_config.BASE_CURRENCY.lower()
         
@@ -28,14 +29,18 @@ class CoinGeckoClient(BaseApiClient):
         }
         
         try:
-            response = requests.get(url, params=params, timeout=parser_config.REQUEST_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
+            response = http_cache.get_json(
+                url, params=params, timeout=parser_config.REQUEST_TIMEOUT, revalidate=revalidate,
+            )
         except requests.RequestException as e:
             raise ApiRequestError(f"CoinGecko: {str(e)}")
+        if response.status_code != 200 or not isinstance(response.data, dict):
+            raise ApiRequestError(f"CoinGecko: HTTP {response.status_code}")
+        data = response.data
 
         result = {}
-        now = datetime.utcnow().isoformat()
+        # время получения данных от источника (при ответе из кеша — время последней проверки)
+        now = response.fetched_at
         
         id_to_ticker = {v: k for k, v in parser_config.CRYPTO_ID_MAP.items()}
         
@@ -53,7 +58,7 @@ class CoinGeckoClient(BaseApiClient):
         return result
 
 class ExchangeRateApiClient(BaseApiClient):
-    def fetch_rates(self) -> dict:
+    def fetch_rates(self, revalidate: bool = False) -> dict:
         key = parser_config.EXCHANGERATE_API_KEY
         if not key:
             raise ApiRequestError("ExchangeRate-API: API Key не найден в конфигурации")
@@ -62,16 +67,16 @@ class ExchangeRateApiClient(BaseApiClient):
         url = f"{parser_config.EXCHANGERATE_API_URL}/{key}/latest/{base}"
         
         try:
-            response = requests.get(url, timeout=parser_config.REQUEST_TIMEOUT)
-            data = response.json()
-            if response.status_code != 200 or data.get('result') != 'success':
-                error_msg = data.get('error-type', 'Unknown error')
-                raise ApiRequestError(f"ExchangeRate-API: {error_msg}")
+            response = http_cache.get_json(url, timeout=parser_config.REQUEST_TIMEOUT, revalidate=revalidate)
         except requests.RequestException as e:
             raise ApiRequestError(f"ExchangeRate-API: {str(e)}")
+        data = response.data if isinstance(response.data, dict) else {}
+        if response.status_code != 200 or data.get('result') != 'success':
+            error_msg = data.get('error-type', f"HTTP {response.status_code}")
+            raise ApiRequestError(f"ExchangeRate-API: {error_msg}")
 
         result = {}
-        now = datetime.utcnow().isoformat()
+        now = response.fetched_at
         
         rates = data.get('conversion_rates', {}) 
         
@@ -9,13 +9,22 @@ from typing import Dict, Tuple
 class ParserConfig:
     EXCHANGERATE_API_KEY: str = os.getenv("EXCHANGERATE_API_KEY")
 
-    COINGECKO_URL: str = "https://api.coingecko.com/api/v3/simple/price"
-    EXCHANGERATE_API_URL: str = "https://v6.exchangerate-api.com/v6"
+    # адреса источников переопределяются, например, для локального сервера-заглушки (python -m benchmarks serve)
+    COINGECKO_URL: str = os.getenv("VALUTATRADE_COINGECKO_URL", "https://api.coingecko.com/api/v3/simple/price")
+    EXCHANGERATE_API_URL: str = os.getenv("VALUTATRADE_EXCHANGERATE_URL", "https://v6.exchangerate-api.com/v6")
 
     BASE_CURRENCY: str = "USD"
     FIAT_CURRENCIES: Tuple[str, ...] = ("EUR", "GBP", "RUB")
     
     CRYPTO_ID_MAP: Dict[str, str] = None
+
+    # интервалы планировщика по источникам (секунды)
+    UPDATE_INTERVALS: Dict[str, float] = None
+    # случайное отклонение момента запуска: доля интервала
+    SCHEDULER_JITTER: float = 0.1
+    # повтор после ошибки: BACKOFF_BASE_SECONDS * 2^(n-1), не больше BACKOFF_MAX_SECONDS
+    BACKOFF_BASE_SECONDS: float = 5.0
+    BACKOFF_MAX_SECONDS: float = 900.0
     
     def __post_init__(self):
         if self.CRYPTO_ID_MAP is None:
@@ -24,10 +33,24 @@ class ParserConfig:
                 "ETH": "ethereum",
                 "SOL": "solana",
             }
+        if self.UPDATE_INTERVALS is None:
+            self.UPDATE_INTERVALS = {
+                "coingecko": float(os.getenv("VALUTATRADE_CRYPTO_INTERVAL", "10")),
+                "exchangerate": float(os.getenv("VALUTATRADE_FIAT_INTERVAL", "3600")),
+            }
 
     RATES_FILE: str = "rates.json"
     HISTORY_FILE: str = "exchange_rates.json"
 
     REQUEST_TIMEOUT: int = 10
 
+    # общий срок ожидания всех источников при параллельном обновлении (секунды)
+    UPDATE_DEADLINE: float = float(os.getenv("VALUTATRADE_UPDATE_DEADLINE", "12"))
+
+    # общий пул keep-alive соединений клиентов API
+    HTTP_POOL_CONNECTIONS: int = 4
+    HTTP_POOL_MAXSIZE: int = 8
+    HTTP_RETRIES: int = 2
+    HTTP_RETRY_BACKOFF: float = 0.5
+
 parser_config = ParserConfig()
\ No newline at end of file
@@ -0,0 +1,130 @@
+# valutatrade_hub/parser_service/http_cache.py
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+from ..infra.database import db_manager
+from ..infra.settings import settings
+from ..logging_config import app_logger
+from ..metrics import metrics
+from .http_session import bounded_timeout, get_session
+
+_cache_results = metrics.counter('valutatrade_http_cache_total', 'HTTP cache lookups: hit, revalidated or miss')
+
+
+class CachedResponse:
+    def __init__(self, status_code: int, data: Any, fetched_at: str, from_cache: bool):
+        self.status_code = status_code
+        self.data = data
+        # время последнего подтверждения данных источником (200 или 304)
+        self.fetched_at = fetched_at
+        self.from_cache = from_cache
+
+
+class HttpCache:
+    '''
+    Дисковый кеш ответов API: http_cache/<sha1(url, params)>.json.
+    Пока запись свежая (Cache-Control max-age или Expires), запрос не выполняется; ответ без этих
+    заголовков свежим не считается. Устаревшая запись (или запрос с revalidate=True) проверяется
+    условным запросом с If-None-Match / If-Modified-Since, и при ответе 304 возвращается
+    сохранённый разобранный json.
+    '''
+
+    def __init__(self):
+        self.db = db_manager
+        self.cache_dir = settings.get('http_cache_dir', 'http_cache')
+        self.enabled = settings.get('http_cache_enabled', True)
+
+    def _filename(self, url: str, params: Optional[dict]) -> str:
+        # ключ не хранит url в открытом виде: в нём может быть API-ключ
+        raw = json.dumps([url, sorted((params or {}).items())])
+        return os.path.join(self.cache_dir, hashlib.sha1(raw.encode()).hexdigest() + '.json')
+
+    @staticmethod
+    def _freshness(headers) -> Optional[float]:
+        '''
+        Срок свежести в секундах по заголовкам; None — кешировать нельзя.
+        Без Cache-Control и Expires — 0: ответ сохраняется только для условных запросов.
+        '''
+        directives = {}
+        for part in headers.get('Cache-Control', '').split(','):
+            name, _, value = part.strip().lower().partition('=')
+            if name:
+                directives[name] = value.strip('"')
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return 0.0
+        if 'max-age' in directives:
+            try:
+                return float(directives['max-age'])
+            except ValueError:
+                return 0.0
+        if 'Expires' in headers:
+            try:
+                expires = parsedate_to_datetime(headers['Expires']).timestamp()
+                return max(expires - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return 0.0
+        return 0.0
+
+    def get_json(self, url: str, params: Optional[dict] = None, timeout: float = None,
+                 revalidate: bool = False) -> CachedResponse:
+        '''
+        GET с учётом кеша. revalidate=True — запрос к источнику даже при свежей записи
+        (условный, если есть ETag/Last-Modified). Исключения requests пробрасываются вызывающему.
+        Таймаут сокращается до остатка срока потока (http_session.request_deadline).
+        '''
+        filename = self._filename(url, params) if self.enabled else None
+        entry = (self.db.load(filename) or None) if filename else None
+        now = time.time()
+        if entry and not revalidate and now < entry['expires_at']:
+            _cache_results.inc(result="hit")
+            return CachedResponse(200, entry['data'], entry['fetched_at'], True)
+
+        timeout = bounded_timeout(timeout)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        fetched_at = datetime.utcnow().isoformat()
+
+        if response.status_code == 304 and entry:
+            freshness = self._freshness(response.headers)
+            entry = {**entry, "fetched_at": fetched_at, "expires_at": now + (freshness or 0.0)}
+            self.db.save(filename, entry)
+            app_logger.debug("HTTP cache revalidated: %s", filename)
+            _cache_results.inc(result="revalidated")
+            return CachedResponse(200, entry['data'], fetched_at, True)
+
+        if filename:
+            _cache_results.inc(result="miss")
+        if response.status_code != 200:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            return CachedResponse(response.status_code, data, fetched_at, False)
+
+        data = response.json()
+        freshness = self._freshness(response.headers)
+        if filename and freshness is not None:
+            self.db.save(filename, {
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "fetched_at": fetched_at,
+                "expires_at": now + freshness,
+                "data": data,
+            })
+        return CachedResponse(response.status_code, data, fetched_at, False)
+
+
+http_cache = HttpCache()
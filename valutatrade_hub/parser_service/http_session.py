@@ -0,0 +1,142 @@
+# valutatrade_hub/parser_service/http_session.py
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..logging_config import app_logger
+from .config import parser_config
+
+_session = None
+_lock = threading.Lock()
+# срок (time.monotonic) текущей операции потока: запросы и повторы не выходят за него
+_deadline = threading.local()
+
+
+@contextmanager
+def request_deadline(deadline: Optional[float]):
+    '''
+    Срок для всех запросов, выполняемых в этом потоке внутри блока (момент по time.monotonic).
+    None — без ограничения.
+    '''
+    previous = getattr(_deadline, 'value', None)
+    _deadline.value = deadline
+    try:
+        yield
+    finally:
+        _deadline.value = previous
+
+
+def remaining_time() -> Optional[float]:
+    '''
+    Секунды до срока текущего потока; None — срок не задан
+    '''
+    deadline = getattr(_deadline, 'value', None)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def bounded_timeout(timeout: Optional[float]) -> Optional[float]:
+    '''
+    Таймаут запроса с учётом срока потока: min(timeout, остаток срока).
+    Если срок уже истёк, запрос не выполняется — requests.Timeout.
+    '''
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise requests.Timeout("update deadline exceeded")
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class DeadlineRetry(Retry):
+    '''
+    Повторы urllib3 в пределах срока потока: повтор, который начался бы после срока
+    (с учётом паузы перед ним), не выполняется, пауза по Retry-After не длиннее остатка срока
+    '''
+
+    def is_exhausted(self) -> bool:
+        remaining = remaining_time()
+        if remaining is not None and remaining <= self.get_backoff_time():
+            return True
+        return super().is_exhausted()
+
+    def sleep(self, response=None) -> None:
+        remaining = remaining_time()
+        if remaining is None:
+            return super().sleep(response)
+        pause = self.get_retry_after(response) if response is not None and self.respect_retry_after_header else None
+        if pause is None:
+            pause = self.get_backoff_time()
+        time.sleep(max(0.0, min(pause, remaining)))
+
+
+def get_session() -> requests.Session:
+    '''
+    Общая для всех клиентов API сессия с пулом keep-alive соединений и политикой повторов,
+    ограниченной сроком потока (request_deadline).
+    Создаётся при первом обращении и закрывается при завершении процесса.
+    '''
+    global _session
+    with _lock:
+        if _session is None:
+            retry = DeadlineRetry(
+                total=parser_config.HTTP_RETRIES,
+                backoff_factor=parser_config.HTTP_RETRY_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=parser_config.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=parser_config.HTTP_POOL_MAXSIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            atexit.register(close_session)
+        return _session
+
+
+def close_session():
+    '''
+    Закрытие сессии и всех соединений пула
+    '''
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            app_logger.debug("HTTP session closed")
+
+
+def connection_stats() -> dict:
+    '''
+    Счётчики пулов по хостам: открыто соединений, выполнено запросов, из них по уже открытому соединению
+    '''
+    stats = {}
+    with _lock:
+        if _session is None:
+            return stats
+        adapters = {id(a): a for a in _session.adapters.values()}.values()
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{pool.scheme}://{pool.host}:{pool.port}" if pool.port else f"{pool.scheme}://{pool.host}"
+                entry = stats.setdefault(host, {"connections": 0, "requests": 0, "reused": 0})
+                entry["connections"] += pool.num_connections
+                entry["requests"] += pool.num_requests
+                entry["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
@@ -1,25 +1,51 @@
-# valutatrade_hub/parser_service/sheduler.py
+# valutatrade_hub/parser_service/scheduler.py
+import random
+import signal
 import threading
 import time
-from typing import Optional
+from typing import Dict, Optional
 
+from ..infra.settings import settings
 from ..logging_config import get_logger
-from .config import ParserConfig
+from ..metrics import metrics
+from .config import ParserConfig, parser_config
 from .updater import RatesUpdater
 
 
 class Scheduler:
     '''
-    Планировщик периодического обновления курсов
+    Планировщик периодического обновления курсов.
+    У каждого источника свой интервал и своё время следующего запуска (со случайным сдвигом),
+    после ошибок интервал растёт экспоненциально. Между запусками поток спит в Event.wait
+    до ближайшего срока, поэтому простой не тратит процессор.
     '''
     
-    def __init__(self, config: ParserConfig = None):
-        self.config = config or ParserConfig.from_env()
-        self.updater = RatesUpdater(config)
+    def __init__(self, config: ParserConfig = None, updater: RatesUpdater = None):
+        self.config = config or parser_config
+        self.updater = updater or RatesUpdater()
         self.logger = get_logger('scheduler')
+        self.intervals: Dict[str, float] = {
+            name: interval for name, interval in self.config.UPDATE_INTERVALS.items()
+            if name in self.updater.clients
+        }
+        self.next_run: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._is_running = False
+
+    def _jittered(self, seconds: float) -> float:
+        spread = seconds * self.config.SCHEDULER_JITTER
+        return max(seconds + random.uniform(-spread, spread), 0.0)
+
+    def _reset_schedule(self):
+        now = time.monotonic()
+        # первый запуск разнесён по времени, чтобы источники не опрашивались синхронно
+        self.next_run = {
+            name: now + random.uniform(0, interval * self.config.SCHEDULER_JITTER)
+            for name, interval in self.intervals.items()
+        }
+        self.failures = {name: 0 for name in self.intervals}
     
     def start(self):
         '''
@@ -30,10 +56,11 @@ class Scheduler:
             return
         
         self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._reset_schedule()
+        self._thread = threading.Thread(target=self._run_loop, name='rates-scheduler', daemon=True)
         self._thread.start()
         self._is_running = True
-        self.logger.info('Scheduler started')
+        self.logger.info('Scheduler started: %s', self.intervals)
     
     def stop(self):
         '''
@@ -43,32 +70,72 @@ class Scheduler:
             return
             
         self._stop_event.set()
-        if self._thread:
-            self._thread.join(timeout=3)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=30)
         self._is_running = False
         self.logger.info('Scheduler stopped')
+
+    def run_forever(self):
+        '''
+        Работа в текущем потоке до stop() или сигнала SIGINT/SIGTERM
+        '''
+        self._stop_event.clear()
+        self._reset_schedule()
+        self._is_running = True
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self._stop_event.set())
+        self.logger.info('Scheduler running in foreground: %s', self.intervals)
+        try:
+            self._run_loop()
+        finally:
+            self._is_running = False
+            self.logger.info('Scheduler stopped')
     
     def _run_loop(self):
         '''
         Основной цикл планировщика
         '''
         while not self._stop_event.is_set():
-            try:
-                self.logger.debug('Running scheduled update...')
-                self.updater.run_update()
-                
-                wait_time = self.config.UPDATE_INTERVAL_MINUTES * 60
-                for _ in range(wait_time * 2):
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(0.5)
-                
-            except Exception as e:
-                self.logger.error(f'Scheduler error: {e}')
-                for _ in range(60):
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(0.5)
+            now = time.monotonic()
+            for name in sorted(self.next_run, key=self.next_run.get):
+                if self.next_run[name] > now or self._stop_event.is_set():
+                    continue
+                self._run_source(name)
+
+            if not self.next_run:
+                self._stop_event.wait()
+                continue
+            delay = min(self.next_run.values()) - time.monotonic()
+            self._stop_event.wait(timeout=max(delay, 0.0))
+
+    def _run_source(self, name: str):
+        try:
+            self.logger.debug('Running scheduled update for %s...', name)
+            report = self.updater.run_update(name)
+            ok = report['sources'].get(name, {}).get('status') == 'ok'
+        except Exception as e:
+            self.logger.error('Scheduler error in %s: %s', name, e)
+            ok = False
+
+        if ok:
+            self.failures[name] = 0
+            delay = self._jittered(self.intervals[name])
+        else:
+            self.failures[name] += 1
+            backoff = self.config.BACKOFF_BASE_SECONDS * 2 ** (self.failures[name] - 1)
+            delay = self._jittered(min(backoff, self.config.BACKOFF_MAX_SECONDS))
+            self.logger.warning('%s failed %d time(s) in a row, retry in %.1fs', name, self.failures[name], delay)
+        self.next_run[name] = time.monotonic() + delay
+        self._export_metrics()
+
+    def _export_metrics(self):
+        metrics_file = settings.get('metrics_file')
+        if not metrics_file:
+            return
+        try:
+            metrics.write_prometheus(metrics_file)
+        except OSError as e:
+            self.logger.error('Failed to write metrics to %s: %s', metrics_file, e)
     
     def run_once(self):
         '''
@@ -81,4 +148,32 @@ class Scheduler:
         '''
         Проверка запущен ли планировщик
         '''
-        return self._is_running and self._thread and self._thread.is_alive()
+        return bool(self._is_running and (self._thread is None or self._thread.is_alive()))
+
+    def status(self) -> dict:
+        '''
+        Секунды до следующего запуска и число ошибок подряд по источникам
+        '''
+        now = time.monotonic()
+        return {
+            name: {
+                "interval": self.intervals[name],
+                "next_in": max(self.next_run.get(name, now) - now, 0.0),
+                "failures": self.failures.get(name, 0),
+            }
+            for name in self.intervals
+        }
+
+
+def main():
+    '''Фоновое обновление курсов: valutatrade-daemon'''
+    from ..core.utils import ensure_data_files
+
+    ensure_data_files()
+    print("Планировщик обновления курсов запущен (Ctrl+C для остановки).")
+    Scheduler().run_forever()
+    print("Планировщик остановлен.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,32 @@
 
 from datetime import datetime
 
-from ..infra.database import db_manager
-from .config import parser_config
+from ..core.rate_matrix import RateMatrix
+from ..infra.settings import settings
+from ..infra.storage_backend import get_backend
 
 
 class RatesStorage:
     def __init__(self):
-        self.db = db_manager
+        self.backend = get_backend()
 
     def save_snapshot(self, new_rates: dict):
         '''
-        Функция обновления текущих курсов
+        Функция обновления текущих курсов; вместе со снимком сохраняется матрица кросс-курсов
         '''
-        current_data = self.db.load(parser_config.RATES_FILE)
-        
-        if "pairs" not in current_data:
-            current_data = {"pairs": {}, "last_refresh": None}
-            
-        current_data["pairs"].update(new_rates)
-        current_data["last_refresh"] = datetime.utcnow().isoformat()
-        
-        self.db.save(parser_config.RATES_FILE, current_data)
+        last_refresh = datetime.utcnow().isoformat()
+        base = settings.get('default_base_currency', 'USD')
+
+        def build_matrix(pairs):
+            return RateMatrix.from_pairs(pairs, base, last_refresh).to_dict()
+
+        self.backend.update_rates(new_rates, last_refresh, build_matrix)
 
     def append_history(self, new_rates: dict):
         '''
-        Функция добавления истории курсов в exchange_rates.json
+        Функция добавления истории курсов
         '''
-        history = self.db.load(parser_config.HISTORY_FILE)
-        if not isinstance(history, list):
-            history = []
-
+        records = []
         for pair, info in new_rates.items():
 
             parts = pair.split('_')
@@ -45,6 +41,6 @@ class RatesStorage:
                 "timestamp": info['updated_at'],
                 "source": info['source']
             }
-            history.append(record)
-        
-        self.db.save(parser_config.HISTORY_FILE, history)
\ No newline at end of file
+            records.append(record)
+
+        self.backend.append_history(records)
\ No newline at end of file
@@ -1,10 +1,22 @@
 # valutatrade_hub/parser_service/updater.py
 
+import threading
+import time
+from concurrent.futures import Future, wait
+
 from ..core.exceptions import ApiRequestError
+from ..core.valuation import ValuationEngine
+from ..infra.settings import settings
 from ..logging_config import app_logger
+from ..metrics import metrics
 from .api_clients import CoinGeckoClient, ExchangeRateApiClient
+from .config import parser_config
+from .http_session import request_deadline
 from .storage import RatesStorage
 
+_fetch_seconds = metrics.histogram('valutatrade_api_fetch_seconds', 'Latency of successful rate provider requests')
+_fetch_total = metrics.counter('valutatrade_api_fetch_total', 'Rate provider requests by outcome')
+
 
 class RatesUpdater:
     def __init__(self):
@@ -13,38 +25,134 @@ class RatesUpdater:
             "coingecko": CoinGeckoClient(),
             "exchangerate": ExchangeRateApiClient()
         }
+        self.valuation = ValuationEngine(self.storage.backend)
+        # момент последней переоценки (time.monotonic) для ограничения её частоты
+        self._last_revalue = None
+        # состояние источников после последнего обновления:
+        # {name: {"status": "ok" | "error" | "timeout", "count", "elapsed_ms", "error"}}
+        self.last_report = {}
 
-    def run_update(self, source: str = None) -> int:
+    def run_update(self, source: str = None, revalidate: bool = False) -> dict:
         '''
-        Запуск обновления курсов
+        Запуск обновления курсов: источники опрашиваются параллельно с общим сроком ожидания.
+        Полученные к сроку курсы сохраняются, опоздавшие и упавшие источники попадают в отчёт.
+        revalidate=True (ручной запуск) — запрос к источникам даже при свежем http-кеше.
+        Возвращает {"updated": число сохранённых пар, "sources": {имя: состояние}}.
+        В stdout ничего не пишется: метод вызывается и из фоновых потоков.
         '''
         app_logger.info("Starting rates update...")
         all_rates = {}
-        
-        targets = [source] if source else self.clients.keys()
-        
-        for name in targets:
-            if name not in self.clients:
-                print(f"Unknown source: {name}")
+        sources = {}
+
+        targets = [source] if source else list(self.clients.keys())
+        for name in [t for t in targets if t not in self.clients]:
+            app_logger.error("Unknown rates source: %s", name)
+            sources[name] = {"status": "error", "error": "unknown source"}
+        targets = [t for t in targets if t in self.clients]
+        if not targets:
+            return self._finish(sources, 0)
+
+        started = time.perf_counter()
+        deadline = time.monotonic() + parser_config.UPDATE_DEADLINE
+        futures = {self._start_fetch(name, revalidate, deadline): name for name in targets}
+        # опоздавшие запросы не ждём: их результат будет отброшен, а сами они прервутся по сроку
+        done, _ = wait(futures, timeout=parser_config.UPDATE_DEADLINE)
+
+        for future, name in futures.items():
+            if future not in done:
+                app_logger.error("Source %s missed the %ss update deadline", name, parser_config.UPDATE_DEADLINE)
+                sources[name] = {"status": "timeout", "error": f"deadline {parser_config.UPDATE_DEADLINE}s"}
                 continue
-                
-            client = self.clients[name]
             try:
-                rates = client.fetch_rates()
-                count = len(rates)
-                app_logger.info(f"Fetching from {name}... OK ({count} rates)")
+                rates, elapsed_ms = future.result()
+                app_logger.info("Fetching from %s... OK (%d rates, %s ms)", name, len(rates), elapsed_ms)
+                sources[name] = {"status": "ok", "count": len(rates), "elapsed_ms": elapsed_ms}
                 all_rates.update(rates)
             except ApiRequestError as e:
-                app_logger.error(f"Failed to fetch from {name}: {e}")
-                print(f"Ошибка при обновлении {name}: {e}")
+                app_logger.error("Failed to fetch from %s: %s", name, e)
+                sources[name] = {"status": "error", "error": str(e)}
             except Exception as e:
-                app_logger.error(f"Unexpected error in {name}: {e}")
+                app_logger.error("Unexpected error in %s: %s", name, e)
+                sources[name] = {"status": "error", "error": str(e)}
+
+        app_logger.info("Sources polled in %.1f ms", (time.perf_counter() - started) * 1000)
 
         if all_rates:
+            # ответы из http-кеша повторяют уже записанные курсы: в историю идут только новые точки
+            current = self.storage.backend.load_rates()["pairs"]
+            fresh = {
+                pair: info for pair, info in all_rates.items()
+                if current.get(pair, {}).get('updated_at') != info['updated_at']
+            }
             self.storage.save_snapshot(all_rates)
-            self.storage.append_history(all_rates)
+            if fresh:
+                self.storage.append_history(fresh)
             
-            app_logger.info(f"Writing {len(all_rates)} rates to storage...")
-            return len(all_rates)
-        
-        return 0
\ No newline at end of file
+            app_logger.info("Writing %d rates to storage...", len(all_rates))
+            if settings.get('nav_revalue_on_update', True):
+                self._revalue_debounced()
+        return self._finish(sources, len(all_rates))
+
+    def _finish(self, sources: dict, updated: int) -> dict:
+        report = {"updated": updated, "sources": sources}
+        self.last_report = sources
+        return report
+
+    def _start_fetch(self, name: str, revalidate: bool, deadline: float) -> Future:
+        '''
+        Опрос источника в отдельном daemon-потоке: незавершённый к сроку запрос
+        не задерживает ни вызывающего, ни выход из процесса.
+        Запросы потока ограничены сроком deadline (таймауты и повторы http-сессии).
+        '''
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                with request_deadline(deadline):
+                    result = self._fetch(name, revalidate)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        threading.Thread(target=run, name=f"rates-fetch-{name}", daemon=True).start()
+        return future
+
+    def _fetch(self, name: str, revalidate: bool = False):
+        started = time.perf_counter()
+        try:
+            rates = self.clients[name].fetch_rates(revalidate=revalidate)
+        except Exception as e:
+            _fetch_total.inc(source=name, outcome=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        _fetch_seconds.observe(elapsed, source=name)
+        _fetch_total.inc(source=name, outcome="ok")
+        return rates, round(elapsed * 1000, 1)
+
+    def _revalue_debounced(self):
+        '''
+        Переоценка после обновления, но не чаще nav_revalue_min_interval_seconds:
+        проход по всем портфелям не должен выполняться на каждом частом обновлении курсов
+        '''
+        interval = float(settings.get('nav_revalue_min_interval_seconds', 60))
+        now = time.monotonic()
+        if self._last_revalue is not None and now - self._last_revalue < interval:
+            app_logger.debug("Portfolio revaluation skipped: last one %.1f s ago", now - self._last_revalue)
+            return
+        self._last_revalue = now
+        self.revalue_portfolios()
+
+    def revalue_portfolios(self):
+        '''
+        Переоценка всех портфелей по только что сохранённому снимку
+        '''
+        try:
+            snapshot = self.valuation.revalue()
+            app_logger.info(
+                "Revalued %d portfolios in %s ms (total %.2f %s)",
+                len(snapshot['navs']), snapshot['elapsed_ms'], snapshot['total'], snapshot['base'],
+            )
+        except Exception as e:
+            app_logger.error("Portfolio revaluation failed: %s", e)
@@ -0,0 +1,60 @@
+# valutatrade_hub/profiling.py
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+from .infra.settings import settings
+from .logging_config import app_logger
+
+
+class CommandProfiler:
+    '''
+    Профилирование отдельных команд CLI через cProfile.
+    Для каждой команды сохраняется дамп pstats <profile_dir>/<время>-<команда>.prof
+    (открывается python -m pstats или snakeviz), а в stderr печатаются top-N записей
+    по cumulative — stdout остаётся за выводом команды, в том числе в режиме --json.
+    '''
+
+    def __init__(self, directory: Optional[str] = None, top_n: Optional[int] = None, stream=None):
+        self.directory = directory or settings.get('profile_dir', 'profiles')
+        self.top_n = top_n if top_n is not None else int(settings.get('profile_top_n', 20))
+        self.stream = stream
+        self.last_dump = None
+
+    def run(self, command: str, func, *args, **kwargs):
+        '''
+        Выполнение func(*args, **kwargs) под профилировщиком; результат и исключения пробрасываются
+        '''
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._report(command, profiler, elapsed)
+
+    def _report(self, command: str, profiler: cProfile.Profile, elapsed: float):
+        stream = self.stream or sys.stderr
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%dT%H%M%S.%f')
+            safe_command = re.sub(r'[^\w.-]', '_', command) or 'command'
+            self.last_dump = os.path.join(self.directory, f"{stamp}-{safe_command}.prof")
+            profiler.dump_stats(self.last_dump)
+        except OSError as e:
+            self.last_dump = None
+            app_logger.error("Failed to write profile for %s: %s", command, e)
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        print(f"\n[profile] {command}: {elapsed * 1000:.1f} мс, дамп: {self.last_dump or 'не сохранён'}", file=stream)
+        print(buffer.getvalue().strip('\n'), file=stream)
+        app_logger.info("PROFILE command=%s elapsed_ms=%.1f dump=%s", command, elapsed * 1000, self.last_dump)